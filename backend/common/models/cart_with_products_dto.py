@@ -0,0 +1,11 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from backend.common.models.cart_dto import CartDto
+from backend.common.models.product_from_cart_dto import ProductFromCartDto
+
+
+class CartWithProductsDto(BaseModel):
+    cart: CartDto
+    products: List[ProductFromCartDto]
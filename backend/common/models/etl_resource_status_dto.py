@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class EtlResourceStatusDto(BaseModel):
+    resource: str
+    status: str
+    extracted_records: int = 0
+    loaded_records: int = 0
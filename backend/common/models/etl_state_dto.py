@@ -0,0 +1,12 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class EtlStateDto(BaseModel):
+    resource: str
+    skip_offset: int = 0
+    last_id: Optional[int] = None
+    content_hash: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
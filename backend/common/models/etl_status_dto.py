@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from backend.common.models.etl_resource_status_dto import EtlResourceStatusDto
+from backend.common.models.metric_sample_dto import MetricSampleDto
+
+
+class EtlStatusDto(BaseModel):
+    status: str
+    full_refresh: bool = False
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    resources: List[EtlResourceStatusDto] = []
+    profile_path: Optional[str] = None
+    metrics: List[MetricSampleDto] = []
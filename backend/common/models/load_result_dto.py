@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class LoadResultDto(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
@@ -0,0 +1,9 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class MetricSampleDto(BaseModel):
+    name: str
+    labels: Dict[str, str] = {}
+    value: float
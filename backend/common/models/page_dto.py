@@ -0,0 +1,8 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class PageDto(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[int] = None
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class ResponseCacheStatsDto(BaseModel):
+    generation: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class StageMetricsDto(BaseModel):
+    pipeline: str
+    stage: str
+    batches: int
+    records: int
+    busy_seconds: float
+    wall_seconds: float
+    records_per_second: float
+    max_queue_depth: int
+    mean_queue_depth: float
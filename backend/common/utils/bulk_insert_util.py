@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Set
+
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from backend.common.utils.metrics import metrics
+
+DB_WRITE_SECONDS: str = "etl_db_write_seconds"
+DB_ROWS_WRITTEN: str = "etl_db_rows_written_total"
+
+
+class BulkInsertUtil:
+    @staticmethod
+    def insert_ignoring_duplicates(
+        db_session: Session,
+        entity: Any,
+        rows: List[Dict[str, Any]],
+        key_column: InstrumentedAttribute,
+    ) -> Set[Any]:
+        # One multi-row INSERT ... ON CONFLICT DO NOTHING; the database does the dedup
+        # and RETURNING tells us which keys were actually new.
+        if not rows:
+            return set()
+        statement = (
+            sqlite_insert(entity)
+            .on_conflict_do_nothing(index_elements=[key_column])
+            .returning(key_column)
+        )
+        return BulkInsertUtil.__write_returning(db_session, entity, statement, rows)
+
+    @staticmethod
+    def upsert(
+        db_session: Session,
+        entity: Any,
+        rows: List[Dict[str, Any]],
+        key_column: InstrumentedAttribute,
+    ) -> Set[Any]:
+        # INSERT ... ON CONFLICT DO UPDATE overwriting every column taken from the rows
+        if not rows:
+            return set()
+        statement = sqlite_insert(entity)
+        statement = statement.on_conflict_do_update(
+            index_elements=[key_column],
+            set_={
+                column: statement.excluded[column]
+                for column in rows[0]
+                if column != key_column.key
+            },
+        ).returning(key_column)
+        return BulkInsertUtil.__write_returning(db_session, entity, statement, rows)
+
+    @staticmethod
+    def delete_where_in(
+        db_session: Session, column: InstrumentedAttribute, values: List[Any]
+    ) -> None:
+        if values:
+            table: str = column.class_.__tablename__
+            with metrics.timed(DB_WRITE_SECONDS, table=table):
+                db_session.execute(delete(column.class_).where(column.in_(values)))
+
+    @staticmethod
+    def insert_all(db_session: Session, entity: Any, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        with metrics.timed(DB_WRITE_SECONDS, table=entity.__tablename__):
+            db_session.execute(insert(entity), rows)
+        metrics.increment(DB_ROWS_WRITTEN, len(rows), table=entity.__tablename__)
+        return len(rows)
+
+    @staticmethod
+    def __write_returning(
+        db_session: Session, entity: Any, statement: Any, rows: List[Dict[str, Any]]
+    ) -> Set[Any]:
+        # Rows written counts what the database actually inserted or updated
+        with metrics.timed(DB_WRITE_SECONDS, table=entity.__tablename__):
+            keys: Set[Any] = set(db_session.scalars(statement, rows).all())
+        metrics.increment(DB_ROWS_WRITTEN, len(keys), table=entity.__tablename__)
+        return keys
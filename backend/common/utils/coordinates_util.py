@@ -1,18 +1,138 @@
-from typing import Dict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import reverse_geocode
 
-from backend.common.utils.logger import logger
+from backend.common.utils.geocode_cache import CoordinatesKey, GeocodeCache
+from backend.common.utils.logger import log_fields, logger
+from backend.common.utils.metrics import metrics
 
 
 class CoordinatesUtil:
+    UNKNOWN_COUNTRY: str = "Unknown Country"
+    __GEOCODE_SECONDS: str = "etl_geocode_seconds"
+    __GEOCODE_POINTS: str = "etl_geocode_points_total"
+    __cache: GeocodeCache = GeocodeCache()
+
+    @staticmethod
+    def configure_cache(cache: GeocodeCache) -> None:
+        CoordinatesUtil.__cache.close()
+        CoordinatesUtil.__cache = cache
+
+    @staticmethod
+    def get_cache() -> GeocodeCache:
+        return CoordinatesUtil.__cache
+
     @staticmethod
     def get_country_by_coordinates(latitude: str, longitude: str) -> str:
         try:
             location: Dict[str, str] = reverse_geocode.get((latitude, longitude))
             country: str = location.get("country")
-            logger.info(f"Country recognized by coordinates: {country}")
+            logger.debug("Country recognized by coordinates: %s", country)
             return country
         except Exception as e:
-            logger.error(f"Error occurred while getting country by coordinates: {e}")
-            return "Unknown Country"
+            logger.error("Error occurred while getting country by coordinates: %s", e)
+            return CoordinatesUtil.UNKNOWN_COUNTRY
+
+    @staticmethod
+    def get_countries_by_coordinates(
+        coordinates: Sequence[Tuple[Any, Any]],
+    ) -> List[str]:
+        countries: List[str] = [CoordinatesUtil.UNKNOWN_COUNTRY] * len(coordinates)
+        if not coordinates:
+            return countries
+
+        points: np.ndarray = CoordinatesUtil.__to_points(coordinates)
+        is_valid: np.ndarray = (
+            np.isfinite(points).all(axis=1)
+            & (np.abs(points[:, 0]) <= 90)
+            & (np.abs(points[:, 1]) <= 180)
+        )
+        valid_positions: np.ndarray = np.flatnonzero(is_valid)
+        metrics.increment(
+            CoordinatesUtil.__GEOCODE_POINTS,
+            len(coordinates) - len(valid_positions),
+            source="invalid",
+        )
+        if len(valid_positions) < len(coordinates):
+            logger.warning(
+                "%d of %d coordinates are invalid, using '%s'",
+                len(coordinates) - len(valid_positions),
+                len(coordinates),
+                CoordinatesUtil.UNKNOWN_COUNTRY,
+            )
+        if not len(valid_positions):
+            return countries
+
+        cache: GeocodeCache = CoordinatesUtil.__cache
+        keys: List[CoordinatesKey] = cache.keys(points[valid_positions])
+        cached_countries: List[Optional[str]] = cache.get_many(keys)
+        # Geocode each missing key once, using the first original point that maps to it
+        missing: Dict[CoordinatesKey, int] = {}
+        for position, key, country in zip(valid_positions, keys, cached_countries):
+            if country is None:
+                missing.setdefault(key, position)
+
+        with metrics.timed(CoordinatesUtil.__GEOCODE_SECONDS):
+            geocoded: Dict[CoordinatesKey, str] = CoordinatesUtil.__search(
+                points, missing
+            )
+        cache.put_many(geocoded)
+        metrics.increment(
+            CoordinatesUtil.__GEOCODE_POINTS,
+            len(valid_positions) - len(missing),
+            source="cache",
+        )
+        metrics.increment(CoordinatesUtil.__GEOCODE_POINTS, len(missing), source="geocoded")
+
+        for position, key, country in zip(valid_positions, keys, cached_countries):
+            countries[position] = (
+                country or geocoded.get(key) or CoordinatesUtil.UNKNOWN_COUNTRY
+            )
+        logger.info(
+            "Countries recognized",
+            extra=log_fields(
+                coordinates=len(valid_positions),
+                geocoded=len(missing),
+                cached=len(valid_positions) - len(missing),
+            ),
+        )
+        return countries
+
+    @staticmethod
+    def __search(
+        points: np.ndarray, positions_by_key: Dict[CoordinatesKey, int]
+    ) -> Dict[CoordinatesKey, str]:
+        if not positions_by_key:
+            return {}
+        try:
+            locations: List[Dict[str, Any]] = reverse_geocode.search(
+                points[list(positions_by_key.values())]
+            )
+        except Exception as e:
+            logger.error("Error occurred while getting countries by coordinates: %s", e)
+            return {}
+        return {
+            key: location.get("country")
+            for key, location in zip(positions_by_key, locations)
+            if location.get("country")
+        }
+
+    @staticmethod
+    def __to_points(coordinates: Sequence[Tuple[Any, Any]]) -> np.ndarray:
+        try:
+            return np.asarray(coordinates, dtype=float).reshape(len(coordinates), 2)
+        except (TypeError, ValueError):
+            # Some element is missing or not numeric, parse one by one and mark it NaN
+            return np.array(
+                [CoordinatesUtil.__to_point(coordinate) for coordinate in coordinates],
+                dtype=float,
+            )
+
+    @staticmethod
+    def __to_point(coordinate: Any) -> Tuple[float, float]:
+        try:
+            latitude, longitude = coordinate
+            return float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            return np.nan, np.nan
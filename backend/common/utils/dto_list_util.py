@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Select, select
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+D = TypeVar("D", bound=BaseModel)
+
+
+class DtoListUtil:
+    @staticmethod
+    def select_all(
+        db_session: Session,
+        entity: Any,
+        dto_class: type[D],
+        order_by: Sequence[InstrumentedAttribute] = (),
+    ) -> List[D]:
+        # Only the DTO's columns are selected, so no ORM instances are built, and the
+        # whole list is validated by one TypeAdapter call instead of model_validate
+        # with from_attributes once per row.
+        keys: List[str] = list(dto_class.model_fields)
+        statement: Select = select(*(getattr(entity, key) for key in keys)).order_by(
+            *(order_by or (entity.id,))
+        )
+        with db_session:
+            rows = db_session.execute(statement).all()
+        records: List[Dict[str, Any]] = [dict(zip(keys, row)) for row in rows]
+        return DtoListUtil.__list_adapter(dto_class).validate_python(records)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def __list_adapter(dto_class: type[BaseModel]) -> TypeAdapter:
+        return TypeAdapter(List[dto_class])
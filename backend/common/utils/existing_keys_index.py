@@ -0,0 +1,78 @@
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import Connection, select
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from backend.common.utils.logger import logger
+
+
+class ExistingKeysIndex:
+    def __init__(
+        self,
+        db_session: Session,
+        key_column: InstrumentedAttribute,
+        max_preloaded_keys: int = 1_000_000,
+        probe_chunk_size: int = 500,
+    ):
+        self.__db_session: Session = db_session
+        self.__key_column: InstrumentedAttribute = key_column
+        self.__max_preloaded_keys: int = max_preloaded_keys
+        self.__probe_chunk_size: int = probe_chunk_size
+        # None means the table was too big to preload and keys are probed per batch
+        self.__keys: Optional[Set[Any]] = set()
+
+    @property
+    def is_preloaded(self) -> bool:
+        return self.__keys is not None
+
+    def load(self) -> None:
+        keys: Set[Any] = set()
+        with self.__db_session:
+            statement = select(self.__key_column).execution_options(yield_per=10_000)
+            for key in self.__db_session.execute(statement).scalars():
+                keys.add(key)
+                if len(keys) > self.__max_preloaded_keys:
+                    logger.info(
+                        f"More than {self.__max_preloaded_keys} keys in "
+                        f"{self.__key_column}, falling back to per-batch probes"
+                    )
+                    self.__keys = None
+                    return
+        logger.info(f"Loaded {len(keys)} existing keys of {self.__key_column}")
+        self.__keys = keys
+
+    def filter_new(self, keys: Iterable[Any]) -> Set[Any]:
+        # Probes the DB through the session when the keys were not preloaded, so only
+        # the stage that owns the session (the load stage) may call it
+        candidates: Set[Any] = set(keys)
+        if self.__keys is not None:
+            return candidates - self.__keys
+        return candidates - self.__probe_existing(candidates)
+
+    def filter_preloaded(self, keys: Iterable[Any]) -> Set[Any]:
+        # Never touches the DB, so it is safe off the load thread; without a preload
+        # every key is kept and the load stage's insert skips the existing ones
+        candidates: Set[Any] = set(keys)
+        if self.__keys is not None:
+            return candidates - self.__keys
+        return candidates
+
+    def add(self, keys: Iterable[Any]) -> None:
+        if self.__keys is not None:
+            self.__keys.update(keys)
+
+    def __probe_existing(self, keys: Set[Any]) -> Set[Any]:
+        # Probes go through the connection the session writes through, so they also see
+        # rows the ETL run has written but not committed yet.
+        existing: Set[Any] = set()
+        connection: Connection = self.__db_session.connection()
+        for chunk in self.__chunked(keys):
+            statement = select(self.__key_column).where(self.__key_column.in_(chunk))
+            existing.update(connection.execute(statement).scalars())
+        return existing
+
+    def __chunked(self, keys: Iterable[Any]) -> Iterator[List[Any]]:
+        iterator: Iterator[Any] = iter(keys)
+        while chunk := list(islice(iterator, self.__probe_chunk_size)):
+            yield chunk
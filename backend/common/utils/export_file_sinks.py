@@ -0,0 +1,211 @@
+import gzip
+import os
+import types
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Union, get_args, get_origin
+
+from backend.common.utils.file_util import FileUtil, ModelProtocol
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - only the ndjson export works without it
+    pa = None
+    pq = None
+
+
+class ExportFileSink(ABC):
+    def __init__(self, file_name: str, export_format: str):
+        # Export files are rewritten on every run, the first write replaces the old one
+        self.__file_path: str = FileUtil.get_export_file_path(file_name, export_format)
+        self._is_open: bool = True
+
+    @property
+    def file_path(self) -> str:
+        return self.__file_path
+
+    def __enter__(self) -> "ExportFileSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write_all(self, data: Iterable[ModelProtocol]) -> None:
+        # Write errors propagate, an export missing rows must fail the run
+        if self._is_open:
+            self._write_all(data)
+
+    def flush(self) -> None:
+        # Columnar and compressed files are only readable once closed, so a flush
+        # per page would only produce tiny row groups and worse compression.
+        pass
+
+    def close(self) -> None:
+        if not self._is_open:
+            return
+        try:
+            self._close()
+        finally:
+            self._is_open = False
+
+    def _open_path(self) -> str:
+        os.makedirs(os.path.dirname(self.__file_path), exist_ok=True)
+        return self.__file_path
+
+    @abstractmethod
+    def _write_all(self, data: Iterable[ModelProtocol]) -> None:
+        pass
+
+    @abstractmethod
+    def _close(self) -> None:
+        pass
+
+
+class NdjsonFileSink(ExportFileSink):
+    def __init__(self, file_name: str, compress_level: int = 6):
+        super().__init__(file_name, FileUtil.NDJSON)
+        self.__compress_level: int = compress_level
+        self.__file: Optional[TextIO] = None
+
+    def _write_all(self, data: Iterable[ModelProtocol]) -> None:
+        lines: str = "".join(f"{record.model_dump_json()}\n" for record in data)
+        if not lines:
+            return
+        if self.__file is None:
+            self.__file = gzip.open(
+                self._open_path(), "wt", compresslevel=self.__compress_level
+            )
+        self.__file.write(lines)
+
+    def _close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class RowGroupFileSink(ExportFileSink, ABC):
+    def __init__(self, file_name: str, export_format: str, row_group_size: int):
+        if pa is None:
+            raise ImportError(f"pyarrow is required for the {export_format} export")
+        super().__init__(file_name, export_format)
+        self.__row_group_size: int = row_group_size
+        self.__rows: List[Dict[str, Any]] = []
+        self.__schema: Optional["pa.Schema"] = None
+        self.__is_writer_open: bool = False
+
+    def _write_all(self, data: Iterable[ModelProtocol]) -> None:
+        records: List[ModelProtocol] = list(data)
+        if records and self.__schema is None:
+            self.__schema = self.__schema_of(type(records[0]))
+        self.__rows.extend(record.model_dump() for record in records)
+        while len(self.__rows) >= self.__row_group_size:
+            rows: List[Dict[str, Any]] = self.__rows[: self.__row_group_size]
+            del self.__rows[: self.__row_group_size]
+            self.__write_row_group(rows)
+
+    def _close(self) -> None:
+        try:
+            rows, self.__rows = self.__rows, []
+            if rows:
+                self.__write_row_group(rows)
+        finally:
+            self._close_writer()
+
+    def __write_row_group(self, rows: List[Dict[str, Any]]) -> None:
+        table: "pa.Table" = pa.Table.from_pylist(rows, schema=self.__schema)
+        if not self.__is_writer_open:
+            self._open_writer(self._open_path(), self.__schema)
+            self.__is_writer_open = True
+        self._write_table(table)
+
+    @staticmethod
+    def __schema_of(model: Any) -> "pa.Schema":
+        # The schema comes from the fields the DTO declares rather than from the first
+        # row group, where a column holding only None would be inferred as null
+        return pa.schema(
+            (name, RowGroupFileSink.__arrow_type(field.annotation))
+            for name, field in model.model_fields.items()
+        )
+
+    @staticmethod
+    def __arrow_type(annotation: Any) -> "pa.DataType":
+        if get_origin(annotation) in (Union, types.UnionType):
+            # Optional[X] is a nullable X, every Arrow field is nullable already
+            annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+        arrow_types: Dict[Any, "pa.DataType"] = {
+            bool: pa.bool_(),
+            int: pa.int64(),
+            float: pa.float64(),
+            str: pa.string(),
+            date: pa.date32(),
+            datetime: pa.timestamp("us"),
+        }
+        if annotation not in arrow_types:
+            raise TypeError(f"No Arrow type for fields of type {annotation}")
+        return arrow_types[annotation]
+
+    @abstractmethod
+    def _open_writer(self, file_path: str, schema: "pa.Schema") -> None:
+        pass
+
+    @abstractmethod
+    def _write_table(self, table: "pa.Table") -> None:
+        pass
+
+    @abstractmethod
+    def _close_writer(self) -> None:
+        pass
+
+
+class ParquetFileSink(RowGroupFileSink):
+    def __init__(
+        self,
+        file_name: str,
+        row_group_size: int = 64 * 1024,
+        compression: str = "zstd",
+    ):
+        super().__init__(file_name, FileUtil.PARQUET, row_group_size)
+        self.__compression: str = compression
+        self.__writer: Optional["pq.ParquetWriter"] = None
+
+    def _open_writer(self, file_path: str, schema: "pa.Schema") -> None:
+        self.__writer = pq.ParquetWriter(
+            file_path, schema, compression=self.__compression
+        )
+
+    def _write_table(self, table: "pa.Table") -> None:
+        self.__writer.write_table(table, row_group_size=table.num_rows)
+
+    def _close_writer(self) -> None:
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+
+
+class ArrowFileSink(RowGroupFileSink):
+    def __init__(self, file_name: str, row_group_size: int = 64 * 1024):
+        # Left uncompressed on purpose, readers can memory-map it without copying
+        super().__init__(file_name, FileUtil.ARROW, row_group_size)
+        self.__writer: Optional["pa.ipc.RecordBatchFileWriter"] = None
+
+    def _open_writer(self, file_path: str, schema: "pa.Schema") -> None:
+        self.__writer = pa.ipc.new_file(file_path, schema)
+
+    def _write_table(self, table: "pa.Table") -> None:
+        self.__writer.write_table(table, max_chunksize=table.num_rows)
+
+    def _close_writer(self) -> None:
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+
+
+def open_export_file_sink(file_name: str, export_format: str) -> ExportFileSink:
+    if export_format == FileUtil.PARQUET:
+        return ParquetFileSink(file_name)
+    if export_format == FileUtil.ARROW:
+        return ArrowFileSink(file_name)
+    if export_format == FileUtil.NDJSON:
+        return NdjsonFileSink(file_name)
+    raise ValueError(f"Unknown export format {export_format}")
@@ -1,19 +1,111 @@
+import importlib.util
 import os
-from typing import Protocol
+from typing import Any, Dict, Iterable, Optional, Protocol, Set, Tuple
 
 
 class DtoProtocol(Protocol):
     def __repr__(self) -> str: ...
 
 
+class ModelProtocol(Protocol):
+    def model_dump(self) -> Dict[str, Any]: ...
+
+    def model_dump_json(self) -> str: ...
+
+
 class FileUtil:
+    TXT_DIRECTORY: str = "backend/data_txt"
+    EXPORT_DIRECTORY: str = "backend/data_export"
+    PARQUET: str = "parquet"
+    ARROW: str = "arrow"
+    NDJSON: str = "ndjson"
+    EXPORT_EXTENSIONS: Dict[str, str] = {
+        PARQUET: ".parquet",
+        ARROW: ".arrow",
+        NDJSON: ".ndjson.gz",
+    }
+    __PYARROW_FORMATS: Tuple[str, ...] = (PARQUET, ARROW)
+    __STAGED_SUFFIX: str = ".partial"
+    __export_formats: Tuple[str, ...] = ()
+    # Names of the results cleaned since start_staging(), None while not staging
+    __staged_file_names: Optional[Set[str]] = None
+
+    @staticmethod
+    def configure_export_formats(export_formats: Iterable[str]) -> None:
+        formats: Tuple[str, ...] = tuple(
+            dict.fromkeys(
+                export_format.strip().lower()
+                for export_format in export_formats
+                if export_format.strip()
+            )
+        )
+        unknown: Tuple[str, ...] = tuple(
+            export_format
+            for export_format in formats
+            if export_format not in FileUtil.EXPORT_EXTENSIONS
+        )
+        if unknown:
+            raise ValueError(
+                f"Unknown export formats {unknown}, "
+                f"expected any of {tuple(FileUtil.EXPORT_EXTENSIONS)}"
+            )
+        needs_pyarrow: bool = any(
+            export_format in FileUtil.__PYARROW_FORMATS for export_format in formats
+        )
+        if needs_pyarrow and importlib.util.find_spec("pyarrow") is None:
+            raise ImportError("pyarrow is required for the parquet and arrow exports")
+        FileUtil.__export_formats = formats
+
+    @staticmethod
+    def get_export_formats() -> Tuple[str, ...]:
+        return FileUtil.__export_formats
+
+    @staticmethod
+    def get_export_file_path(file_name: str, export_format: str) -> str:
+        # users.txt is exported as users.parquet, users.arrow and users.ndjson.gz
+        return FileUtil.__staged(
+            file_name, FileUtil.__published_export_path(file_name, export_format)
+        )
+
+    @staticmethod
+    def get_txt_file_path(file_name: str) -> str:
+        return FileUtil.__staged(file_name, f"{FileUtil.TXT_DIRECTORY}/{file_name}")
+
+    @staticmethod
+    def start_staging() -> None:
+        # Results cleaned from now on are written next to the published files, which
+        # readers keep seeing unchanged until publish_staged_files() replaces them
+        FileUtil.__staged_file_names = set()
+
+    @staticmethod
+    def publish_staged_files() -> None:
+        file_names: Set[str] = FileUtil.__staged_file_names or set()
+        FileUtil.__staged_file_names = None
+        for file_name in file_names:
+            for path in FileUtil.__published_paths(file_name):
+                if os.path.exists(path + FileUtil.__STAGED_SUFFIX):
+                    os.replace(path + FileUtil.__STAGED_SUFFIX, path)
+                elif os.path.exists(path):
+                    # Cleaned and never written again, e.g. an export with no rows
+                    os.remove(path)
+
+    @staticmethod
+    def discard_staged_files() -> None:
+        file_names: Set[str] = FileUtil.__staged_file_names or set()
+        FileUtil.__staged_file_names = None
+        for file_name in file_names:
+            for path in FileUtil.__published_paths(file_name):
+                try:
+                    os.remove(path + FileUtil.__STAGED_SUFFIX)
+                except FileNotFoundError:
+                    pass
+
     @staticmethod
     def save_result_to_txt_file(file_name: str, data: DtoProtocol) -> None:
         try:
-            directory: str = "backend/data_txt"
-            os.makedirs(directory, exist_ok=True)
+            os.makedirs(FileUtil.TXT_DIRECTORY, exist_ok=True)
 
-            file_path: str = f"{directory}/{file_name}"
+            file_path: str = FileUtil.get_txt_file_path(file_name)
             with open(file_path, "a") as file:
                 file.write(repr(data) + "\n")
         except Exception as e:
@@ -21,10 +113,39 @@ class FileUtil:
 
     @staticmethod
     def clean_txt_file_before_processing(file_name: str) -> None:
+        if FileUtil.__staged_file_names is not None:
+            FileUtil.__staged_file_names.add(file_name)
         try:
-            directory: str = "backend/data_txt"
-            file_path: str = f"{directory}/{file_name}"
+            file_path: str = FileUtil.get_txt_file_path(file_name)
             with open(file_path, "w") as file:
                 file.write("")
         except Exception as e:
             print(f"An error occurred while cleaning the file: {e}")
+        # Exports of the previous run would otherwise survive a run with no new rows
+        for export_format in FileUtil.EXPORT_EXTENSIONS:
+            try:
+                os.remove(FileUtil.get_export_file_path(file_name, export_format))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"An error occurred while cleaning the file: {e}")
+
+    @staticmethod
+    def __staged(file_name: str, path: str) -> str:
+        staged_file_names: Optional[Set[str]] = FileUtil.__staged_file_names
+        if staged_file_names is not None and file_name in staged_file_names:
+            return path + FileUtil.__STAGED_SUFFIX
+        return path
+
+    @staticmethod
+    def __published_export_path(file_name: str, export_format: str) -> str:
+        stem: str = os.path.splitext(file_name)[0]
+        extension: str = FileUtil.EXPORT_EXTENSIONS[export_format]
+        return f"{FileUtil.EXPORT_DIRECTORY}/{stem}{extension}"
+
+    @staticmethod
+    def __published_paths(file_name: str) -> Tuple[str, ...]:
+        return (f"{FileUtil.TXT_DIRECTORY}/{file_name}",) + tuple(
+            FileUtil.__published_export_path(file_name, export_format)
+            for export_format in FileUtil.EXPORT_EXTENSIONS
+        )
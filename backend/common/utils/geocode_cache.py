@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.common.utils.logger import logger
+
+CoordinatesKey = Tuple[float, float]
+
+
+class GeocodeCache:
+    def __init__(
+        self,
+        precision: int = 2,
+        max_entries: int = 100_000,
+        file_path: Optional[str] = None,
+        max_file_entries: int = 1_000_000,
+    ):
+        self.__precision: int = precision
+        self.__max_entries: int = max_entries
+        self.__max_file_entries: int = max_file_entries
+        self.__entries: OrderedDict[CoordinatesKey, str] = OrderedDict()
+        self.__lock: threading.Lock = threading.Lock()
+        self.__connection: Optional[sqlite3.Connection] = None
+        self.__file_entries: int = 0
+        # Keys hit since the last write to the file, their last_used is refreshed
+        # together with the next write so the file evicts least recently used first
+        self.__touched: Set[CoordinatesKey] = set()
+        self.hits: int = 0
+        self.misses: int = 0
+        if file_path:
+            self.__open_file(file_path)
+
+    @property
+    def size(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def keys(self, points: np.ndarray) -> List[CoordinatesKey]:
+        return list(map(tuple, np.round(points, self.__precision).tolist()))
+
+    def get_many(self, keys: Iterable[CoordinatesKey]) -> List[Optional[str]]:
+        countries: List[Optional[str]] = []
+        with self.__lock:
+            for key in keys:
+                country: Optional[str] = self.__entries.get(key)
+                if country is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self.__entries.move_to_end(key)
+                    if self.__connection is not None:
+                        self.__touched.add(key)
+                countries.append(country)
+        return countries
+
+    def put_many(self, countries: Dict[CoordinatesKey, str]) -> None:
+        if not countries:
+            return
+        with self.__lock:
+            for key, country in countries.items():
+                self.__entries[key] = country
+                self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+            if self.__connection is not None:
+                self.__save_to_file(countries)
+
+    def close(self) -> None:
+        logger.info(
+            f"Geocode cache closing with {self.hits} hits, {self.misses} misses "
+            f"({self.hit_rate:.1%} hit rate)"
+        )
+        with self.__lock:
+            if self.__connection is not None:
+                self.__touch_in_file(time.time())
+                self.__connection.close()
+                self.__connection = None
+
+    def __open_file(self, file_path: str) -> None:
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        self.__connection = sqlite3.connect(file_path, check_same_thread=False)
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_cache ("
+            "latitude REAL NOT NULL, longitude REAL NOT NULL, country TEXT NOT NULL, "
+            "last_used REAL NOT NULL, PRIMARY KEY (latitude, longitude)) WITHOUT ROWID"
+        )
+        self.__connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_geocode_cache_last_used "
+            "ON geocode_cache (last_used)"
+        )
+        self.__file_entries = self.__connection.execute(
+            "SELECT COUNT(*) FROM geocode_cache"
+        ).fetchone()[0]
+        # Most recently used entries are loaded last so they end up hottest in the LRU
+        rows = self.__connection.execute(
+            "SELECT latitude, longitude, country FROM ("
+            "SELECT * FROM geocode_cache ORDER BY last_used DESC LIMIT ?"
+            ") ORDER BY last_used",
+            (self.__max_entries,),
+        ).fetchall()
+        for latitude, longitude, country in rows:
+            self.__entries[(latitude, longitude)] = country
+        logger.info(f"Loaded {len(rows)} geocoded coordinates from {file_path}")
+
+    def __touch_in_file(self, now: float) -> None:
+        if not self.__touched:
+            return
+        with self.__connection:
+            self.__connection.executemany(
+                "UPDATE geocode_cache SET last_used = ? WHERE latitude = ? AND longitude = ?",
+                [(now, latitude, longitude) for latitude, longitude in self.__touched],
+            )
+        self.__touched.clear()
+
+    def __save_to_file(self, countries: Dict[CoordinatesKey, str]) -> None:
+        now: float = time.time()
+        self.__touch_in_file(now)
+        with self.__connection:
+            self.__connection.executemany(
+                "INSERT OR REPLACE INTO geocode_cache "
+                "(latitude, longitude, country, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (latitude, longitude, country, now)
+                    for (latitude, longitude), country in countries.items()
+                ],
+            )
+            # Upper bound only, replaced rows are counted too; recount before pruning
+            self.__file_entries += len(countries)
+            if self.__file_entries <= self.__max_file_entries:
+                return
+            self.__file_entries = self.__connection.execute(
+                "SELECT COUNT(*) FROM geocode_cache"
+            ).fetchone()[0]
+            excess: int = self.__file_entries - self.__max_file_entries
+            if excess > 0:
+                self.__connection.execute(
+                    "DELETE FROM geocode_cache WHERE (latitude, longitude) IN ("
+                    "SELECT latitude, longitude FROM geocode_cache "
+                    "ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.__file_entries = self.__max_file_entries
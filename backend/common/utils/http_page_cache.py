@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import NamedTuple, Optional
+
+from backend.common.utils.logger import logger
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # How long the page took to fetch when it was stored, in seconds
+    elapsed: float
+    stored_at: float
+
+
+class HttpPageCache:
+    __COMPRESSION_LEVEL: int = 6
+
+    def __init__(self, file_path: str, max_bytes: int = 256 * 1024 * 1024):
+        # Raw response bodies by URL, zlib-compressed in a SQLite file. max_bytes
+        # bounds the compressed size; the least recently used pages go first.
+        self.__max_bytes: int = max_bytes
+        self.__lock: threading.Lock = threading.Lock()
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        self.__connection: Optional[sqlite3.Connection] = sqlite3.connect(
+            file_path, check_same_thread=False
+        )
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS http_page_cache ("
+            "url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+            "elapsed REAL NOT NULL, stored_at REAL NOT NULL, last_used REAL NOT NULL, "
+            "size INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self.__connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_http_page_cache_last_used "
+            "ON http_page_cache (last_used)"
+        )
+        self.__size_bytes: int = self.__connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM http_page_cache"
+        ).fetchone()[0]
+        self.hits: int = 0
+        self.misses: int = 0
+        logger.info(
+            f"Opened DummyJSON page cache {file_path} with "
+            f"{self.__size_bytes / 2**20:.1f} MiB of pages"
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        return self.__size_bytes
+
+    @property
+    def hit_rate(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT body, etag, last_modified, elapsed, stored_at "
+                "FROM http_page_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, elapsed, stored_at = row
+        return CachedPage(zlib.decompress(body), etag, last_modified, elapsed, stored_at)
+
+    def record_hit(self, url: str, revalidated: bool = False) -> None:
+        # The page was served from the cache; a revalidated page is fresh again
+        now: float = time.time()
+        with self.__lock:
+            self.hits += 1
+            with self.__connection:
+                if revalidated:
+                    self.__connection.execute(
+                        "UPDATE http_page_cache SET last_used = ?, stored_at = ? WHERE url = ?",
+                        (now, now, url),
+                    )
+                else:
+                    self.__connection.execute(
+                        "UPDATE http_page_cache SET last_used = ? WHERE url = ?", (now, url)
+                    )
+
+    def record_miss(self) -> None:
+        with self.__lock:
+            self.misses += 1
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        elapsed: float,
+    ) -> None:
+        compressed: bytes = zlib.compress(body, self.__COMPRESSION_LEVEL)
+        if len(compressed) > self.__max_bytes:
+            return
+        now: float = time.time()
+        with self.__lock, self.__connection:
+            previous = self.__connection.execute(
+                "SELECT size FROM http_page_cache WHERE url = ?", (url,)
+            ).fetchone()
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO http_page_cache (url, body, etag, last_modified, "
+                "elapsed, stored_at, last_used, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, compressed, etag, last_modified, elapsed, now, now, len(compressed)),
+            )
+            self.__size_bytes += len(compressed) - (previous[0] if previous else 0)
+            self.__evict()
+
+    def close(self) -> None:
+        logger.info(
+            f"DummyJSON page cache closing with {self.hits} hits, {self.misses} misses "
+            f"({self.hit_rate:.1%} hit rate)"
+        )
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+    def __evict(self) -> None:
+        while self.__size_bytes > self.__max_bytes:
+            url, size = self.__connection.execute(
+                "SELECT url, size FROM http_page_cache ORDER BY last_used LIMIT 1"
+            ).fetchone()
+            self.__connection.execute("DELETE FROM http_page_cache WHERE url = ?", (url,))
+            self.__size_bytes -= size
@@ -0,0 +1,146 @@
+import codecs
+import json
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, List, Tuple
+
+
+class _ChunkReader:
+    __WHITESPACE: str = " \t\n\r"
+    # What may follow a complete number or literal, whitespace included
+    __DELIMITERS: str = " \t\n\r,]}"
+    __COMPACT_AFTER: int = 64 * 1024
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self.__chunks: Iterator[bytes] = chunks
+        self.__utf8: codecs.IncrementalDecoder = codecs.getincrementaldecoder("utf-8")()
+        self.__buffer: str = ""
+        self.__position: int = 0
+        self.__eof: bool = False
+        # json.loads shares the key strings of all objects in the body, decoding item
+        # by item would give every record its own copies, so keys are shared here
+        self.__keys: Dict[str, str] = {}
+        # scan_once is the C scanner JSONDecoder.raw_decode wraps
+        self.__scan_once: Callable[[str, int], Tuple[Any, int]] = json.JSONDecoder(
+            object_pairs_hook=self.__to_dict
+        ).scan_once
+
+    def peek(self) -> str:
+        # The next character after whitespace, without consuming it
+        while True:
+            while (
+                self.__position < len(self.__buffer)
+                and self.__buffer[self.__position] in self.__WHITESPACE
+            ):
+                self.__position += 1
+            if self.__position < len(self.__buffer):
+                return self.__buffer[self.__position]
+            if not self.__read():
+                raise json.JSONDecodeError(
+                    "Unexpected end of data", self.__buffer, self.__position
+                )
+
+    def expect(self, character: str) -> None:
+        if self.peek() != character:
+            raise json.JSONDecodeError(
+                f"Expecting '{character}'", self.__buffer, self.__position
+            )
+        self.__position += 1
+
+    def expect_separator(self, closing: str) -> None:
+        # Between items or members, i.e. a comma unless the container ends here
+        if self.peek() != closing:
+            self.expect(",")
+
+    def iter_items(self) -> Generator[Any, None, None]:
+        # The items of the array starting here, the closing bracket included
+        self.expect("[")
+        if self.peek() == "]":
+            self.__position += 1
+            return
+        while True:
+            yield self.decode()
+            character: str = self.peek()
+            self.__position += 1
+            if character == "]":
+                return
+            if character != ",":
+                raise json.JSONDecodeError(
+                    "Expecting ',' delimiter", self.__buffer, self.__position - 1
+                )
+
+    def decode(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.__scan_once(self.__buffer, self.__position)
+                if self.__eof or self.__is_complete(end):
+                    self.__position = end
+                    return value
+            except StopIteration as e:
+                if self.__eof:
+                    raise json.JSONDecodeError("Expecting value", self.__buffer, e.value)
+            except json.JSONDecodeError:
+                if self.__eof:
+                    raise
+            self.__read()
+
+    def __is_complete(self, end: int) -> bool:
+        # Strings, objects and arrays end on their closing character. A number or
+        # literal may go on in the next chunk until a delimiter follows it, e.g. 12 of
+        # 123, or 1 of 1.5 and 1e-07, which scan as a whole number of their own.
+        if self.__buffer[self.__position] in "\"{[":
+            return True
+        return end < len(self.__buffer) and self.__buffer[end] in self.__DELIMITERS
+
+    def __to_dict(self, pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        return {self.__keys.setdefault(key, key): value for key, value in pairs}
+
+    def __read(self) -> bool:
+        if self.__eof:
+            return False
+        if self.__position > self.__COMPACT_AFTER:
+            self.__buffer = self.__buffer[self.__position:]
+            self.__position = 0
+        for chunk in self.__chunks:
+            if chunk:
+                self.__buffer += self.__utf8.decode(chunk)
+                return True
+        self.__eof = True
+        self.__buffer += self.__utf8.decode(b"", final=True)
+        return False
+
+
+class JsonStreamUtil:
+    @staticmethod
+    def load_object(chunks: Iterable[bytes], array_key: str) -> Dict[str, Any]:
+        # json.loads of a top-level object read from byte chunks as they arrive, e.g.
+        # response.iter_content(). The items under array_key are decoded one by one
+        # with the C scanner behind json, so only the chunk being read and the item
+        # being decoded are ever held as text, never the whole body.
+        fields: Dict[str, Any] = {}
+        items: List[Any] = []
+        for key, value in JsonStreamUtil.iter_object(chunks, array_key):
+            if key == array_key:
+                items.append(value)
+            else:
+                fields[key] = value
+        fields[array_key] = items
+        return fields
+
+    @staticmethod
+    def iter_object(
+        chunks: Iterable[bytes], array_key: str
+    ) -> Generator[Tuple[str, Any], None, None]:
+        # Yields (key, value) for the members of the object, except for the array
+        # under array_key, which is yielded as (array_key, item) for every item
+        reader: _ChunkReader = _ChunkReader(iter(chunks))
+        reader.expect("{")
+        while reader.peek() != "}":
+            key: str = reader.decode()
+            reader.expect(":")
+            if key == array_key and reader.peek() == "[":
+                for item in reader.iter_items():
+                    yield key, item
+            else:
+                yield key, reader.decode()
+            reader.expect_separator("}")
+        reader.expect("}")
@@ -0,0 +1,63 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from backend.common.models.page_dto import PageDto
+
+
+class KeysetPageUtil:
+    @staticmethod
+    def get_page(
+        db_session: Session,
+        entity: Any,
+        dto_class: type[BaseModel],
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[InstrumentedAttribute, Any]] = None,
+    ) -> PageDto:
+        # Rows are read in primary key order starting after the cursor, so every page
+        # is one index range scan no matter how deep into the table it is.
+        # One extra row is fetched only to know whether there is a next page.
+        columns: List[InstrumentedAttribute] = [
+            getattr(entity, field)
+            for field in KeysetPageUtil.__validated_fields(dto_class, fields)
+        ]
+        statement: Select = select(entity.id, *columns).order_by(entity.id).limit(
+            limit + 1
+        )
+        if cursor is not None:
+            statement = statement.where(entity.id > cursor)
+        for column, value in (filters or {}).items():
+            if value is not None:
+                statement = statement.where(column == value)
+
+        with db_session:
+            rows = db_session.execute(statement).all()
+        next_cursor: Optional[int] = rows[limit - 1].id if len(rows) > limit else None
+        # The items are plain dicts of typed columns already, validating the page
+        # would only copy every one of them
+        return PageDto.model_construct(
+            items=[
+                {column.key: value for column, value in zip(columns, row[1:])}
+                for row in rows[:limit]
+            ],
+            next_cursor=next_cursor,
+        )
+
+    @staticmethod
+    def __validated_fields(
+        dto_class: type[BaseModel], fields: Optional[Sequence[str]]
+    ) -> List[str]:
+        if not fields:
+            return list(dto_class.model_fields)
+        unknown: List[str] = [
+            field for field in fields if field not in dto_class.model_fields
+        ]
+        if unknown:
+            raise ValueError(
+                f"Unknown fields {unknown}, expected any of {list(dto_class.model_fields)}"
+            )
+        return list(dict.fromkeys(fields))
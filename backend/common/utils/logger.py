@@ -1,8 +1,88 @@
+import atexit
+import json
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+LOG_FORMAT: str = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+def log_fields(**fields: Any) -> Dict[str, Dict[str, Any]]:
+    # For extra=: the fields are rendered after the message as key=value pairs, or
+    # as keys of the JSON object with LOG_FORMAT=json
+    return {"fields": fields}
+
+
+class KeyValueFormatter(logging.Formatter):
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message: str = super().formatMessage(record)
+        fields: Optional[Dict[str, Any]] = getattr(record, "fields", None)
+        if not fields:
+            return message
+        return f"{message} " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock QueueHandler formats the message on the logging thread before
+        # queueing it. The queue never leaves the process, so the record is passed
+        # as it is and the listener thread does all the formatting.
+        return record
+
+
+def configure_logging(
+    level: Optional[str] = None, log_format: Optional[str] = None
+) -> None:
+    # LOG_LEVEL and LOG_FORMAT (text or json) are read from the environment unless
+    # given. Log calls only put the record on a queue; formatting and writing to
+    # stderr happen on the listener's thread, so log I/O never blocks the ETL.
+    global _listener
+    stop_logging()
+    stream_handler: logging.Handler = logging.StreamHandler()
+    if (log_format or os.getenv("LOG_FORMAT", "text")).lower() == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(KeyValueFormatter(LOG_FORMAT))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    root_logger: logging.Logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, RecordQueueHandler):
+            root_logger.removeHandler(handler)
+    root_logger.addHandler(RecordQueueHandler(log_queue))
+    root_logger.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    # Writes out whatever is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+configure_logging()
+atexit.register(stop_logging)
 
 logger = logging.getLogger(__name__)
@@ -0,0 +1,96 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from backend.common.models.metric_sample_dto import MetricSampleDto
+
+Labels = Tuple[Tuple[str, str], ...]
+SampleKey = Tuple[str, Labels]
+
+
+class MetricsRegistry:
+    __COUNTER: str = "counter"
+    __SUMMARY: str = "summary"
+
+    def __init__(self):
+        # Samples are kept flat as (name, labels) -> value; a summary is its _count
+        # and _sum samples, which is all the Prometheus text format needs
+        self.__lock: threading.Lock = threading.Lock()
+        self.__samples: Dict[SampleKey, float] = {}
+        self.__families: Dict[str, str] = {}
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key: SampleKey = (name, self.__labels(labels))
+        with self.__lock:
+            self.__families.setdefault(name, self.__COUNTER)
+            self.__samples[key] = self.__samples.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        label_key: Labels = self.__labels(labels)
+        with self.__lock:
+            self.__families.setdefault(name, self.__SUMMARY)
+            for sample, value in ((f"{name}_count", 1.0), (f"{name}_sum", seconds)):
+                key: SampleKey = (sample, label_key)
+                self.__samples[key] = self.__samples.get(key, 0.0) + value
+
+    @contextmanager
+    def timed(self, name: str, **labels: str) -> Iterator[None]:
+        started: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict[SampleKey, float]:
+        with self.__lock:
+            return dict(self.__samples)
+
+    def samples_since(self, snapshot: Dict[SampleKey, float]) -> List[MetricSampleDto]:
+        # What changed since the snapshot, i.e. the metrics of one ETL run
+        samples: List[MetricSampleDto] = []
+        for (name, labels), value in sorted(self.snapshot().items()):
+            change: float = value - snapshot.get((name, labels), 0.0)
+            if change:
+                samples.append(
+                    MetricSampleDto(name=name, labels=dict(labels), value=round(change, 6))
+                )
+        return samples
+
+    def render_prometheus(self) -> str:
+        with self.__lock:
+            families: Dict[str, str] = dict(self.__families)
+            samples: Dict[SampleKey, float] = dict(self.__samples)
+        lines: List[str] = []
+        for family, family_type in sorted(families.items()):
+            lines.append(f"# TYPE {family} {family_type}")
+            names: Tuple[str, ...] = (
+                (f"{family}_count", f"{family}_sum")
+                if family_type == self.__SUMMARY
+                else (family,)
+            )
+            for (name, labels), value in sorted(samples.items()):
+                if name in names:
+                    lines.append(f"{name}{self.__render_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __labels(labels: Dict[str, str]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    @staticmethod
+    def __render_labels(labels: Labels) -> str:
+        if not labels:
+            return ""
+        rendered: str = ",".join(
+            '{}="{}"'.format(
+                key,
+                value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+            )
+            for key, value in labels
+        )
+        return f"{{{rendered}}}"
+
+
+# One registry for the whole process, like the logger
+metrics: MetricsRegistry = MetricsRegistry()
@@ -0,0 +1,88 @@
+import cProfile
+import os
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from backend.common.utils.logger import log_fields, logger
+
+T = TypeVar("T")
+
+
+class ProfilingUtil:
+    CPROFILE: str = "cprofile"
+    TRACEMALLOC: str = "tracemalloc"
+    MODES: Tuple[str, ...] = (CPROFILE, TRACEMALLOC)
+    DIRECTORY: str = "backend/data_profile"
+    __TOP_ALLOCATIONS: int = 25
+    __TRACEBACK_FRAMES: int = 10
+
+    @staticmethod
+    def validate_mode(mode: Optional[str]) -> Optional[str]:
+        if not mode:
+            return None
+        mode = mode.lower()
+        if mode not in ProfilingUtil.MODES:
+            raise ValueError(
+                f"Unknown profile mode {mode}, expected one of {', '.join(ProfilingUtil.MODES)}"
+            )
+        return mode
+
+    @staticmethod
+    def run_profiled(
+        function: Callable[[], T],
+        mode: Optional[str],
+        name: str,
+        directory: str = DIRECTORY,
+    ) -> Tuple[T, Optional[str]]:
+        # Runs the function once under the profiler and writes the result to the
+        # directory, also when the function raises. Returns the function's result and
+        # the path of the profile, None when mode is None.
+        mode = ProfilingUtil.validate_mode(mode)
+        if mode is None:
+            return function(), None
+        os.makedirs(directory, exist_ok=True)
+        timestamp: str = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path: str = os.path.join(directory, f"{name}-{timestamp}.{mode}")
+        if mode == ProfilingUtil.CPROFILE:
+            return ProfilingUtil.__run_cprofile(function, path), path
+        return ProfilingUtil.__run_tracemalloc(function, path), path
+
+    @staticmethod
+    def __run_cprofile(function: Callable[[], T], path: str) -> T:
+        # Since Python 3.12 cProfile hooks into sys.monitoring, which sees every
+        # thread, so the pipeline and fetch threads the ETL starts are in the profile
+        # too. Only one profiler can be active at a time. Loads with pstats or snakeviz.
+        profiler: cProfile.Profile = cProfile.Profile()
+        profiler.enable()
+        try:
+            return function()
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            logger.info("cProfile written", extra=log_fields(path=path))
+
+    @staticmethod
+    def __run_tracemalloc(function: Callable[[], T], path: str) -> T:
+        # Traces allocations of every thread. The snapshot is dumped for
+        # tracemalloc.Snapshot.load and the top allocation sites go to a txt next to it.
+        was_tracing: bool = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start(ProfilingUtil.__TRACEBACK_FRAMES)
+        try:
+            return function()
+        finally:
+            snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if not was_tracing:
+                tracemalloc.stop()
+            snapshot.dump(path)
+            top_stats: List[tracemalloc.Statistic] = snapshot.statistics("lineno")
+            with open(f"{path}.txt", "w") as file:
+                file.write(f"Peak traced memory: {peak / 2**20:.1f} MiB\n")
+                for statistic in top_stats[: ProfilingUtil.__TOP_ALLOCATIONS]:
+                    file.write(f"{statistic}\n")
+            logger.info(
+                "tracemalloc snapshot written",
+                extra=log_fields(path=path, peak_mib=round(peak / 2**20, 1)),
+            )
@@ -0,0 +1,97 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from backend.common.models.response_cache_stats_dto import ResponseCacheStatsDto
+from backend.common.utils.logger import logger
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.__max_bytes: int = max_bytes
+        self.__entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.__size_bytes: int = 0
+        self.__generation: int = 0
+        self.__lock: threading.Lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @property
+    def hit_rate(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @staticmethod
+    def create_etag(generation: int, body: bytes) -> str:
+        return f'"{generation}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self.__lock:
+            cached_response: Optional[CachedResponse] = self.__entries.get(key)
+            if cached_response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+            return cached_response
+
+    def put(self, key: str, generation: int, body: bytes) -> CachedResponse:
+        # generation is the one read before querying: a response built from data
+        # older than the current generation is still returned, just never stored
+        cached_response: CachedResponse = CachedResponse(
+            body, self.create_etag(generation, body)
+        )
+        with self.__lock:
+            if generation != self.__generation or len(body) > self.__max_bytes:
+                return cached_response
+            previous: Optional[CachedResponse] = self.__entries.pop(key, None)
+            if previous is not None:
+                self.__size_bytes -= len(previous.body)
+            self.__entries[key] = cached_response
+            self.__size_bytes += len(body)
+            while self.__size_bytes > self.__max_bytes:
+                _, evicted = self.__entries.popitem(last=False)
+                self.__size_bytes -= len(evicted.body)
+                self.evictions += 1
+        return cached_response
+
+    def bump_generation(self) -> int:
+        with self.__lock:
+            self.__generation += 1
+            self.__entries.clear()
+            self.__size_bytes = 0
+            logger.info(
+                f"Response cache moved to generation {self.__generation}, "
+                f"cached responses dropped"
+            )
+            return self.__generation
+
+    def get_stats(self) -> ResponseCacheStatsDto:
+        with self.__lock:
+            return ResponseCacheStatsDto(
+                generation=self.__generation,
+                entries=len(self.__entries),
+                size_bytes=self.__size_bytes,
+                max_bytes=self.__max_bytes,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                hit_rate=self.hit_rate,
+            )
+
+    def close(self) -> None:
+        logger.info(
+            f"Response cache closing with {self.hits} hits, {self.misses} misses "
+            f"({self.hit_rate:.1%} hit rate), {self.evictions} evictions"
+        )
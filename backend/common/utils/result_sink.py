@@ -0,0 +1,57 @@
+from typing import Any, Iterable, List, Tuple
+
+from backend.common.utils.export_file_sinks import (
+    ExportFileSink,
+    open_export_file_sink,
+)
+from backend.common.utils.file_util import FileUtil
+from backend.common.utils.logger import logger
+from backend.common.utils.metrics import metrics
+from backend.common.utils.txt_file_sink import TxtFileSink
+
+
+class ResultSink:
+    __TXT: str = "txt"
+    __WRITE_SECONDS: str = "etl_sink_write_seconds"
+    __RECORDS_WRITTEN: str = "etl_sink_records_total"
+
+    def __init__(self, file_name: str):
+        # The txt dump is always written, the exports only in the formats configured
+        # through FileUtil.configure_export_formats
+        self.__txt_sink: TxtFileSink = TxtFileSink(file_name)
+        self.__export_sinks: List[Tuple[str, ExportFileSink]] = []
+        for export_format in FileUtil.get_export_formats():
+            try:
+                self.__export_sinks.append(
+                    (export_format, open_export_file_sink(file_name, export_format))
+                )
+            except Exception as e:
+                logger.error(f"Skipping the {export_format} export of {file_name}: {e}")
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write_all(self, data: Iterable[Any]) -> None:
+        records: List[Any] = list(data)
+        with metrics.timed(self.__WRITE_SECONDS, sink=self.__TXT):
+            self.__txt_sink.write_all(records)
+        metrics.increment(self.__RECORDS_WRITTEN, len(records), sink=self.__TXT)
+        for export_format, export_sink in self.__export_sinks:
+            with metrics.timed(self.__WRITE_SECONDS, sink=export_format):
+                export_sink.write_all(records)
+            metrics.increment(self.__RECORDS_WRITTEN, len(records), sink=export_format)
+
+    def flush(self) -> None:
+        self.__txt_sink.flush()
+        for _, export_sink in self.__export_sinks:
+            export_sink.flush()
+
+    def close(self) -> None:
+        self.__txt_sink.close()
+        for export_format, export_sink in self.__export_sinks:
+            # Closing an export writes its footer and flushes the last row group
+            with metrics.timed(self.__WRITE_SECONDS, sink=export_format):
+                export_sink.close()
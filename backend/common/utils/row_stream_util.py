@@ -0,0 +1,28 @@
+from typing import Any, Dict, Iterator, List
+
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+
+class RowStreamUtil:
+    @staticmethod
+    def stream_rows(
+        db_session: Session,
+        entity: Any,
+        dto_class: type[BaseModel],
+        batch_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        # yield_per keeps the SQLite cursor open and fetches batch_size rows at a time,
+        # so memory stays flat no matter how big the table is. The session is opened
+        # here, inside the generator, because the response outlives the request scope.
+        columns: List[InstrumentedAttribute] = [
+            getattr(entity, field) for field in dto_class.model_fields
+        ]
+        keys: List[str] = [column.key for column in columns]
+        statement: Select = (
+            select(*columns).order_by(entity.id).execution_options(yield_per=batch_size)
+        )
+        with db_session:
+            for rows in db_session.execute(statement).partitions():
+                yield [dict(zip(keys, row)) for row in rows]
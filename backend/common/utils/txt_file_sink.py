@@ -0,0 +1,53 @@
+import os
+from typing import Iterable, Optional, TextIO
+
+from backend.common.utils.file_util import DtoProtocol, FileUtil
+
+
+class TxtFileSink:
+    def __init__(self, file_name: str, buffer_size: int = 64 * 1024):
+        # The file stays open for the whole run; writes collect in the buffer and only
+        # reach the disk when it fills up, on flush() or on close().
+        self.__file: Optional[TextIO] = None
+        try:
+            os.makedirs(FileUtil.TXT_DIRECTORY, exist_ok=True)
+            self.__file = open(
+                FileUtil.get_txt_file_path(file_name), "a", buffering=buffer_size
+            )
+        except Exception as e:
+            print(f"An error occurred while opening the file: {e}")
+
+    def __enter__(self) -> "TxtFileSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, data: DtoProtocol) -> None:
+        self.write_all((data,))
+
+    def write_all(self, data: Iterable[DtoProtocol]) -> None:
+        if self.__file is None:
+            return
+        try:
+            self.__file.write("".join(f"{record!r}\n" for record in data))
+        except Exception as e:
+            print(f"An error occurred while saving to file: {e}")
+
+    def flush(self) -> None:
+        if self.__file is None:
+            return
+        try:
+            self.__file.flush()
+        except Exception as e:
+            print(f"An error occurred while flushing the file: {e}")
+
+    def close(self) -> None:
+        if self.__file is None:
+            return
+        try:
+            self.__file.close()
+        except Exception as e:
+            print(f"An error occurred while closing the file: {e}")
+        finally:
+            self.__file = None
@@ -1,16 +1,26 @@
-from typing import List
+import asyncio
+import json
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
 
-from backend.common.models.cart_dto import CartDto
+from backend.common.models.etl_status_dto import EtlStatusDto
 from backend.common.models.most_ordered_category_dto import MostOrderedCategoryDto
-from backend.common.models.product_dto import ProductDto
-from backend.common.models.product_from_cart_dto import ProductFromCartDto
-from backend.common.models.user_dto import UserDto
+from backend.common.models.page_dto import PageDto
+from backend.common.models.response_cache_stats_dto import ResponseCacheStatsDto
+from backend.common.utils.metrics import metrics
+from backend.common.utils.response_cache import CachedResponse, ResponseCache
 from backend.interfaces.cart_service_interface import CartServiceInterface
 from backend.interfaces.category_service_interface import (
     CategoryServiceInterface,
 )
+from backend.interfaces.etl_job_interface import EtlJobInterface
 from backend.interfaces.product_service_interface import ProductServiceInterface
 from backend.interfaces.product_from_cart_service_interface import (
     ProductFromCartServiceInterface,
@@ -18,56 +28,343 @@ from backend.interfaces.product_from_cart_service_interface import (
 from backend.interfaces.user_service_interface import UserServiceInterface
 
 router = APIRouter()
+# Served at the root, where Prometheus scrapes by default
+metrics_router = APIRouter()
 
+PROMETHEUS_MEDIA_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
 
-def get_user_service(request: Request) -> UserServiceInterface:
-    return request.app.state.user_service
+T = TypeVar("T")
+
+PAGE_ADAPTER: TypeAdapter[PageDto] = TypeAdapter(PageDto)
+MOST_ORDERED_CATEGORIES_ADAPTER: TypeAdapter[List[MostOrderedCategoryDto]] = (
+    TypeAdapter(List[MostOrderedCategoryDto])
+)
+
+
+def get_db_session(request: Request) -> Iterator[Session]:
+    # One read-only session per request, closed once the response has been sent
+    with request.app.state.read_session() as db_session:
+        yield db_session
+
+
+def get_user_service(
+    request: Request, db_session: Session = Depends(get_db_session)
+) -> UserServiceInterface:
+    return request.app.state.create_user_service(db_session)
+
+
+def get_cart_service(
+    request: Request, db_session: Session = Depends(get_db_session)
+) -> CartServiceInterface:
+    return request.app.state.create_cart_service(db_session)
+
+
+def get_product_service(
+    request: Request, db_session: Session = Depends(get_db_session)
+) -> ProductServiceInterface:
+    return request.app.state.create_product_service(db_session)
+
+
+def get_product_from_cart_service(
+    request: Request, db_session: Session = Depends(get_db_session)
+) -> ProductFromCartServiceInterface:
+    return request.app.state.create_product_from_cart_service(db_session)
+
+
+def get_category_service(
+    request: Request, db_session: Session = Depends(get_db_session)
+) -> CategoryServiceInterface:
+    return request.app.state.create_category_service(db_session)
 
 
-def get_cart_service(request: Request) -> CartServiceInterface:
-    return request.app.state.cart_service
+def get_etl_job(request: Request) -> EtlJobInterface:
+    return request.app.state.etl_job
 
 
-def get_product_service(request: Request) -> ProductServiceInterface:
-    return request.app.state.product_service
+def get_read_executor(request: Request) -> Executor:
+    return request.app.state.read_executor
 
 
-def get_product_from_cart_service(request: Request) -> ProductFromCartServiceInterface:
-    return request.app.state.product_from_cart_service
+def get_response_cache(request: Request) -> ResponseCache:
+    return request.app.state.response_cache
 
 
-def get_category_service(request: Request) -> CategoryServiceInterface:
-    return request.app.state.category_service
+async def run_blocking(
+    executor: Executor, function: Callable[..., T], *args: Any
+) -> T:
+    # The services query SQLite synchronously, so they run on the read executor
+    # and the event loop stays free to accept other requests meanwhile
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, partial(function, *args)
+    )
 
 
-@router.get("/users", response_model=List[UserDto])
-async def get_users(user_service: UserServiceInterface = Depends(get_user_service)):
-    return user_service.get_all_users()
+class PageParams:
+    def __init__(
+        self,
+        cursor: Optional[int] = Query(
+            None, ge=0, description="next_cursor of the previous page"
+        ),
+        limit: int = Query(100, ge=1, le=1000),
+        fields: Optional[str] = Query(
+            None, description="Comma separated fields to return, all by default"
+        ),
+    ):
+        self.cursor: Optional[int] = cursor
+        self.limit: int = limit
+        self.fields: Optional[List[str]] = (
+            [field.strip() for field in fields.split(",") if field.strip()]
+            if fields
+            else None
+        )
 
 
-@router.get("/carts", response_model=List[CartDto])
-async def get_carts(cart_service: CartServiceInterface = Depends(get_cart_service)):
-    return cart_service.get_all_carts()
+async def get_page(
+    executor: Executor,
+    get_page_function: Callable[..., PageDto],
+    page: PageParams,
+    **filters: Any,
+) -> PageDto:
+    try:
+        return await run_blocking(
+            executor,
+            partial(get_page_function, **filters),
+            page.cursor,
+            page.limit,
+            page.fields,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison as for If-None-Match, a W/ prefix does not matter
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == etag
+        for candidate in (part.strip() for part in if_none_match.split(","))
+    )
+
+
+async def cached_json_response(
+    request: Request,
+    response_cache: ResponseCache,
+    load: Callable[[], Awaitable[T]],
+    adapter: TypeAdapter[T],
+) -> Response:
+    # The data only changes when an ETL run commits, so the serialized body is kept
+    # until the run bumps the cache generation. The key ignores the parameter order.
+    key: str = f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+    cached_response: Optional[CachedResponse] = response_cache.get(key)
+    if cached_response is None:
+        generation: int = response_cache.generation
+        cached_response = response_cache.put(
+            key, generation, adapter.dump_json(await load())
+        )
+    headers: Dict[str, str] = {"ETag": cached_response.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), cached_response.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        cached_response.body, media_type="application/json", headers=headers
+    )
+
+
+def ndjson_chunks(batches: Iterator[List[Dict[str, Any]]]) -> Iterator[str]:
+    for batch in batches:
+        yield "".join(f"{json.dumps(row, separators=(',', ':'))}\n" for row in batch)
+
+
+def ndjson_response(batches: Iterator[List[Dict[str, Any]]]) -> StreamingResponse:
+    # Each batch of rows is serialized and sent on its own, nothing is built up for
+    # the whole table; starlette pulls the batches from a worker thread.
+    return StreamingResponse(ndjson_chunks(batches), media_type="application/x-ndjson")
+
+
+@router.get("/users", response_model=PageDto)
+async def get_users(
+    request: Request,
+    page: PageParams = Depends(),
+    user_id: Optional[int] = None,
+    email: Optional[str] = None,
+    user_service: UserServiceInterface = Depends(get_user_service),
+    read_executor: Executor = Depends(get_read_executor),
+    response_cache: ResponseCache = Depends(get_response_cache),
+):
+    return await cached_json_response(
+        request,
+        response_cache,
+        partial(
+            get_page,
+            read_executor,
+            user_service.get_users_page,
+            page,
+            user_id=user_id,
+            email=email,
+        ),
+        PAGE_ADAPTER,
+    )
+
+
+@router.get("/carts", response_model=PageDto)
+async def get_carts(
+    request: Request,
+    page: PageParams = Depends(),
+    cart_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    cart_service: CartServiceInterface = Depends(get_cart_service),
+    read_executor: Executor = Depends(get_read_executor),
+    response_cache: ResponseCache = Depends(get_response_cache),
+):
+    return await cached_json_response(
+        request,
+        response_cache,
+        partial(
+            get_page,
+            read_executor,
+            cart_service.get_carts_page,
+            page,
+            cart_id=cart_id,
+            user_id=user_id,
+        ),
+        PAGE_ADAPTER,
+    )
 
 
-@router.get("/products", response_model=List[ProductDto])
+@router.get("/products", response_model=PageDto)
 async def get_products(
+    request: Request,
+    page: PageParams = Depends(),
+    product_id: Optional[int] = None,
+    category: Optional[str] = None,
     product_service: ProductServiceInterface = Depends(get_product_service),
+    read_executor: Executor = Depends(get_read_executor),
+    response_cache: ResponseCache = Depends(get_response_cache),
 ):
-    return product_service.get_all_products()
+    return await cached_json_response(
+        request,
+        response_cache,
+        partial(
+            get_page,
+            read_executor,
+            product_service.get_products_page,
+            page,
+            product_id=product_id,
+            category=category,
+        ),
+        PAGE_ADAPTER,
+    )
 
 
-@router.get("/products-bought-from-carts", response_model=List[ProductFromCartDto])
+@router.get("/products-bought-from-carts", response_model=PageDto)
 async def get_bought_products_from_carts(
+    request: Request,
+    page: PageParams = Depends(),
+    cart_id: Optional[int] = None,
+    product_id: Optional[int] = None,
     product_from_cart_service: ProductFromCartServiceInterface = Depends(
         get_product_from_cart_service
     ),
+    read_executor: Executor = Depends(get_read_executor),
+    response_cache: ResponseCache = Depends(get_response_cache),
 ):
-    return product_from_cart_service.get_bought_products_from_carts()
+    return await cached_json_response(
+        request,
+        response_cache,
+        partial(
+            get_page,
+            read_executor,
+            product_from_cart_service.get_bought_products_from_carts_page,
+            page,
+            cart_id=cart_id,
+            product_id=product_id,
+        ),
+        PAGE_ADAPTER,
+    )
+
+
+@router.get("/users/export", response_class=StreamingResponse)
+async def export_users(
+    user_service: UserServiceInterface = Depends(get_user_service),
+):
+    return ndjson_response(user_service.stream_users())
+
+
+@router.get("/carts/export", response_class=StreamingResponse)
+async def export_carts(
+    cart_service: CartServiceInterface = Depends(get_cart_service),
+):
+    return ndjson_response(cart_service.stream_carts())
+
+
+@router.get("/products/export", response_class=StreamingResponse)
+async def export_products(
+    product_service: ProductServiceInterface = Depends(get_product_service),
+):
+    return ndjson_response(product_service.stream_products())
+
+
+@router.get("/products-bought-from-carts/export", response_class=StreamingResponse)
+async def export_bought_products_from_carts(
+    product_from_cart_service: ProductFromCartServiceInterface = Depends(
+        get_product_from_cart_service
+    ),
+):
+    return ndjson_response(
+        product_from_cart_service.stream_bought_products_from_carts()
+    )
 
 
 @router.get("/most-ordered-category", response_model=List[MostOrderedCategoryDto])
 async def get_most_ordered_category(
+    request: Request,
     category_service: CategoryServiceInterface = Depends(get_category_service),
+    read_executor: Executor = Depends(get_read_executor),
+    response_cache: ResponseCache = Depends(get_response_cache),
+):
+    return await cached_json_response(
+        request,
+        response_cache,
+        partial(
+            run_blocking, read_executor, category_service.get_most_ordered_category
+        ),
+        MOST_ORDERED_CATEGORIES_ADAPTER,
+    )
+
+
+@router.get("/cache/stats", response_model=ResponseCacheStatsDto)
+async def get_response_cache_stats(
+    response_cache: ResponseCache = Depends(get_response_cache),
+):
+    return response_cache.get_stats()
+
+
+@router.get("/etl/status", response_model=EtlStatusDto)
+async def get_etl_status(etl_job: EtlJobInterface = Depends(get_etl_job)):
+    return etl_job.get_status()
+
+
+@router.post(
+    "/etl/run", response_model=EtlStatusDto, status_code=status.HTTP_202_ACCEPTED
+)
+async def run_etl(
+    full_refresh: bool = False,
+    profile: Optional[str] = Query(
+        None, description="Profile the run with cprofile or tracemalloc"
+    ),
+    etl_job: EtlJobInterface = Depends(get_etl_job),
 ):
-    return category_service.get_most_ordered_category()
+    try:
+        started: bool = etl_job.start(full_refresh, profile)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not started:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="ETL run already in progress"
+        )
+    return etl_job.get_status()
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -1,19 +1,76 @@
-from typing import Any
+from typing import Any, Tuple
 
 import sqlalchemy as sa
-from sqlalchemy import Engine
+from sqlalchemy import Connection, Engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from backend.common.utils.logger import logger
 
-Engine: Engine = sa.create_engine("sqlite:///backend/database/sqlite_database.db")
+
+DATABASE_URL: str = "sqlite:///backend/database/sqlite_database.db"
+READ_POOL_SIZE: int = 8
+# Indexes replaced by others since, dropped from existing databases by create_tables
+RETIRED_INDEXES: Tuple[str, ...] = ("ix_products_from_carts_cart_id",)
+
+
+def configure_engine(engine: sa.Engine, read_only: bool = False) -> None:
+    # WAL lets readers keep using the last committed snapshot while the ETL writes.
+    # pysqlite only emits BEGIN lazily before DML, so transaction control is taken over
+    # to make DDL and SAVEPOINTs part of the ETL transaction too.
+    @sa.event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        if read_only:
+            dbapi_connection.execute("PRAGMA query_only=ON")
+
+    @sa.event.listens_for(engine, "begin")
+    def on_begin(connection: Connection) -> None:
+        connection.exec_driver_sql("BEGIN")
+
+
+def create_read_engine(url: str, pool_size: int = READ_POOL_SIZE) -> sa.Engine:
+    # Request sessions read through their own pool, one connection per read thread,
+    # so they never wait for the connections the ETL holds on the write engine
+    read_engine: sa.Engine = sa.create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size,
+        max_overflow=0,
+    )
+    configure_engine(read_engine, read_only=True)
+    return read_engine
+
+
+Engine: Engine = sa.create_engine(
+    DATABASE_URL, connect_args={"check_same_thread": False}
+)
+configure_engine(Engine)
 Session: sessionmaker[Session] = sessionmaker(bind=Engine)
+ReadEngine: Engine = create_read_engine(DATABASE_URL)
+ReadSession: sessionmaker[Session] = sessionmaker(bind=ReadEngine)
 Base: Any = declarative_base()
 
 
-def create_tables() -> None:
-    logger.info("Dropping all existing tables...")
-    Base.metadata.drop_all(Engine)
-    logger.info("Creating tables from scratch...")
-    Base.metadata.create_all(Engine)
-    logger.info(f"Database recreated with engine {Engine}")
+def create_tables(
+    full_refresh: bool = True, bind: sa.Engine | Connection = Engine
+) -> None:
+    if full_refresh:
+        logger.info("Dropping all existing tables...")
+        Base.metadata.drop_all(bind)
+        logger.info("Creating tables from scratch...")
+    else:
+        logger.info("Keeping existing tables, creating missing ones...")
+    Base.metadata.create_all(bind)
+    # create_all skips tables that already exist, indexes added later still need creating
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+    for index_name in RETIRED_INDEXES:
+        drop_index: sa.DDL = sa.DDL(f"DROP INDEX IF EXISTS {index_name}")
+        if isinstance(bind, Connection):
+            bind.execute(drop_index)
+        else:
+            with bind.begin() as connection:
+                connection.execute(drop_index)
+    logger.info(f"Database ready with {bind}")
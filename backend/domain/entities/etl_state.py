@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.database.sqlite_database import Base
+
+
+class EtlState(Base):
+    __tablename__ = "etl_state"
+
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, unique=True, autoincrement=True, nullable=False
+    )
+    resource: Mapped[str] = mapped_column(unique=True, nullable=False)
+    skip_offset: Mapped[int]
+    last_id: Mapped[Optional[int]]
+    content_hash: Mapped[Optional[str]]
+    updated_at: Mapped[datetime]
+
+    def __repr__(self) -> str:
+        return (
+            f"<EtlState(id={self.id}, resource={self.resource}, "
+            f"skip_offset={self.skip_offset}, last_id={self.last_id}, "
+            f"content_hash={self.content_hash}, updated_at={self.updated_at})>"
+        )
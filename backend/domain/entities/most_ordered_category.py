@@ -0,0 +1,21 @@
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.database.sqlite_database import Base
+
+
+class MostOrderedCategory(Base):
+    __tablename__ = "most_ordered_categories"
+
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, unique=True, autoincrement=True, nullable=False
+    )
+    user_id: Mapped[int] = mapped_column(index=True)
+    category_name: Mapped[str]
+    total_orders: Mapped[int]
+
+    def __repr__(self) -> str:
+        return (
+            f"<MostOrderedCategory(id={self.id}, user_id={self.user_id}, "
+            f"category_name={self.category_name}, total_orders={self.total_orders})>"
+        )
@@ -12,7 +12,7 @@ class Product(Base):
     )
     title: Mapped[str]
     description: Mapped[str]
-    category: Mapped[str]
+    category: Mapped[str] = mapped_column(index=True)
     price: Mapped[float]
     product_id: Mapped[int] = mapped_column(unique=True, nullable=False)
 
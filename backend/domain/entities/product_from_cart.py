@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, Integer
+from sqlalchemy import ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column
 
 from backend.database.sqlite_database import Base
@@ -6,12 +6,22 @@ from backend.database.sqlite_database import Base
 
 class ProductFromCart(Base):
     __tablename__ = "products_from_carts"
+    # Covers the carts join of the category totals, so SQLite never reads the table
+    # rows; it also serves every lookup by cart_id on its own
+    __table_args__ = (
+        Index(
+            "ix_products_from_carts_cart_id_product_id_quantity",
+            "cart_id",
+            "product_id",
+            "quantity",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer, primary_key=True, unique=True, autoincrement=True, nullable=False
     )
     cart_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("carts.cart_id"), nullable=False, index=True
+        Integer, ForeignKey("carts.cart_id"), nullable=False
     )
     product_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("products.product_id"), nullable=False, index=True
@@ -18,7 +18,7 @@ class User(Base):
     street: Mapped[str]
     city: Mapped[str]
     country: Mapped[str]
-    user_id: Mapped[int]
+    user_id: Mapped[int] = mapped_column(index=True)
 
     def __repr__(self) -> str:
         return (
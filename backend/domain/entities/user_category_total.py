@@ -0,0 +1,22 @@
+from sqlalchemy import Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.database.sqlite_database import Base
+
+
+class UserCategoryTotal(Base):
+    __tablename__ = "user_category_totals"
+    __table_args__ = (UniqueConstraint("user_id", "category"),)
+
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, unique=True, autoincrement=True, nullable=False
+    )
+    user_id: Mapped[int]
+    category: Mapped[str]
+    total_orders: Mapped[int]
+
+    def __repr__(self) -> str:
+        return (
+            f"<UserCategoryTotal(id={self.id}, user_id={self.user_id}, "
+            f"category={self.category}, total_orders={self.total_orders})>"
+        )
@@ -1,10 +1,19 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
 
 from sqlalchemy.orm import Session
 
 from backend.common.models.cart_dto import CartDto
+from backend.common.models.cart_with_products_dto import CartWithProductsDto
+from backend.common.models.load_result_dto import LoadResultDto
+from backend.common.models.page_dto import PageDto
+from backend.common.utils.bulk_insert_util import BulkInsertUtil
+from backend.common.utils.dto_list_util import DtoListUtil
+from backend.common.utils.existing_keys_index import ExistingKeysIndex
 from backend.common.utils.file_util import FileUtil
-from backend.common.utils.logger import logger
+from backend.common.utils.keyset_page_util import KeysetPageUtil
+from backend.common.utils.logger import log_fields, logger
+from backend.common.utils.result_sink import ResultSink
+from backend.common.utils.row_stream_util import RowStreamUtil
 from backend.domain.entities.cart import Cart
 from backend.interfaces.cart_service_interface import CartServiceInterface
 from backend.interfaces.product_from_cart_service_interface import (
@@ -15,7 +24,6 @@ from backend.interfaces.dummy_json_api_interface import DummyJSONApiInterface
 
 class CartService(CartServiceInterface):
     __CARTS_TXT: str = "carts.txt"
-    __PRODUCTS_FROM_CARTS_TXT: str = "products_from_carts.txt"
 
     def __init__(
         self,
@@ -28,59 +36,173 @@ class CartService(CartServiceInterface):
         self.__product_from_cart_service: ProductFromCartServiceInterface = (
             product_from_cart_service
         )
+        self.__carts_index: ExistingKeysIndex = ExistingKeysIndex(
+            db_session, Cart.cart_id
+        )
+        self.__update_existing: bool = False
+        self.__carts_sink: Optional[ResultSink] = None
 
     def get_all_carts(self):
-        with self.__db_session:
-            logger.info("Fetching all carts from DB")
-            carts_entities = self.__db_session.query(Cart).all()
-            return [CartDto.model_validate(cart) for cart in carts_entities]
+        logger.info("Fetching all carts from DB")
+        return DtoListUtil.select_all(self.__db_session, Cart, CartDto)
+
+    def get_carts_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        cart_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ) -> PageDto:
+        logger.info("Fetching carts page after cursor %s from DB", cursor)
+        return KeysetPageUtil.get_page(
+            self.__db_session,
+            Cart,
+            CartDto,
+            cursor,
+            limit,
+            fields,
+            {Cart.cart_id: cart_id, Cart.user_id: user_id},
+        )
+
+    def stream_carts(
+        self, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        logger.info("Streaming all carts from DB")
+        return RowStreamUtil.stream_rows(
+            self.__db_session, Cart, CartDto, batch_size
+        )
 
     def process_carts(self) -> None:
+        self.prepare_carts_processing()
+        try:
+            for carts_batch in self.__dummy_json_api.get_carts():
+                carts_dtos: List[CartWithProductsDto] = self.transform_carts_batch(
+                    carts_batch
+                )
+                inserted: int = self.load_carts_batch(carts_dtos).inserted
+                logger.debug(
+                    "Carts batch processed: %d inserted, %d skipped",
+                    inserted,
+                    len(carts_batch) - inserted,
+                )
+        finally:
+            self.finish_carts_processing()
+
+    def prepare_carts_processing(self, update_existing: bool = False) -> None:
+        self.finish_carts_processing()
         FileUtil.clean_txt_file_before_processing(self.__CARTS_TXT)
-        FileUtil.clean_txt_file_before_processing(self.__PRODUCTS_FROM_CARTS_TXT)
-        for carts_batch in self.__dummy_json_api.get_carts():
-            self.__process_single_batch_of_carts(carts_batch)
+        self.__product_from_cart_service.prepare_products_from_carts_processing(
+            update_existing
+        )
+        self.__carts_index.load()
+        self.__update_existing = update_existing
+        if not update_existing:
+            # Only new carts get loaded, so the dumps start with the existing ones
+            self.__add_existing_carts_to_txt()
 
-    def __process_single_batch_of_carts(self, carts: List[Dict[str, Any]]) -> None:
+    def transform_carts_batch(
+        self, carts: List[Dict[str, Any]]
+    ) -> List[CartWithProductsDto]:
+        cart_ids: Set[int] = {cart.get("id") for cart in carts}
+        cart_ids_to_load: Set[int] = (
+            cart_ids
+            if self.__update_existing
+            else self.__carts_index.filter_preloaded(cart_ids)
+        )
+        carts_dtos: Dict[int, CartWithProductsDto] = {}
         for cart in carts:
             cart_id: int = cart.get("id")
-            logger.info(f"Processing cart with ID: {cart_id}")
-            is_cart_in_db: bool = self.__is_cart_in_db(cart_id)
-            if not is_cart_in_db:
-                cart_dto: CartDto = CartDto(
-                    cart_id=cart_id,
-                    user_id=cart.get("userId"),
+            if cart_id not in cart_ids_to_load or cart_id in carts_dtos:
+                logger.debug(
+                    "Cart with ID: %s already exists in DB, skipping...", cart_id
                 )
-                self.__add_cart_to_db(cart_dto)
-                self.__add_cart_to_txt(cart_dto)
-
-                self.__product_from_cart_service.process_products_from_carts(
+                continue
+            cart_dto: CartDto = CartDto(
+                cart_id=cart_id,
+                user_id=cart.get("userId"),
+            )
+            carts_dtos[cart_id] = CartWithProductsDto(
+                cart=cart_dto,
+                products=self.__product_from_cart_service.transform_products_from_cart(
                     cart, cart_dto
-                )
-            else:
-                logger.info(
-                    f"Cart with ID: {cart_id} already exists in DB, skipping..."
-                )
+                ),
+            )
+        logger.info(
+            "Carts batch transformed",
+            extra=log_fields(
+                records=len(carts),
+                new=len(carts_dtos),
+                skipped=len(carts) - len(carts_dtos),
+                products=sum(len(cart_dto.products) for cart_dto in carts_dtos.values()),
+            ),
+        )
+        return list(carts_dtos.values())
 
-    def __is_cart_in_db(self, cart_id: int) -> bool:
-        with self.__db_session:
-            logger.info(f"Checking if cart with ID: {cart_id} exists in DB")
-            count: int = (
-                self.__db_session.query(Cart).filter(Cart.cart_id == cart_id).count()
+    def load_carts_batch(self, carts_dtos: List[CartWithProductsDto]) -> LoadResultDto:
+        existing_cart_ids: Set[int] = set()
+        if self.__update_existing:
+            cart_ids: Set[int] = {cart_dto.cart.cart_id for cart_dto in carts_dtos}
+            existing_cart_ids = cart_ids - self.__carts_index.filter_new(cart_ids)
+        loaded_cart_ids: Set[int] = self.__add_carts_to_db(
+            [cart_dto.cart for cart_dto in carts_dtos]
+        )
+        self.__carts_index.add(loaded_cart_ids)
+        loaded_carts: List[CartWithProductsDto] = [
+            cart_dto
+            for cart_dto in carts_dtos
+            if cart_dto.cart.cart_id in loaded_cart_ids
+        ]
+        self.__add_carts_to_txt([cart_dto.cart for cart_dto in loaded_carts])
+        if loaded_carts:
+            # Products of carts that already existed are replaced, not appended
+            self.__product_from_cart_service.load_products_from_carts(
+                [product for cart_dto in loaded_carts for product in cart_dto.products],
+                replaced_cart_ids=sorted(loaded_cart_ids & existing_cart_ids),
             )
-            return count > 0
 
-    def __add_cart_to_db(self, cart_dto: CartDto) -> None:
-        cart_entity = Cart(
-            cart_id=cart_dto.cart_id,
-            user_id=cart_dto.user_id,
+        load_result: LoadResultDto = LoadResultDto(
+            inserted=len(loaded_cart_ids - existing_cart_ids),
+            updated=len(loaded_cart_ids & existing_cart_ids),
+            skipped=len(carts_dtos) - len(loaded_cart_ids),
         )
+        logger.info("Carts batch loaded", extra=log_fields(**load_result.model_dump()))
+        return load_result
+
+    def finish_carts_processing(self) -> None:
+        if self.__carts_sink is not None:
+            self.__carts_sink.close()
+            self.__carts_sink = None
+        self.__product_from_cart_service.finish_products_from_carts_processing()
 
+    def __add_carts_to_db(self, carts_dtos: List[CartDto]) -> Set[int]:
+        if not carts_dtos:
+            return set()
         with self.__db_session:
-            logger.info(f"Adding cart to DB: {cart_entity}")
-            self.__db_session.add(cart_entity)
+            logger.debug("Adding %d carts to DB", len(carts_dtos))
+            write = (
+                BulkInsertUtil.upsert
+                if self.__update_existing
+                else BulkInsertUtil.insert_ignoring_duplicates
+            )
+            loaded_cart_ids: Set[int] = write(
+                self.__db_session,
+                Cart,
+                [cart_dto.model_dump() for cart_dto in carts_dtos],
+                Cart.cart_id,
+            )
             self.__db_session.commit()
+            return loaded_cart_ids
+
+    def __add_existing_carts_to_txt(self) -> None:
+        for rows in RowStreamUtil.stream_rows(self.__db_session, Cart, CartDto):
+            self.__add_carts_to_txt([CartDto(**row) for row in rows])
 
-    def __add_cart_to_txt(self, cart_dto: CartDto) -> None:
-        logger.info(f"Adding cart to the txt file: {cart_dto}")
-        FileUtil.save_result_to_txt_file(self.__CARTS_TXT, cart_dto)
+    def __add_carts_to_txt(self, carts_dtos: List[CartDto]) -> None:
+        if not carts_dtos:
+            return
+        logger.debug("Adding %d carts to the txt file", len(carts_dtos))
+        if self.__carts_sink is None:
+            self.__carts_sink = ResultSink(self.__CARTS_TXT)
+        self.__carts_sink.write_all(carts_dtos)
+        self.__carts_sink.flush()
@@ -1,15 +1,19 @@
-from collections import defaultdict
-from typing import List, Dict, Tuple
+from typing import Iterable, List
 
-from sqlalchemy import func
+from sqlalchemy import Select, delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from backend.common.models.most_ordered_category_dto import MostOrderedCategoryDto
+from backend.common.utils.dto_list_util import DtoListUtil
 from backend.common.utils.file_util import FileUtil
 from backend.common.utils.logger import logger
+from backend.common.utils.result_sink import ResultSink
 from backend.domain.entities.cart import Cart
+from backend.domain.entities.most_ordered_category import MostOrderedCategory
 from backend.domain.entities.product import Product
 from backend.domain.entities.product_from_cart import ProductFromCart
+from backend.domain.entities.user_category_total import UserCategoryTotal
 from backend.interfaces.category_service_interface import (
     CategoryServiceInterface,
 )
@@ -25,55 +29,114 @@ class CategoryService(CategoryServiceInterface):
         self.__db_session: Session = db_session
 
     def get_most_ordered_category(self) -> List[MostOrderedCategoryDto]:
-        FileUtil.clean_txt_file_before_processing(self.__CATEGORIES_TXT)
+        logger.info("Fetching most ordered categories from DB")
+        return DtoListUtil.select_all(
+            self.__db_session,
+            MostOrderedCategory,
+            MostOrderedCategoryDto,
+            (MostOrderedCategory.user_id, MostOrderedCategory.id),
+        )
+
+    def has_category_totals(self) -> bool:
         with self.__db_session:
-            logger.info("Fetching most ordered categories from DB")
-            results = (
-                self.__db_session.query(
-                    Cart.user_id,
-                    Product.category,
-                    func.sum(ProductFromCart.quantity).label("total_orders"),
-                )
-                .join(
-                    ProductFromCart,
-                    Cart.cart_id == ProductFromCart.cart_id,
+            return self.__db_session.scalar(select(UserCategoryTotal.id).limit(1)) is not None
+
+    def add_to_category_totals(self, cart_ids: Iterable[int]) -> None:
+        # Only valid for carts whose products were all loaded just now; carts that
+        # replaced older products are handled by rebuilding the totals at the end.
+        cart_ids = list(cart_ids)
+        if not cart_ids:
+            return
+        with self.__db_session:
+            logger.debug("Adding products of %d carts to category totals", len(cart_ids))
+            statement = sqlite_insert(UserCategoryTotal).from_select(
+                ["user_id", "category", "total_orders"],
+                self.__category_totals_query().where(Cart.cart_id.in_(cart_ids)),
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=[UserCategoryTotal.user_id, UserCategoryTotal.category],
+                set_={
+                    "total_orders": UserCategoryTotal.total_orders
+                    + statement.excluded.total_orders
+                },
+            )
+            self.__db_session.execute(statement)
+            self.__db_session.commit()
+
+    def refresh_most_ordered_categories(
+        self, rebuild_totals: bool = False
+    ) -> List[MostOrderedCategoryDto]:
+        with self.__db_session:
+            if rebuild_totals:
+                logger.info("Rebuilding category totals from all carts")
+                self.__db_session.execute(delete(UserCategoryTotal))
+                self.__db_session.execute(
+                    insert(UserCategoryTotal).from_select(
+                        ["user_id", "category", "total_orders"],
+                        self.__category_totals_query(),
+                    )
                 )
-                .join(
-                    Product,
-                    ProductFromCart.product_id == Product.product_id,
+            logger.info("Materializing most ordered categories")
+            self.__db_session.execute(delete(MostOrderedCategory))
+            self.__db_session.execute(
+                insert(MostOrderedCategory).from_select(
+                    ["user_id", "category_name", "total_orders"],
+                    self.__most_ordered_query(),
                 )
-                .group_by(Cart.user_id, Product.category)
-                .all()
             )
+            self.__db_session.commit()
 
-            # Group by user_id
-            user_categories: Dict[int, List[Tuple[str, int]]] = defaultdict(list)
-            for user_id, category, total_orders in results:
-                user_categories[user_id].append((category, total_orders))
+        most_ordered_categories: List[MostOrderedCategoryDto] = (
+            self.get_most_ordered_category()
+        )
+        self.__add_most_ordered_categories_to_txt(most_ordered_categories)
+        return most_ordered_categories
 
-            most_ordered_categories: List[MostOrderedCategoryDto] = []
-            for user_id, categories in user_categories.items():
-                if not categories:
-                    continue
-                max_orders: int = max(total for _, total in categories)
-                for category, total in categories:
-                    if total == max_orders:
-                        most_ordered_category: MostOrderedCategoryDto = (
-                            MostOrderedCategoryDto(
-                                user_id=user_id,
-                                category_name=category,
-                                total_orders=total,
-                            )
-                        )
-                        most_ordered_categories.append(most_ordered_category)
-                        self.__add_most_ordered_categories_to_txt(most_ordered_category)
+    @staticmethod
+    def __category_totals_query() -> Select:
+        return (
+            select(
+                Cart.user_id,
+                Product.category,
+                func.sum(ProductFromCart.quantity),
+            )
+            .join(ProductFromCart, Cart.cart_id == ProductFromCart.cart_id)
+            .join(Product, ProductFromCart.product_id == Product.product_id)
+            .group_by(Cart.user_id, Product.category)
+        )
 
-            return most_ordered_categories
+    @staticmethod
+    def __most_ordered_query() -> Select:
+        # RANK gives every category tied for a user's highest total rank 1, so ties
+        # are kept and only the winning rows leave SQLite
+        ranked_totals = select(
+            UserCategoryTotal.user_id,
+            UserCategoryTotal.category,
+            UserCategoryTotal.total_orders,
+            func.rank()
+            .over(
+                partition_by=UserCategoryTotal.user_id,
+                order_by=UserCategoryTotal.total_orders.desc(),
+            )
+            .label("category_rank"),
+        ).subquery()
+        return (
+            select(
+                ranked_totals.c.user_id,
+                ranked_totals.c.category,
+                ranked_totals.c.total_orders,
+            )
+            .where(ranked_totals.c.category_rank == 1)
+            .order_by(ranked_totals.c.user_id, ranked_totals.c.category)
+        )
 
     def __add_most_ordered_categories_to_txt(
-        self, most_ordered_category: MostOrderedCategoryDto
+        self, most_ordered_categories: List[MostOrderedCategoryDto]
     ) -> None:
         logger.info(
-            f"Adding most ordered category for one user to the txt file: {most_ordered_category}"
+            f"Adding {len(most_ordered_categories)} most ordered categories "
+            f"to the txt file"
         )
-        FileUtil.save_result_to_txt_file(self.__CATEGORIES_TXT, most_ordered_category)
+        FileUtil.clean_txt_file_before_processing(self.__CATEGORIES_TXT)
+        with ResultSink(self.__CATEGORIES_TXT) as sink:
+            sink.write_all(most_ordered_categories)
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.common.models.etl_state_dto import EtlStateDto
+from backend.common.utils.bulk_insert_util import BulkInsertUtil
+from backend.common.utils.logger import logger
+from backend.domain.entities.etl_state import EtlState
+from backend.interfaces.etl_state_service_interface import EtlStateServiceInterface
+
+
+class EtlStateService(EtlStateServiceInterface):
+    def __init__(self, db_session: Session):
+        self.__db_session: Session = db_session
+
+    def get_state(self, resource: str) -> Optional[EtlStateDto]:
+        with self.__db_session:
+            etl_state = self.__db_session.scalar(
+                select(EtlState).where(EtlState.resource == resource)
+            )
+            if etl_state is None:
+                logger.info(f"No ETL state stored for {resource}")
+                return None
+            return EtlStateDto.model_validate(etl_state)
+
+    def save_state(self, etl_state_dto: EtlStateDto) -> None:
+        with self.__db_session:
+            logger.debug("Saving ETL state: %s", etl_state_dto)
+            BulkInsertUtil.upsert(
+                self.__db_session,
+                EtlState,
+                [
+                    {
+                        **etl_state_dto.model_dump(),
+                        "updated_at": datetime.now(timezone.utc),
+                    }
+                ],
+                EtlState.resource,
+            )
+            self.__db_session.commit()
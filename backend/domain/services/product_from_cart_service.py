@@ -1,63 +1,167 @@
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
 from sqlalchemy.orm import Session
 
 from backend.common.models.cart_dto import CartDto
+from backend.common.models.load_result_dto import LoadResultDto
+from backend.common.models.page_dto import PageDto
 from backend.common.models.product_from_cart_dto import ProductFromCartDto
+from backend.common.utils.bulk_insert_util import BulkInsertUtil
+from backend.common.utils.dto_list_util import DtoListUtil
 from backend.common.utils.file_util import FileUtil
-from backend.common.utils.logger import logger
+from backend.common.utils.keyset_page_util import KeysetPageUtil
+from backend.common.utils.logger import log_fields, logger
+from backend.common.utils.result_sink import ResultSink
+from backend.common.utils.row_stream_util import RowStreamUtil
 from backend.domain.entities.product_from_cart import ProductFromCart
+from backend.interfaces.category_service_interface import CategoryServiceInterface
 from backend.interfaces.product_from_cart_service_interface import (
     ProductFromCartServiceInterface,
 )
 
 
 class ProductFromCartService(ProductFromCartServiceInterface):
-    def __init__(self, db_session: Session):
+    __PRODUCTS_FROM_CARTS_TXT: str = "products_from_carts.txt"
+
+    def __init__(
+        self,
+        db_session: Session,
+        category_service: Optional[CategoryServiceInterface] = None,
+    ):
         self.__db_session = db_session
+        self.__category_service: Optional[CategoryServiceInterface] = category_service
+        self.__products_from_carts_sink: Optional[ResultSink] = None
 
-    def process_products_from_carts(self, cart, cart_dto: CartDto) -> None:
+    def transform_products_from_cart(
+        self, cart: Dict[str, Any], cart_dto: CartDto
+    ) -> List[ProductFromCartDto]:
         products = cart.get("products")
-        if products:
-            logger.info(f"Processing products for cart ID: {cart_dto.cart_id}")
-            for product in products:
-                product_id = product.get("id")
-                logger.info(f"Processing product from cart with ID: {product_id}")
-                product_dto = ProductFromCartDto(
-                    cart_id=cart_dto.cart_id,
-                    product_id=product_id,
-                    quantity=product.get("quantity"),
-                )
-                self.__add_product_to_db(product_dto)
-                self.__add_product_to_txt(product_dto)
+        if not products:
+            return []
+        logger.debug(
+            "Processing %d products for cart ID: %s", len(products), cart_dto.cart_id
+        )
+        return [
+            ProductFromCartDto(
+                cart_id=cart_dto.cart_id,
+                product_id=product.get("id"),
+                quantity=product.get("quantity"),
+            )
+            for product in products
+        ]
+
+    def prepare_products_from_carts_processing(self, update_existing: bool = False) -> None:
+        self.finish_products_from_carts_processing()
+        FileUtil.clean_txt_file_before_processing(self.__PRODUCTS_FROM_CARTS_TXT)
+        if not update_existing:
+            # Products of new carts only get loaded, so the dumps start with the
+            # existing ones; updated carts have all their products loaded again
+            self.__add_existing_products_to_txt()
+
+    def load_products_from_carts(
+        self,
+        products_from_carts_dtos: List[ProductFromCartDto],
+        replaced_cart_ids: Iterable[int] = (),
+    ) -> LoadResultDto:
+        inserted: int = self.__add_products_to_db(
+            products_from_carts_dtos, list(replaced_cart_ids)
+        )
+        self.__add_products_to_txt(products_from_carts_dtos)
+        if self.__category_service is not None and inserted:
+            self.__category_service.add_to_category_totals(
+                {product_dto.cart_id for product_dto in products_from_carts_dtos}
+            )
+
+        load_result: LoadResultDto = LoadResultDto(inserted=inserted)
+        logger.info(
+            "Products from carts batch loaded",
+            extra=log_fields(**load_result.model_dump()),
+        )
+        return load_result
+
+    def finish_products_from_carts_processing(self) -> None:
+        if self.__products_from_carts_sink is not None:
+            self.__products_from_carts_sink.close()
+            self.__products_from_carts_sink = None
 
     def get_bought_products_from_carts(self) -> List[ProductFromCartDto]:
-        with self.__db_session:
-            logger.info("Fetching all products from carts from DB")
-            bought_products_from_carts_entities = self.__db_session.query(
-                ProductFromCart
-            ).all()
-            return [
-                ProductFromCartDto.model_validate(product)
-                for product in bought_products_from_carts_entities
-            ]
-
-    def __add_product_to_db(self, product_from_cart_dto: ProductFromCartDto) -> None:
-        product_from_cart_entity = ProductFromCart(
-            cart_id=product_from_cart_dto.cart_id,
-            product_id=product_from_cart_dto.product_id,
-            quantity=product_from_cart_dto.quantity,
+        logger.info("Fetching all products from carts from DB")
+        return DtoListUtil.select_all(
+            self.__db_session, ProductFromCart, ProductFromCartDto
+        )
+
+    def get_bought_products_from_carts_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        cart_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+    ) -> PageDto:
+        logger.info("Fetching products from carts page after cursor %s from DB", cursor)
+        return KeysetPageUtil.get_page(
+            self.__db_session,
+            ProductFromCart,
+            ProductFromCartDto,
+            cursor,
+            limit,
+            fields,
+            {ProductFromCart.cart_id: cart_id, ProductFromCart.product_id: product_id},
+        )
+
+    def stream_bought_products_from_carts(
+        self, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        logger.info("Streaming all bought products from carts from DB")
+        return RowStreamUtil.stream_rows(
+            self.__db_session, ProductFromCart, ProductFromCartDto, batch_size
         )
 
+    def __add_products_to_db(
+        self,
+        products_from_carts_dtos: List[ProductFromCartDto],
+        replaced_cart_ids: List[int],
+    ) -> int:
+        if not products_from_carts_dtos and not replaced_cart_ids:
+            return 0
         with self.__db_session:
-            logger.info(f"Adding product from cart to DB: {product_from_cart_entity}")
-            self.__db_session.add(product_from_cart_entity)
+            if replaced_cart_ids:
+                logger.debug(
+                    "Removing products of %d updated carts from DB",
+                    len(replaced_cart_ids),
+                )
+                BulkInsertUtil.delete_where_in(
+                    self.__db_session, ProductFromCart.cart_id, replaced_cart_ids
+                )
+            logger.debug(
+                "Adding %d products from carts to DB", len(products_from_carts_dtos)
+            )
+            inserted: int = BulkInsertUtil.insert_all(
+                self.__db_session,
+                ProductFromCart,
+                [product_dto.model_dump() for product_dto in products_from_carts_dtos],
+            )
             self.__db_session.commit()
+            return inserted
 
-    def __add_product_to_txt(self, product_from_cart_dto: ProductFromCartDto) -> None:
-        logger.info(
-            f"Adding product from cart to the txt file: {product_from_cart_dto}"
-        )
-        FileUtil.save_result_to_txt_file(
-            "products_from_carts.txt", product_from_cart_dto
+    def __add_existing_products_to_txt(self) -> None:
+        for rows in RowStreamUtil.stream_rows(
+            self.__db_session, ProductFromCart, ProductFromCartDto
+        ):
+            self.__add_products_to_txt([ProductFromCartDto(**row) for row in rows])
+
+    def __add_products_to_txt(
+        self, products_from_carts_dtos: List[ProductFromCartDto]
+    ) -> None:
+        if not products_from_carts_dtos:
+            return
+        logger.debug(
+            "Adding %d products from carts to the txt file",
+            len(products_from_carts_dtos),
         )
+        if self.__products_from_carts_sink is None:
+            self.__products_from_carts_sink = ResultSink(
+                self.__PRODUCTS_FROM_CARTS_TXT
+            )
+        self.__products_from_carts_sink.write_all(products_from_carts_dtos)
+        self.__products_from_carts_sink.flush()
@@ -1,10 +1,18 @@
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
 
 from sqlalchemy.orm import Session
 
+from backend.common.models.load_result_dto import LoadResultDto
+from backend.common.models.page_dto import PageDto
 from backend.common.models.product_dto import ProductDto
+from backend.common.utils.bulk_insert_util import BulkInsertUtil
+from backend.common.utils.dto_list_util import DtoListUtil
+from backend.common.utils.existing_keys_index import ExistingKeysIndex
 from backend.common.utils.file_util import FileUtil
-from backend.common.utils.logger import logger
+from backend.common.utils.keyset_page_util import KeysetPageUtil
+from backend.common.utils.logger import log_fields, logger
+from backend.common.utils.result_sink import ResultSink
+from backend.common.utils.row_stream_util import RowStreamUtil
 from backend.domain.entities.product import Product
 from backend.interfaces.product_service_interface import ProductServiceInterface
 from backend.interfaces.dummy_json_api_interface import DummyJSONApiInterface
@@ -16,63 +24,160 @@ class ProductService(ProductServiceInterface):
     def __init__(self, dummy_json_api: DummyJSONApiInterface, db_session: Session):
         self.__dummy_json_api: DummyJSONApiInterface = dummy_json_api
         self.__db_session: Session = db_session
+        self.__products_index: ExistingKeysIndex = ExistingKeysIndex(
+            db_session, Product.product_id
+        )
+        self.__update_existing: bool = False
+        self.__products_sink: Optional[ResultSink] = None
 
     def get_all_products(self) -> List[ProductDto]:
-        with self.__db_session:
-            logger.info("Fetching all products from DB")
-            products_entities = self.__db_session.query(Product).all()
-            return [ProductDto.model_validate(product) for product in products_entities]
+        logger.info("Fetching all products from DB")
+        return DtoListUtil.select_all(self.__db_session, Product, ProductDto)
+
+    def get_products_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        product_id: Optional[int] = None,
+        category: Optional[str] = None,
+    ) -> PageDto:
+        logger.info("Fetching products page after cursor %s from DB", cursor)
+        return KeysetPageUtil.get_page(
+            self.__db_session,
+            Product,
+            ProductDto,
+            cursor,
+            limit,
+            fields,
+            {Product.product_id: product_id, Product.category: category},
+        )
+
+    def stream_products(
+        self, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        logger.info("Streaming all products from DB")
+        return RowStreamUtil.stream_rows(
+            self.__db_session, Product, ProductDto, batch_size
+        )
 
     def process_products(self) -> None:
+        self.prepare_products_processing()
+        try:
+            for products_batch in self.__dummy_json_api.get_products():
+                products_dtos: List[ProductDto] = self.transform_products_batch(
+                    products_batch
+                )
+                inserted: int = self.load_products_batch(products_dtos).inserted
+                logger.debug(
+                    "Products batch processed: %d inserted, %d skipped",
+                    inserted,
+                    len(products_batch) - inserted,
+                )
+        finally:
+            self.finish_products_processing()
+
+    def prepare_products_processing(self, update_existing: bool = False) -> None:
+        self.finish_products_processing()
         FileUtil.clean_txt_file_before_processing(self.__PRODUCT_TXT)
-        for products_batch in self.__dummy_json_api.get_products():
-            self.__process_single_batch_of_products(products_batch)
+        self.__products_index.load()
+        self.__update_existing = update_existing
+        if not update_existing:
+            # Only new products get loaded, so the dumps start with the existing ones
+            self.__add_existing_products_to_txt()
 
-    def __process_single_batch_of_products(self, products: list) -> None:
+    def transform_products_batch(self, products: list) -> List[ProductDto]:
+        product_ids: Set[int] = {product.get("id") for product in products}
+        product_ids_to_load: Set[int] = (
+            product_ids
+            if self.__update_existing
+            else self.__products_index.filter_preloaded(product_ids)
+        )
+        products_dtos: Dict[int, ProductDto] = {}
         for product in products:
             product_id: int = product.get("id")
-            logger.info(f"Processing product with ID: {product_id}")
-            is_product_in_db: bool = self.__is_product_in_db(product_id)
-            if not is_product_in_db:
-                product_dto: ProductDto = ProductDto(
-                    title=product.get("title"),
-                    price=product.get("price"),
-                    category=product.get("category"),
-                    description=product.get("description"),
-                    product_id=product_id,
+            if product_id not in product_ids_to_load or product_id in products_dtos:
+                logger.debug(
+                    "Product with ID: %s already exists in DB, skipping...", product_id
                 )
-                self.__add_product_to_db(product_dto)
-                self.__add_product_to_txt(product_dto)
-            else:
-                logger.info(
-                    f"Product with ID: {product_id} already exists in DB, skipping..."
-                )
-
-    def __is_product_in_db(self, product_id: int) -> bool:
-        with self.__db_session:
-            logger.info(f"Checking if product with ID: {product_id} exists in DB")
-            count: int = (
-                self.__db_session.query(Product)
-                .filter(Product.product_id == product_id)
-                .count()
+                continue
+            products_dtos[product_id] = ProductDto(
+                title=product.get("title"),
+                price=product.get("price"),
+                category=product.get("category"),
+                description=product.get("description"),
+                product_id=product_id,
             )
+        logger.info(
+            "Products batch transformed",
+            extra=log_fields(
+                records=len(products),
+                new=len(products_dtos),
+                skipped=len(products) - len(products_dtos),
+            ),
+        )
+        return list(products_dtos.values())
 
-            return count > 0
+    def load_products_batch(self, products_dtos: List[ProductDto]) -> LoadResultDto:
+        existing_product_ids: Set[int] = set()
+        if self.__update_existing:
+            product_ids: Set[int] = {
+                product_dto.product_id for product_dto in products_dtos
+            }
+            existing_product_ids = product_ids - self.__products_index.filter_new(
+                product_ids
+            )
+        loaded_product_ids: Set[int] = self.__add_products_to_db(products_dtos)
+        self.__products_index.add(loaded_product_ids)
+        self.__add_products_to_txt(
+            [
+                product_dto
+                for product_dto in products_dtos
+                if product_dto.product_id in loaded_product_ids
+            ]
+        )
 
-    def __add_product_to_db(self, product_dto: ProductDto) -> None:
-        product_entity = Product(
-            title=product_dto.title,
-            price=product_dto.price,
-            category=product_dto.category,
-            description=product_dto.description,
-            product_id=product_dto.product_id,
+        load_result: LoadResultDto = LoadResultDto(
+            inserted=len(loaded_product_ids - existing_product_ids),
+            updated=len(loaded_product_ids & existing_product_ids),
+            skipped=len(products_dtos) - len(loaded_product_ids),
         )
+        logger.info("Products batch loaded", extra=log_fields(**load_result.model_dump()))
+        return load_result
+
+    def finish_products_processing(self) -> None:
+        if self.__products_sink is not None:
+            self.__products_sink.close()
+            self.__products_sink = None
 
+    def __add_products_to_db(self, products_dtos: List[ProductDto]) -> Set[int]:
+        if not products_dtos:
+            return set()
         with self.__db_session:
-            logger.info(f"Adding product to DB: {product_entity}")
-            self.__db_session.add(product_entity)
+            logger.debug("Adding %d products to DB", len(products_dtos))
+            write = (
+                BulkInsertUtil.upsert
+                if self.__update_existing
+                else BulkInsertUtil.insert_ignoring_duplicates
+            )
+            loaded_product_ids: Set[int] = write(
+                self.__db_session,
+                Product,
+                [product_dto.model_dump() for product_dto in products_dtos],
+                Product.product_id,
+            )
             self.__db_session.commit()
+            return loaded_product_ids
+
+    def __add_existing_products_to_txt(self) -> None:
+        for rows in RowStreamUtil.stream_rows(self.__db_session, Product, ProductDto):
+            self.__add_products_to_txt([ProductDto(**row) for row in rows])
 
-    def __add_product_to_txt(self, product_dto: ProductDto) -> None:
-        logger.info(f"Adding product to the txt file: {product_dto}")
-        FileUtil.save_result_to_txt_file(self.__PRODUCT_TXT, product_dto)
+    def __add_products_to_txt(self, products_dtos: List[ProductDto]) -> None:
+        if not products_dtos:
+            return
+        logger.debug("Adding %d products to the txt file", len(products_dtos))
+        if self.__products_sink is None:
+            self.__products_sink = ResultSink(self.__PRODUCT_TXT)
+        self.__products_sink.write_all(products_dtos)
+        self.__products_sink.flush()
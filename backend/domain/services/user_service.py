@@ -1,11 +1,19 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 from sqlalchemy.orm import Session
 
+from backend.common.models.load_result_dto import LoadResultDto
+from backend.common.models.page_dto import PageDto
 from backend.common.models.user_dto import UserDto
+from backend.common.utils.bulk_insert_util import BulkInsertUtil
+from backend.common.utils.dto_list_util import DtoListUtil
 from backend.common.utils.coordinates_util import CoordinatesUtil
+from backend.common.utils.existing_keys_index import ExistingKeysIndex
 from backend.common.utils.file_util import FileUtil
-from backend.common.utils.logger import logger
+from backend.common.utils.keyset_page_util import KeysetPageUtil
+from backend.common.utils.logger import log_fields, logger
+from backend.common.utils.result_sink import ResultSink
+from backend.common.utils.row_stream_util import RowStreamUtil
 from backend.domain.entities.user import User
 from backend.interfaces.user_service_interface import UserServiceInterface
 from backend.interfaces.dummy_json_api_interface import DummyJSONApiInterface
@@ -17,86 +25,183 @@ class UserService(UserServiceInterface):
     def __init__(self, dummy_json_api: DummyJSONApiInterface, db_session: Session):
         self.__dummy_json_api: DummyJSONApiInterface = dummy_json_api
         self.__db_session: Session = db_session
+        self.__users_index: ExistingKeysIndex = ExistingKeysIndex(
+            db_session, User.email
+        )
+        self.__update_existing: bool = False
+        self.__users_sink: Optional[ResultSink] = None
 
     def get_all_users(self) -> List[UserDto]:
-        with self.__db_session:
-            logger.info("Fetching all users from DB")
-            users_entities = self.__db_session.query(User).all()
-            return [UserDto.model_validate(user) for user in users_entities]
+        logger.info("Fetching all users from DB")
+        return DtoListUtil.select_all(self.__db_session, User, UserDto)
+
+    def get_users_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        user_id: Optional[int] = None,
+        email: Optional[str] = None,
+    ) -> PageDto:
+        logger.info("Fetching users page after cursor %s from DB", cursor)
+        return KeysetPageUtil.get_page(
+            self.__db_session,
+            User,
+            UserDto,
+            cursor,
+            limit,
+            fields,
+            {User.user_id: user_id, User.email: email},
+        )
+
+    def stream_users(
+        self, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        logger.info("Streaming all users from DB")
+        return RowStreamUtil.stream_rows(
+            self.__db_session, User, UserDto, batch_size
+        )
 
     def process_users(self) -> None:
+        self.prepare_users_processing()
+        try:
+            for users_batch in self.__dummy_json_api.get_users():
+                users_dtos: List[UserDto] = self.transform_users_batch(users_batch)
+                inserted: int = self.load_users_batch(users_dtos).inserted
+                logger.debug(
+                    "Users batch processed: %d inserted, %d skipped",
+                    inserted,
+                    len(users_batch) - inserted,
+                )
+        finally:
+            self.finish_users_processing()
+
+    def prepare_users_processing(self, update_existing: bool = False) -> None:
+        self.finish_users_processing()
         FileUtil.clean_txt_file_before_processing(self.__USERS_TXT)
-        for users_batch in self.__dummy_json_api.get_users():
-            self.__process_single_batch_of_users(users_batch)
+        self.__users_index.load()
+        self.__update_existing = update_existing
+        if not update_existing:
+            # Only new users get loaded, so the dumps start with the ones already in
+            # the DB; a rescan loads every user again and starts them empty instead
+            self.__add_existing_users_to_txt()
 
-    def __process_single_batch_of_users(self, users: List[Dict[str, Any]]) -> None:
+    def transform_users_batch(self, users: List[Dict[str, Any]]) -> List[UserDto]:
+        emails: Set[str] = {user.get("email") for user in users if user.get("email")}
+        emails_to_load: Set[str] = (
+            emails
+            if self.__update_existing
+            else self.__users_index.filter_preloaded(emails)
+        )
+        new_users: Dict[str, Dict[str, Any]] = {}
+        without_email: int = 0
         for user in users:
             user_id: int = user.get("id")
-            logger.info(f"Processing user with ID: {user_id}")
-            is_user_in_db: bool = self.__is_user_in_db(user)
-            if not is_user_in_db:
-                logger.info(f"User with ID: {user_id} is not in DB, processing...")
-                country: str = self.__get_country_from_user(user)
-                user_dto: UserDto = UserDto(
-                    first_name=user.get("firstName"),
-                    last_name=user.get("lastName"),
-                    email=user.get("email"),
-                    age=user.get("age"),
-                    birth_date=user.get("birthDate"),
-                    street=user.get("address").get("address"),
-                    city=user.get("address").get("city"),
-                    country=country,
-                    user_id=user_id,
-                )
-                self.__add_user_to_db(user_dto)
-                self.__add_user_to_txt(user_dto)
+            email: str = user.get("email")
+            if not email:
+                without_email += 1
+                logger.debug("User with ID: %s has no email, skipping...", user_id)
+            elif email not in emails_to_load or email in new_users:
+                logger.debug("User with ID: %s already exists in DB, skipping...", user_id)
             else:
-                logger.info(
-                    f"User with ID: {user_id} already exists in DB, skipping..."
-                )
-
-    def __is_user_in_db(self, user: Dict[str, Any]) -> bool:
-        email: str = user.get("email")
-        if email:
-            with self.__db_session:
-                logger.info(f"Checking if user with email: {email} exists in DB")
-                count: int = (
-                    self.__db_session.query(User).filter(User.email == email).count()
-                )
+                new_users[email] = user
+        if without_email:
+            logger.warning("%d users without email skipped", without_email)
+        logger.info(
+            "Users batch transformed",
+            extra=log_fields(
+                records=len(users),
+                new=len(new_users),
+                skipped=len(users) - len(new_users) - without_email,
+                errors=without_email,
+            ),
+        )
 
-                return count > 0
-        else:
-            logger.warning("User email is None, skipping check")
-            return True
+        countries: List[str] = self.__get_countries_from_users(
+            list(new_users.values())
+        )
+        return [
+            UserDto(
+                first_name=user.get("firstName"),
+                last_name=user.get("lastName"),
+                email=user.get("email"),
+                age=user.get("age"),
+                birth_date=user.get("birthDate"),
+                street=user.get("address").get("address"),
+                city=user.get("address").get("city"),
+                country=country,
+                user_id=user.get("id"),
+            )
+            for user, country in zip(new_users.values(), countries)
+        ]
 
-    @staticmethod
-    def __get_country_from_user(user: Dict[str, Any]) -> str:
-        logger.info(
-            f"Processing country name by coordinates: {user.get('address').get('coordinates')}"
+    def load_users_batch(self, users_dtos: List[UserDto]) -> LoadResultDto:
+        existing_emails: Set[str] = set()
+        if self.__update_existing:
+            emails: Set[str] = {user_dto.email for user_dto in users_dtos}
+            existing_emails = emails - self.__users_index.filter_new(emails)
+        loaded_emails: Set[str] = self.__add_users_to_db(users_dtos)
+        self.__users_index.add(loaded_emails)
+        self.__add_users_to_txt(
+            [user_dto for user_dto in users_dtos if user_dto.email in loaded_emails]
         )
-        latitude: str = user.get("address").get("coordinates").get("lat")
-        longitude: str = user.get("address").get("coordinates").get("lng")
-        country: str = CoordinatesUtil.get_country_by_coordinates(latitude, longitude)
-        return country
-
-    def __add_user_to_db(self, user_dto: UserDto) -> None:
-        user_entity = User(
-            first_name=user_dto.first_name,
-            last_name=user_dto.last_name,
-            email=user_dto.email,
-            age=user_dto.age,
-            birth_date=user_dto.birth_date,
-            street=user_dto.street,
-            city=user_dto.city,
-            country=user_dto.country,
-            user_id=user_dto.user_id,
+
+        load_result: LoadResultDto = LoadResultDto(
+            inserted=len(loaded_emails - existing_emails),
+            updated=len(loaded_emails & existing_emails),
+            skipped=len(users_dtos) - len(loaded_emails),
         )
+        logger.info("Users batch loaded", extra=log_fields(**load_result.model_dump()))
+        return load_result
+
+    def finish_users_processing(self) -> None:
+        if self.__users_sink is not None:
+            self.__users_sink.close()
+            self.__users_sink = None
+
+    def __add_existing_users_to_txt(self) -> None:
+        for rows in RowStreamUtil.stream_rows(self.__db_session, User, UserDto):
+            self.__add_users_to_txt([UserDto(**row) for row in rows])
+
+    @staticmethod
+    def __get_countries_from_users(users: List[Dict[str, Any]]) -> List[str]:
+        if not users:
+            return []
+        logger.debug("Processing country names by coordinates for %d users", len(users))
+        coordinates: List[Tuple[Any, Any]] = []
+        for user in users:
+            user_coordinates: Dict[str, Any] = (
+                user.get("address", {}).get("coordinates") or {}
+            )
+            coordinates.append(
+                (user_coordinates.get("lat"), user_coordinates.get("lng"))
+            )
+        return CoordinatesUtil.get_countries_by_coordinates(coordinates)
 
+    def __add_users_to_db(self, users_dtos: List[UserDto]) -> Set[str]:
+        if not users_dtos:
+            return set()
         with self.__db_session:
-            logger.info(f"Adding user to DB: {user_entity}")
-            self.__db_session.add(user_entity)
+            logger.debug("Adding %d users to DB", len(users_dtos))
+            write = (
+                BulkInsertUtil.upsert
+                if self.__update_existing
+                else BulkInsertUtil.insert_ignoring_duplicates
+            )
+            loaded_emails: Set[str] = write(
+                self.__db_session,
+                User,
+                [user_dto.model_dump() for user_dto in users_dtos],
+                User.email,
+            )
             self.__db_session.commit()
+            return loaded_emails
 
-    def __add_user_to_txt(self, user_dto: UserDto) -> None:
-        logger.info(f"Adding user to the txt file: {user_dto}")
-        FileUtil.save_result_to_txt_file(self.__USERS_TXT, user_dto)
+    def __add_users_to_txt(self, users_dtos: List[UserDto]) -> None:
+        if not users_dtos:
+            return
+        logger.debug("Adding %d users to the txt file", len(users_dtos))
+        if self.__users_sink is None:
+            self.__users_sink = ResultSink(self.__USERS_TXT)
+        self.__users_sink.write_all(users_dtos)
+        self.__users_sink.flush()
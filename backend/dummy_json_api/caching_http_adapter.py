@@ -0,0 +1,98 @@
+import time
+from typing import Any, Optional
+
+import requests
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from backend.common.utils.http_page_cache import CachedPage, HttpPageCache
+from backend.common.utils.metrics import metrics
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    # Set on responses served from the cache, to "hit" or "revalidated", and to the
+    # seconds the page took to fetch when it was stored
+    CACHE_HEADER: str = "X-Page-Cache"
+    ELAPSED_HEADER: str = "X-Page-Cache-Elapsed"
+    __HIT: str = "hit"
+    __REVALIDATED: str = "revalidated"
+    __REQUESTS: str = "etl_api_cache_requests_total"
+
+    def __init__(
+        self,
+        page_cache: HttpPageCache,
+        offline: bool = False,
+        max_age: float = 0.0,
+        **kwargs: Any,
+    ):
+        # Cached pages younger than max_age seconds are served as they are, older
+        # ones are revalidated with If-None-Match / If-Modified-Since. Offline,
+        # every cached page is served and anything else fails without a request.
+        super().__init__(**kwargs)
+        self.__page_cache: HttpPageCache = page_cache
+        self.__offline: bool = offline
+        self.__max_age: float = max_age
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+        url: str = request.url
+        cached_page: Optional[CachedPage] = self.__page_cache.get(url)
+        if cached_page is not None and (
+            self.__offline or time.time() - cached_page.stored_at < self.__max_age
+        ):
+            return self.__replay(request, cached_page, self.__HIT)
+        if self.__offline:
+            self.__page_cache.record_miss()
+            metrics.increment(self.__REQUESTS, result="offline_miss")
+            raise requests.ConnectionError(
+                f"{url} is not in the DummyJSON page cache and the API is offline",
+                request=request,
+            )
+
+        if cached_page is not None:
+            if cached_page.etag:
+                request.headers["If-None-Match"] = cached_page.etag
+            if cached_page.last_modified:
+                request.headers["If-Modified-Since"] = cached_page.last_modified
+        started: float = time.perf_counter()
+        response: Response = super().send(request, **kwargs)
+        if response.status_code == 304 and cached_page is not None:
+            response.close()
+            return self.__replay(request, cached_page, self.__REVALIDATED)
+
+        self.__page_cache.record_miss()
+        metrics.increment(self.__REQUESTS, result="miss")
+        if response.status_code == 200:
+            self.__page_cache.put(
+                url,
+                response.content,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                time.perf_counter() - started,
+            )
+        return response
+
+    def __replay(
+        self, request: PreparedRequest, cached_page: CachedPage, result: str
+    ) -> Response:
+        self.__page_cache.record_hit(request.url, revalidated=result == self.__REVALIDATED)
+        metrics.increment(self.__REQUESTS, result=result)
+        response: Response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        response.headers = CaseInsensitiveDict(
+            {
+                "Content-Type": "application/json",
+                "Content-Length": str(len(cached_page.body)),
+                self.CACHE_HEADER: result,
+                self.ELAPSED_HEADER: repr(cached_page.elapsed),
+            }
+        )
+        response._content = cached_page.body
+        response._content_consumed = True
+        return response
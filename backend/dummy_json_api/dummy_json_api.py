@@ -1,9 +1,19 @@
-from typing import Any, Dict, Generator, List
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Generator, List, Optional, Tuple
 
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from backend.common.utils.http_page_cache import HttpPageCache
+from backend.common.utils.json_stream_util import JsonStreamUtil
 from backend.common.utils.logger import logger
+from backend.common.utils.metrics import metrics
+from backend.dummy_json_api.caching_http_adapter import CachingHTTPAdapter
 from backend.interfaces.dummy_json_api_interface import DummyJSONApiInterface
 
 
@@ -11,35 +21,228 @@ class DummyJSONApi(DummyJSONApiInterface):
     __USERS: str = "users"
     __CARTS: str = "carts"
     __PRODUCTS: str = "products"
-    __USERS_URL: str = f"https://dummyjson.com/{__USERS}"
-    __CARTS_URL: str = f"https://dummyjson.com/{__CARTS}"
-    __PRODUCTS_URL: str = f"https://dummyjson.com/{__PRODUCTS}"
-    __batch_size: int = 10
+    __BASE_URL: str = "https://dummyjson.com"
+    __RETRY_STATUSES: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    __RESOURCES_COUNT: int = 3
+    __STREAM_CHUNK_SIZE: int = 64 * 1024
 
-    def get_users(self) -> Generator[List[Dict[str, Any]], None, None]:
-        return self.__fetch_data(self.__USERS_URL, self.__USERS)
+    def __init__(
+        self,
+        base_url: str = __BASE_URL,
+        max_workers: int = 1,
+        page_size: int = 10,
+        max_page_size: int = 100,
+        target_latency: float = 0.5,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        page_cache: Optional[HttpPageCache] = None,
+        offline: bool = False,
+        cache_max_age: float = 0.0,
+        stream_pages: bool = False,
+    ):
+        # With a page cache every page is stored on disk and revalidated on the next
+        # request, pages younger than cache_max_age seconds are not revalidated at all.
+        # offline serves only from the cache. stream_pages decodes every page while
+        # it is read off the socket instead of parsing the whole body at once.
+        if offline and page_cache is None:
+            raise ValueError("Offline mode needs a page cache to serve from")
+        self.__users_url: str = f"{base_url}/{self.__USERS}"
+        self.__carts_url: str = f"{base_url}/{self.__CARTS}"
+        self.__products_url: str = f"{base_url}/{self.__PRODUCTS}"
+        self.__max_workers: int = max_workers
+        self.__page_size: int = page_size
+        self.__max_page_size: int = max_page_size
+        self.__target_latency: float = target_latency
+        self.__stream_pages: bool = stream_pages
+        self.__session: requests.Session = self.__create_session(
+            max_workers, max_retries, backoff_factor, page_cache, offline, cache_max_age
+        )
 
-    def get_carts(self) -> Generator[List[Dict[str, Any]], None, None]:
-        return self.__fetch_data(self.__CARTS_URL, self.__CARTS)
+    def get_users(
+        self, skip: int = 0
+    ) -> Generator[List[Dict[str, Any]], None, None]:
+        return self.__fetch_data(self.__users_url, self.__USERS, skip)
+
+    def get_carts(
+        self, skip: int = 0
+    ) -> Generator[List[Dict[str, Any]], None, None]:
+        return self.__fetch_data(self.__carts_url, self.__CARTS, skip)
+
+    def get_products(
+        self, skip: int = 0
+    ) -> Generator[List[Dict[str, Any]], None, None]:
+        return self.__fetch_data(self.__products_url, self.__PRODUCTS, skip)
 
-    def get_products(self) -> Generator[List[Dict[str, Any]], None, None]:
-        return self.__fetch_data(self.__PRODUCTS_URL, self.__PRODUCTS)
+    def close(self) -> None:
+        self.__session.close()
+
+    def __create_session(
+        self,
+        max_workers: int,
+        max_retries: int,
+        backoff_factor: float,
+        page_cache: Optional[HttpPageCache],
+        offline: bool,
+        cache_max_age: float,
+    ) -> requests.Session:
+        # Retries happen per request inside the adapter, so a failing page is
+        # retried on its own and pages that already succeeded are never fetched again.
+        retry: Retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.__RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}),
+        )
+        # Users, carts and products may be fetched at the same time, each with its
+        # own set of workers, so the pool keeps a connection for every one of them.
+        pool_maxsize: int = max(max_workers, 1) * self.__RESOURCES_COUNT
+        adapter: HTTPAdapter = (
+            CachingHTTPAdapter(
+                page_cache,
+                offline,
+                cache_max_age,
+                pool_connections=1,
+                pool_maxsize=pool_maxsize,
+                max_retries=retry,
+            )
+            if page_cache is not None
+            else HTTPAdapter(
+                pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry
+            )
+        )
+        session: requests.Session = requests.Session()
+        session.verify = False
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     def __fetch_data(
-        self, url: str, data_name: str
+        self, url: str, data_name: str, skip: int = 0
     ) -> Generator[List[Dict[str, Any]], None, None]:
-        skip: int = 0
+        page_size: int = self.__page_size
+        max_page_size: int = self.__max_page_size
         logger.info(f"Fetching {data_name} from DummyJSON API")
         while True:
-            params: Dict[str, int] = {"limit": self.__batch_size, "skip": skip}
-            response: Response = requests.get(url, verify=False, params=params)
-            response.raise_for_status()
-            data_batch: dict = response.json()
+            data_batch, elapsed = self.__fetch_page(url, data_name, skip, page_size)
+            records: List[Dict[str, Any]] = data_batch.get(data_name)
 
-            if not data_batch.get(data_name):
+            if not records:
                 logger.info(f"No more {data_name} to process.")
-                break
+                return
+
+            yield records
+            skip += len(records)
+            total: int | None = data_batch.get("total")
+            if total is not None and skip >= total:
+                logger.info(f"All {total} {data_name} fetched.")
+                return
+
+            if len(records) < page_size:
+                # The server capped the page below what we asked for
+                max_page_size = len(records)
+            next_page_size: int = self.__adapt_page_size(
+                page_size, max_page_size, elapsed
+            )
+            is_page_size_settled: bool = next_page_size <= page_size
+            if self.__max_workers > 1 and total is not None and is_page_size_settled:
+                # Page size settled, fan out the rest of the pages. next_page_size is
+                # already capped to what the server returns, so no records fall
+                # between the pages when the server caps the limit.
+                yield from self.__fetch_remaining_concurrently(
+                    url, data_name, skip, total, next_page_size
+                )
+                return
+            page_size = next_page_size
+            logger.debug("Taking next batch with skip: %d, limit: %d", skip, page_size)
+
+    def __adapt_page_size(
+        self, page_size: int, max_page_size: int, elapsed: float
+    ) -> int:
+        next_page_size: int = page_size
+        if elapsed < self.__target_latency:
+            next_page_size = page_size * 2
+        elif elapsed > self.__target_latency * 2:
+            next_page_size = max(self.__page_size, page_size // 2)
+        # Never ask for more than the server was seen to return in one page
+        return min(next_page_size, max_page_size) if max_page_size else next_page_size
+
+    def __fetch_remaining_concurrently(
+        self, url: str, data_name: str, skip: int, total: int, page_size: int
+    ) -> Generator[List[Dict[str, Any]], None, None]:
+        logger.info(
+            f"Fetching remaining {total - skip} {data_name} "
+            f"with {self.__max_workers} workers and limit: {page_size}"
+        )
+        skips = iter(range(skip, total, page_size))
+        # Keep a bounded window of in-flight pages and hand them out in skip order,
+        # so consumers see exactly the same sequence of batches as the sequential mode.
+        window: int = self.__max_workers * 2
+        executor = ThreadPoolExecutor(max_workers=self.__max_workers)
+        try:
+            pending: Deque[Future] = deque(
+                executor.submit(
+                    self.__fetch_page, url, data_name, next_skip, page_size
+                )
+                for next_skip in islice(skips, window)
+            )
+            while pending:
+                data_batch, _ = pending.popleft().result()
+                next_skip: int | None = next(skips, None)
+                if next_skip is not None:
+                    pending.append(
+                        executor.submit(
+                            self.__fetch_page, url, data_name, next_skip, page_size
+                        )
+                    )
+
+                if not data_batch.get(data_name):
+                    break
+                yield data_batch.get(data_name)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"No more {data_name} to process.")
+
+    def __fetch_page(
+        self, url: str, data_name: str, skip: int, page_size: int
+    ) -> Tuple[Dict[str, Any], float]:
+        params: Dict[str, int] = {"limit": page_size, "skip": skip}
+        logger.debug("Fetching page from %s with params: %s", url, params)
+        started: float = time.perf_counter()
+        data_batch: Dict[str, Any]
+        body_bytes: int
+        if self.__stream_pages:
+            response: Response = self.__session.get(url, params=params, stream=True)
+            response.raise_for_status()
+            data_batch, body_bytes = self.__decode_streamed(response, data_name)
+        else:
+            response = self.__session.get(url, params=params)
+            response.raise_for_status()
+            data_batch, body_bytes = response.json(), len(response.content)
+        elapsed: float = time.perf_counter() - started
+        metrics.observe("etl_api_page_seconds", elapsed, resource=data_name)
+        if CachingHTTPAdapter.CACHE_HEADER in response.headers:
+            # Adapt the page size to the fetch time recorded with the cached page, so
+            # a replay asks for the same pages as the run that stored them
+            elapsed = float(response.headers[CachingHTTPAdapter.ELAPSED_HEADER])
+        metrics.increment("etl_api_page_bytes_total", body_bytes, resource=data_name)
+        metrics.increment(
+            "etl_api_records_total", len(data_batch.get(data_name) or ()), resource=data_name
+        )
+        return data_batch, elapsed
+
+    def __decode_streamed(
+        self, response: Response, data_name: str
+    ) -> Tuple[Dict[str, Any], int]:
+        # Same dict as response.json(), built record by record from the chunks. The
+        # whole body is never held, only the decoded records of the page.
+        body_bytes: int = 0
+
+        def read_chunks() -> Generator[bytes, None, None]:
+            nonlocal body_bytes
+            for chunk in response.iter_content(self.__STREAM_CHUNK_SIZE):
+                body_bytes += len(chunk)
+                yield chunk
 
-            yield data_batch.get(data_name)
-            logger.info(f"Taking next batch with params: {params}!!!")
-            skip += self.__batch_size
+        with response:
+            data_batch: Dict[str, Any] = JsonStreamUtil.load_object(read_chunks(), data_name)
+        return data_batch, body_bytes
@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 
 from backend.common.models.cart_dto import CartDto
+from backend.common.models.cart_with_products_dto import CartWithProductsDto
+from backend.common.models.load_result_dto import LoadResultDto
+from backend.common.models.page_dto import PageDto
 
 
 class CartServiceInterface(ABC):
@@ -9,6 +12,41 @@ class CartServiceInterface(ABC):
     def process_carts(self) -> None:
         pass
 
+    @abstractmethod
+    def prepare_carts_processing(self, update_existing: bool = False) -> None:
+        pass
+
+    @abstractmethod
+    def transform_carts_batch(
+        self, carts: List[Dict[str, Any]]
+    ) -> List[CartWithProductsDto]:
+        pass
+
+    @abstractmethod
+    def load_carts_batch(self, carts_dtos: List[CartWithProductsDto]) -> LoadResultDto:
+        pass
+
+    @abstractmethod
+    def finish_carts_processing(self) -> None:
+        pass
+
     @abstractmethod
     def get_all_carts(self) -> List[CartDto]:
         pass
+
+    @abstractmethod
+    def get_carts_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        cart_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ) -> PageDto:
+        pass
+
+    @abstractmethod
+    def stream_carts(
+        self, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        pass
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterable, List
 
 from backend.common.models.most_ordered_category_dto import MostOrderedCategoryDto
 
@@ -8,3 +8,17 @@ class CategoryServiceInterface(ABC):
     @abstractmethod
     def get_most_ordered_category(self) -> List[MostOrderedCategoryDto]:
         pass
+
+    @abstractmethod
+    def has_category_totals(self) -> bool:
+        pass
+
+    @abstractmethod
+    def add_to_category_totals(self, cart_ids: Iterable[int]) -> None:
+        pass
+
+    @abstractmethod
+    def refresh_most_ordered_categories(
+        self, rebuild_totals: bool = False
+    ) -> List[MostOrderedCategoryDto]:
+        pass
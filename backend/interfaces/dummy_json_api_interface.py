@@ -4,13 +4,19 @@ from typing import Any, Dict, Generator, List
 
 class DummyJSONApiInterface(ABC):
     @abstractmethod
-    def get_users(self) -> Generator[List[Dict[str, Any]], None, None]:
+    def get_users(
+        self, skip: int = 0
+    ) -> Generator[List[Dict[str, Any]], None, None]:
         pass
 
     @abstractmethod
-    def get_carts(self) -> Generator[List[Dict[str, Any]], None, None]:
+    def get_carts(
+        self, skip: int = 0
+    ) -> Generator[List[Dict[str, Any]], None, None]:
         pass
 
     @abstractmethod
-    def get_products(self) -> Generator[List[Dict[str, Any]], None, None]:
+    def get_products(
+        self, skip: int = 0
+    ) -> Generator[List[Dict[str, Any]], None, None]:
         pass
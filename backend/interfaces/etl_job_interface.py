@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from backend.common.models.etl_status_dto import EtlStatusDto
+
+
+class EtlJobInterface(ABC):
+    @abstractmethod
+    def start(self, full_refresh: bool = False, profile: Optional[str] = None) -> bool:
+        pass
+
+    @abstractmethod
+    def get_status(self) -> EtlStatusDto:
+        pass
+
+    @abstractmethod
+    def shutdown(self) -> None:
+        pass
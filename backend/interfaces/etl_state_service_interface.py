@@ -0,0 +1,14 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from backend.common.models.etl_state_dto import EtlStateDto
+
+
+class EtlStateServiceInterface(ABC):
+    @abstractmethod
+    def get_state(self, resource: str) -> Optional[EtlStateDto]:
+        pass
+
+    @abstractmethod
+    def save_state(self, etl_state_dto: EtlStateDto) -> None:
+        pass
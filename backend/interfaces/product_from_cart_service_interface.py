@@ -1,15 +1,52 @@
 from abc import ABC, abstractmethod
-from typing import Any, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
 from backend.common.models.cart_dto import CartDto
+from backend.common.models.load_result_dto import LoadResultDto
+from backend.common.models.page_dto import PageDto
 from backend.common.models.product_from_cart_dto import ProductFromCartDto
 
 
 class ProductFromCartServiceInterface(ABC):
     @abstractmethod
-    def process_products_from_carts(self, cart: Any, cart_dto: CartDto) -> None:
+    def transform_products_from_cart(
+        self, cart: Dict[str, Any], cart_dto: CartDto
+    ) -> List[ProductFromCartDto]:
+        pass
+
+    @abstractmethod
+    def prepare_products_from_carts_processing(self, update_existing: bool = False) -> None:
+        pass
+
+    @abstractmethod
+    def load_products_from_carts(
+        self,
+        products_from_carts_dtos: List[ProductFromCartDto],
+        replaced_cart_ids: Iterable[int] = (),
+    ) -> LoadResultDto:
+        pass
+
+    @abstractmethod
+    def finish_products_from_carts_processing(self) -> None:
         pass
 
     @abstractmethod
     def get_bought_products_from_carts(self) -> List[ProductFromCartDto]:
         pass
+
+    @abstractmethod
+    def get_bought_products_from_carts_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        cart_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+    ) -> PageDto:
+        pass
+
+    @abstractmethod
+    def stream_bought_products_from_carts(
+        self, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        pass
@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from backend.common.models.load_result_dto import LoadResultDto
+from backend.common.models.page_dto import PageDto
+from backend.common.models.product_dto import ProductDto
 
 
 class ProductServiceInterface(ABC):
@@ -6,6 +11,39 @@ class ProductServiceInterface(ABC):
     def process_products(self) -> None:
         pass
 
+    @abstractmethod
+    def prepare_products_processing(self, update_existing: bool = False) -> None:
+        pass
+
+    @abstractmethod
+    def transform_products_batch(self, products: list) -> List[ProductDto]:
+        pass
+
+    @abstractmethod
+    def load_products_batch(self, products_dtos: List[ProductDto]) -> LoadResultDto:
+        pass
+
+    @abstractmethod
+    def finish_products_processing(self) -> None:
+        pass
+
     @abstractmethod
     def get_all_products(self):
         pass
+
+    @abstractmethod
+    def get_products_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        product_id: Optional[int] = None,
+        category: Optional[str] = None,
+    ) -> PageDto:
+        pass
+
+    @abstractmethod
+    def stream_products(
+        self, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        pass
@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from backend.common.models.load_result_dto import LoadResultDto
+from backend.common.models.page_dto import PageDto
+from backend.common.models.user_dto import UserDto
 
 
 class UserServiceInterface(ABC):
@@ -6,6 +11,39 @@ class UserServiceInterface(ABC):
     def process_users(self) -> None:
         pass
 
+    @abstractmethod
+    def prepare_users_processing(self, update_existing: bool = False) -> None:
+        pass
+
+    @abstractmethod
+    def transform_users_batch(self, users: List[Dict[str, Any]]) -> List[UserDto]:
+        pass
+
+    @abstractmethod
+    def load_users_batch(self, users_dtos: List[UserDto]) -> LoadResultDto:
+        pass
+
+    @abstractmethod
+    def finish_users_processing(self) -> None:
+        pass
+
     @abstractmethod
     def get_all_users(self):
         pass
+
+    @abstractmethod
+    def get_users_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        user_id: Optional[int] = None,
+        email: Optional[str] = None,
+    ) -> PageDto:
+        pass
+
+    @abstractmethod
+    def stream_users(
+        self, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        pass
@@ -0,0 +1,156 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from backend.common.models.etl_status_dto import EtlStatusDto
+from backend.common.models.metric_sample_dto import MetricSampleDto
+from backend.common.utils.file_util import FileUtil
+from backend.common.utils.logger import log_fields, logger
+from backend.common.utils.metrics import SampleKey, metrics
+from backend.common.utils.profiling_util import ProfilingUtil
+from backend.common.utils.response_cache import ResponseCache
+from backend.database.sqlite_database import create_tables
+from backend.interfaces.etl_job_interface import EtlJobInterface
+from backend.pipeline.etl_orchestrator import EtlOrchestrator
+
+OrchestratorFactory = Callable[[Session, bool], EtlOrchestrator]
+
+
+class EtlJob(EtlJobInterface):
+    __IDLE: str = "idle"
+    __RUNNING: str = "running"
+    __SUCCEEDED: str = "succeeded"
+    __FAILED: str = "failed"
+
+    def __init__(
+        self,
+        engine: Engine,
+        orchestrator_factory: OrchestratorFactory,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        self.__engine: Engine = engine
+        self.__orchestrator_factory: OrchestratorFactory = orchestrator_factory
+        self.__response_cache: Optional[ResponseCache] = response_cache
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="etl-job"
+        )
+        self.__lock: threading.Lock = threading.Lock()
+        self.__future: Optional[Future] = None
+        self.__orchestrator: Optional[EtlOrchestrator] = None
+        self.__status: EtlStatusDto = EtlStatusDto(status=self.__IDLE)
+
+    def start(self, full_refresh: bool = False, profile: Optional[str] = None) -> bool:
+        # profile is one of ProfilingUtil.MODES, an unknown mode raises ValueError
+        profile = ProfilingUtil.validate_mode(profile)
+        with self.__lock:
+            if self.__future is not None and not self.__future.done():
+                logger.info("ETL run already in progress, not starting another one")
+                return False
+            self.__orchestrator = None
+            self.__status = EtlStatusDto(
+                status=self.__RUNNING,
+                full_refresh=full_refresh,
+                started_at=datetime.now(timezone.utc),
+            )
+            self.__future = self.__executor.submit(self.__run, full_refresh, profile)
+            return True
+
+    def get_status(self) -> EtlStatusDto:
+        with self.__lock:
+            status: EtlStatusDto = self.__status.model_copy()
+            orchestrator: Optional[EtlOrchestrator] = self.__orchestrator
+        if orchestrator is not None:
+            status.resources = orchestrator.get_progress()
+        return status
+
+    def wait(self, timeout: Optional[float] = None) -> EtlStatusDto:
+        with self.__lock:
+            future: Optional[Future] = self.__future
+        if future is not None:
+            future.result(timeout)
+        return self.get_status()
+
+    def shutdown(self) -> None:
+        with self.__lock:
+            orchestrator: Optional[EtlOrchestrator] = self.__orchestrator
+        if orchestrator is not None:
+            orchestrator.stop()
+        self.__executor.shutdown(wait=True, cancel_futures=True)
+
+    def __run(self, full_refresh: bool, profile: Optional[str]) -> None:
+        snapshot: Dict[SampleKey, float] = metrics.snapshot()
+        error, profile_path = ProfilingUtil.run_profiled(
+            partial(self.__load, full_refresh), profile, "etl-run"
+        )
+
+        # Only once the run has committed do readers see new data, so that is when
+        # the cached responses of the previous data become stale
+        if error is None and self.__response_cache is not None:
+            self.__response_cache.bump_generation()
+
+        run_metrics: List[MetricSampleDto] = metrics.samples_since(snapshot)
+        with self.__lock:
+            self.__status = self.__status.model_copy(
+                update={
+                    "status": self.__FAILED if error else self.__SUCCEEDED,
+                    "finished_at": datetime.now(timezone.utc),
+                    "error": error,
+                    "profile_path": profile_path,
+                    "metrics": run_metrics,
+                }
+            )
+            status: EtlStatusDto = self.__status
+        logger.info(
+            "ETL run finished",
+            extra=log_fields(
+                status=status.status,
+                seconds=round((status.finished_at - status.started_at).total_seconds(), 3),
+                error=error,
+                profile=profile_path,
+            ),
+        )
+        logger.info(
+            "ETL run metrics",
+            extra=log_fields(
+                **{self.__sample_key(sample): sample.value for sample in run_metrics}
+            ),
+        )
+
+    @staticmethod
+    def __sample_key(sample: MetricSampleDto) -> str:
+        labels: str = ",".join(f"{key}={value}" for key, value in sample.labels.items())
+        return f"{sample.name}{{{labels}}}" if labels else sample.name
+
+    def __load(self, full_refresh: bool) -> Optional[str]:
+        # The whole run is one transaction; the services' per-batch commits only
+        # release savepoints. Readers keep seeing the last completed run until it
+        # commits, and a failed run leaves the previous data untouched. The txt dumps
+        # and exports are staged the same way and only replace the published ones
+        # once the transaction has committed.
+        FileUtil.start_staging()
+        try:
+            with self.__engine.connect() as connection, connection.begin():
+                etl_session: Session = Session(
+                    bind=connection, join_transaction_mode="create_savepoint"
+                )
+                try:
+                    create_tables(full_refresh, connection)
+                    orchestrator: EtlOrchestrator = self.__orchestrator_factory(
+                        etl_session, full_refresh
+                    )
+                    with self.__lock:
+                        self.__orchestrator = orchestrator
+                    orchestrator.run()
+                finally:
+                    etl_session.close()
+        except Exception as e:
+            FileUtil.discard_staged_files()
+            logger.error(f"ETL run failed, keeping the previous data: {e}")
+            return str(e)
+        FileUtil.publish_staged_files()
+        return None
@@ -0,0 +1,226 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from backend.common.models.etl_resource_status_dto import EtlResourceStatusDto
+from backend.common.models.etl_state_dto import EtlStateDto
+from backend.common.models.stage_metrics_dto import StageMetricsDto
+from backend.common.utils.logger import logger
+from backend.interfaces.cart_service_interface import CartServiceInterface
+from backend.interfaces.category_service_interface import CategoryServiceInterface
+from backend.interfaces.dummy_json_api_interface import DummyJSONApiInterface
+from backend.interfaces.etl_state_service_interface import EtlStateServiceInterface
+from backend.interfaces.product_service_interface import ProductServiceInterface
+from backend.interfaces.user_service_interface import UserServiceInterface
+from backend.pipeline.etl_pipeline import EtlPipeline
+from backend.pipeline.incremental_source import Batch, IncrementalSource
+
+
+class EtlOrchestrator:
+    __USERS: str = "users"
+    __PRODUCTS: str = "products"
+    __CARTS: str = "carts"
+    __PENDING: str = "pending"
+    __RUNNING: str = "running"
+    __LOADED: str = "loaded"
+    __FAILED: str = "failed"
+
+    def __init__(
+        self,
+        dummy_json_api: DummyJSONApiInterface,
+        user_service: UserServiceInterface,
+        cart_service: CartServiceInterface,
+        product_service: ProductServiceInterface,
+        etl_state_service: EtlStateServiceInterface,
+        full_refresh: bool = True,
+        queue_size: int = 4,
+        category_service: Optional[CategoryServiceInterface] = None,
+    ):
+        self.__dummy_json_api: DummyJSONApiInterface = dummy_json_api
+        self.__user_service: UserServiceInterface = user_service
+        self.__cart_service: CartServiceInterface = cart_service
+        self.__product_service: ProductServiceInterface = product_service
+        self.__etl_state_service: EtlStateServiceInterface = etl_state_service
+        self.__full_refresh: bool = full_refresh
+        self.__queue_size: int = queue_size
+        self.__category_service: Optional[CategoryServiceInterface] = category_service
+        self.__pipelines: List[EtlPipeline] = []
+        self.__stopped: threading.Event = threading.Event()
+        self.__statuses: Dict[str, str] = {
+            resource: self.__PENDING
+            for resource in (self.__USERS, self.__PRODUCTS, self.__CARTS)
+        }
+
+    def run(self) -> List[StageMetricsDto]:
+        mode: str = "full refresh" if self.__full_refresh else "incremental"
+        logger.info(f"Starting {mode} ETL run")
+        sources: List[IncrementalSource] = [
+            self.__open_source(self.__USERS, self.__dummy_json_api.get_users),
+            self.__open_source(self.__PRODUCTS, self.__dummy_json_api.get_products),
+            self.__open_source(self.__CARTS, self.__dummy_json_api.get_carts),
+        ]
+        users, products, carts = sources
+        self.__prepare_services(users, products, carts)
+        rebuild_category_totals: bool = self.__should_rebuild_category_totals(
+            products, carts
+        )
+
+        # Set once a resource is loaded, the next one in FK order waits for it
+        loaded_events: List[threading.Event] = [threading.Event() for _ in sources]
+        self.__pipelines = pipelines = self.__build_pipelines(sources, loaded_events)
+        finishes: List[Callable[[], None]] = [
+            self.__user_service.finish_users_processing,
+            self.__product_service.finish_products_processing,
+            self.__cart_service.finish_carts_processing,
+        ]
+        for pipeline in pipelines:
+            pipeline.start()
+            self.__statuses[pipeline.name] = self.__RUNNING
+
+        try:
+            metrics: List[StageMetricsDto] = self.__load_in_order(
+                pipelines, sources, finishes, loaded_events
+            )
+            if self.__category_service is not None:
+                self.__category_service.refresh_most_ordered_categories(
+                    rebuild_totals=rebuild_category_totals
+                )
+        except BaseException:
+            self.__abort(pipelines, finishes)
+            raise
+        return metrics
+
+    def stop(self) -> None:
+        self.__stopped.set()
+        for pipeline in self.__pipelines:
+            pipeline.stop()
+
+    def get_progress(self) -> List[EtlResourceStatusDto]:
+        progress: List[EtlResourceStatusDto] = []
+        metrics: Dict[str, List[StageMetricsDto]] = {
+            pipeline.name: pipeline.get_metrics() for pipeline in self.__pipelines
+        }
+        for resource, status in self.__statuses.items():
+            extract, _, load = metrics.get(resource) or (None, None, None)
+            progress.append(
+                EtlResourceStatusDto(
+                    resource=resource,
+                    status=status,
+                    extracted_records=extract.records if extract else 0,
+                    loaded_records=load.records if load else 0,
+                )
+            )
+        return progress
+
+    def __open_source(
+        self, resource: str, fetch: Callable[[int], Iterable[Batch]]
+    ) -> IncrementalSource:
+        state: Optional[EtlStateDto] = None
+        if not self.__full_refresh:
+            state = self.__etl_state_service.get_state(resource)
+        source: IncrementalSource = IncrementalSource(resource, fetch, state)
+        source.open()
+        return source
+
+    def __prepare_services(
+        self, users: IncrementalSource, products: IncrementalSource, carts: IncrementalSource
+    ) -> None:
+        # Indexes are loaded up front through the shared session, before any stage runs.
+        # A resource re-read from the start after a change upserts the existing rows.
+        self.__user_service.prepare_users_processing(
+            update_existing=users.is_rescan
+        )
+        self.__product_service.prepare_products_processing(
+            update_existing=products.is_rescan
+        )
+        self.__cart_service.prepare_carts_processing(
+            update_existing=carts.is_rescan
+        )
+
+    def __should_rebuild_category_totals(
+        self, products: IncrementalSource, carts: IncrementalSource
+    ) -> bool:
+        # Totals missing at the start (e.g. a database from before they existed) cannot
+        # be topped up per batch and are recomputed from all carts at the end instead
+        return (
+            not carts.is_resumed
+            or carts.is_rescan
+            or products.is_rescan
+            or (
+                self.__category_service is not None
+                and not self.__category_service.has_category_totals()
+            )
+        )
+
+    def __build_pipelines(
+        self, sources: List[IncrementalSource], loaded_events: List[threading.Event]
+    ) -> List[EtlPipeline]:
+        # All three resources are extracted and transformed at the same time. Loads
+        # follow the FK order users -> products -> carts (and their products), so the
+        # later pipelines spill their transformed batches to disk until their turn
+        # comes; their queues stay as bounded as the users' ones.
+        users, products, carts = sources
+        users_loaded, products_loaded, _ = loaded_events
+        return [
+            EtlPipeline(
+                self.__USERS,
+                users.extract,
+                self.__user_service.transform_users_batch,
+                self.__user_service.load_users_batch,
+                self.__queue_size,
+            ),
+            EtlPipeline(
+                self.__PRODUCTS,
+                products.extract,
+                self.__product_service.transform_products_batch,
+                self.__product_service.load_products_batch,
+                self.__queue_size,
+                load_gate=users_loaded,
+            ),
+            EtlPipeline(
+                self.__CARTS,
+                carts.extract,
+                self.__cart_service.transform_carts_batch,
+                self.__cart_service.load_carts_batch,
+                self.__queue_size,
+                load_gate=products_loaded,
+            ),
+        ]
+
+    def __load_in_order(
+        self,
+        pipelines: List[EtlPipeline],
+        sources: List[IncrementalSource],
+        finishes: List[Callable[[], None]],
+        loaded_events: List[threading.Event],
+    ) -> List[StageMetricsDto]:
+        metrics: List[StageMetricsDto] = []
+        for pipeline, source, finish, loaded in zip(
+            pipelines, sources, finishes, loaded_events
+        ):
+            metrics += pipeline.join()
+            finish()
+            if self.__stopped.is_set():
+                raise RuntimeError("ETL run stopped before all loads finished")
+            # The high-water mark only moves once everything before it is loaded
+            self.__etl_state_service.save_state(source.state)
+            self.__statuses[pipeline.name] = self.__LOADED
+            loaded.set()
+        return metrics
+
+    def __abort(
+        self, pipelines: List[EtlPipeline], finishes: List[Callable[[], None]]
+    ) -> None:
+        logger.error("ETL run failed, stopping the remaining pipelines")
+        for resource, status in self.__statuses.items():
+            if status != self.__LOADED:
+                self.__statuses[resource] = self.__FAILED
+        for pipeline in pipelines:
+            pipeline.stop()
+        for pipeline in pipelines:
+            try:
+                pipeline.join()
+            except Exception as e:
+                # The error that failed the run is already on its way up
+                logger.error(f"{pipeline.name} pipeline failed while stopping: {e}")
+        for finish in finishes:
+            finish()
@@ -0,0 +1,233 @@
+import pickle
+import tempfile
+import threading
+import time
+from queue import Empty, Full, Queue
+from typing import IO, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from backend.common.models.stage_metrics_dto import StageMetricsDto
+from backend.common.utils.logger import log_fields, logger
+
+
+class _StageMetrics:
+    def __init__(self, pipeline: str, stage: str):
+        self.pipeline: str = pipeline
+        self.stage: str = stage
+        self.batches: int = 0
+        self.records: int = 0
+        self.busy_seconds: float = 0.0
+        self.started: float = 0.0
+        self.finished: float = 0.0
+        self.queue_depth_samples: int = 0
+        self.queue_depth_total: int = 0
+        self.max_queue_depth: int = 0
+
+    def record_batch(self, batch: Any, busy_seconds: float) -> None:
+        self.batches += 1
+        self.records += len(batch) if hasattr(batch, "__len__") else 1
+        self.busy_seconds += busy_seconds
+
+    def record_queue_depth(self, depth: int) -> None:
+        self.queue_depth_samples += 1
+        self.queue_depth_total += depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def to_dto(self) -> StageMetricsDto:
+        # A stage still running reports its wall time so far
+        finished: float = self.finished or time.perf_counter()
+        return StageMetricsDto(
+            pipeline=self.pipeline,
+            stage=self.stage,
+            batches=self.batches,
+            records=self.records,
+            busy_seconds=round(self.busy_seconds, 6),
+            wall_seconds=round(finished - self.started, 6) if self.started else 0.0,
+            records_per_second=(
+                round(self.records / self.busy_seconds, 2) if self.busy_seconds else 0.0
+            ),
+            max_queue_depth=self.max_queue_depth,
+            mean_queue_depth=(
+                round(self.queue_depth_total / self.queue_depth_samples, 2)
+                if self.queue_depth_samples
+                else 0.0
+            ),
+        )
+
+
+class EtlPipeline:
+    __END: object = object()
+    __POLL_SECONDS: float = 0.1
+
+    def __init__(
+        self,
+        name: str,
+        extract: Callable[[], Iterable[Any]],
+        transform: Callable[[Any], Any],
+        load: Callable[[Any], Any],
+        queue_size: int = 4,
+        load_gate: Optional[threading.Event] = None,
+    ):
+        # queue_size=0 makes the queues unbounded; load_gate holds the load stage back
+        # until the event is set, while extract and transform keep running and their
+        # batches are spilled to a temporary file in the meantime.
+        self.__name: str = name
+        self.__extract: Callable[[], Iterable[Any]] = extract
+        self.__transform: Callable[[Any], Any] = transform
+        self.__load: Callable[[Any], Any] = load
+        self.__queue_size: int = queue_size
+        self.__load_gate: Optional[threading.Event] = load_gate
+        self.__stop: threading.Event = threading.Event()
+        self.__errors: List[BaseException] = []
+        self.__metrics: List[_StageMetrics] = []
+        self.__threads: List[threading.Thread] = []
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    def run(self) -> List[StageMetricsDto]:
+        self.start()
+        return self.join()
+
+    def start(self) -> None:
+        logger.info(f"Starting {self.__name} pipeline")
+        self.__stop.clear()
+        self.__errors.clear()
+        transform_queue: Queue = Queue(maxsize=self.__queue_size)
+        load_queue: Queue = Queue(maxsize=self.__queue_size)
+        extract_metrics, transform_metrics, load_metrics = self.__metrics = [
+            _StageMetrics(self.__name, stage)
+            for stage in ("extract", "transform", "load")
+        ]
+        stages = [
+            (extract_metrics, self.__timed_iter(self.__extract), None, transform_queue),
+            (transform_metrics, self.__drain(transform_queue), self.__transform, load_queue),
+            (load_metrics, self.__gated(load_queue), self.__load, None),
+        ]
+        self.__threads = [
+            threading.Thread(
+                target=self.__run_stage,
+                args=stage,
+                name=f"{self.__name}-{stage[0].stage}",
+            )
+            for stage in stages
+        ]
+        for thread in self.__threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self.__stop.set()
+
+    def join(self) -> List[StageMetricsDto]:
+        for thread in self.__threads:
+            thread.join()
+
+        if self.__errors:
+            raise self.__errors[0]
+        metrics_dtos: List[StageMetricsDto] = self.get_metrics()
+        for metrics_dto in metrics_dtos:
+            logger.info("Pipeline stage finished", extra=log_fields(**metrics_dto.model_dump()))
+        return metrics_dtos
+
+    def get_metrics(self) -> List[StageMetricsDto]:
+        return [stage.to_dto() for stage in self.__metrics]
+
+    def __run_stage(
+        self,
+        metrics: _StageMetrics,
+        source: Iterator[Any],
+        work: Optional[Callable[[Any], Any]],
+        output: Optional[Queue],
+    ) -> None:
+        metrics.started = time.perf_counter()
+        try:
+            for item, waited in source:
+                if self.__stop.is_set():
+                    break
+                started: float = time.perf_counter()
+                result: Any = work(item) if work else item
+                metrics.record_batch(item, waited + time.perf_counter() - started)
+                if output is not None:
+                    self.__put(output, result)
+                    metrics.record_queue_depth(output.qsize())
+        except BaseException as e:
+            logger.error(f"{self.__name} pipeline stage {metrics.stage} failed: {e}")
+            self.__errors.append(e)
+            self.__stop.set()
+        finally:
+            metrics.finished = time.perf_counter()
+            if output is not None:
+                self.__put(output, self.__END)
+
+    def __timed_iter(self, extract: Callable[[], Iterable[Any]]) -> Iterator[Any]:
+        # For the extract stage the busy time is the time spent inside the generator
+        iterator: Iterator[Any] = iter(extract())
+        while True:
+            started: float = time.perf_counter()
+            try:
+                item: Any = next(iterator)
+            except StopIteration:
+                return
+            yield item, time.perf_counter() - started
+
+    def __gated(self, source: Queue) -> Iterator[Any]:
+        # Batches that arrive while the gate is closed go to a temporary file rather
+        # than piling up in memory, so the queues stay bounded without stalling extract
+        # and transform. Once the gate opens they are loaded first, in arrival order.
+        if self.__load_gate is None:
+            yield from self.__drain(source)
+            return
+        with tempfile.TemporaryFile(prefix=f"etl-{self.__name}-") as spill:
+            spilled, ended = self.__spill_until_gate_opens(source, spill)
+            if self.__stop.is_set():
+                return
+            if spilled:
+                logger.info(
+                    f"Loading {spilled} {self.__name} batches spilled while waiting "
+                    f"({spill.tell() / 2**20:.1f} MiB)"
+                )
+                spill.seek(0)
+                for _ in range(spilled):
+                    yield pickle.load(spill), 0.0
+            if not ended:
+                yield from self.__drain(source)
+
+    def __spill_until_gate_opens(self, source: Queue, spill: IO[bytes]) -> Tuple[int, bool]:
+        # Returns how many batches were spilled and whether the end marker came too
+        spilled: int = 0
+        ended: bool = False
+        while not self.__load_gate.is_set() and not self.__stop.is_set():
+            if ended:
+                self.__load_gate.wait(self.__POLL_SECONDS)
+                continue
+            try:
+                item: Any = source.get(timeout=self.__POLL_SECONDS)
+            except Empty:
+                continue
+            if item is self.__END:
+                ended = True
+                continue
+            pickle.dump(item, spill, pickle.HIGHEST_PROTOCOL)
+            spilled += 1
+        return spilled, ended
+
+    def __drain(self, source: Queue) -> Iterator[Any]:
+        while True:
+            try:
+                item: Any = source.get(timeout=self.__POLL_SECONDS)
+            except Empty:
+                if self.__stop.is_set():
+                    return
+                continue
+            if item is self.__END:
+                return
+            yield item, 0.0
+
+    def __put(self, output: Queue, item: Any) -> None:
+        while True:
+            try:
+                output.put(item, timeout=self.__POLL_SECONDS)
+                return
+            except Full:
+                if self.__stop.is_set():
+                    return
@@ -0,0 +1,97 @@
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from backend.common.models.etl_state_dto import EtlStateDto
+from backend.common.utils.logger import logger
+
+Batch = List[Dict[str, Any]]
+
+
+class IncrementalSource:
+    def __init__(
+        self,
+        resource: str,
+        fetch: Callable[[int], Iterable[Batch]],
+        state: Optional[EtlStateDto] = None,
+    ):
+        self.__resource: str = resource
+        self.__fetch: Callable[[int], Iterable[Batch]] = fetch
+        self.__previous_state: Optional[EtlStateDto] = state
+        self.__state: EtlStateDto = EtlStateDto(resource=resource)
+        self.__batches: Optional[Iterator[Batch]] = None
+        self.__is_rescan: bool = False
+        self.__is_resumed: bool = False
+
+    @property
+    def state(self) -> EtlStateDto:
+        return self.__state
+
+    @property
+    def is_rescan(self) -> bool:
+        # Already loaded records changed, so the resource is read again from the start
+        return self.__is_rescan
+
+    @property
+    def is_resumed(self) -> bool:
+        # Continues after records loaded by a previous run instead of from the start
+        return self.__is_resumed
+
+    def open(self) -> None:
+        previous: Optional[EtlStateDto] = self.__previous_state
+        if previous is None or previous.skip_offset == 0:
+            self.__batches = iter(self.__fetch(0))
+            return
+
+        # Re-read the last loaded record; if it is still the same, everything before
+        # it is assumed unchanged and only what comes after it has to be fetched.
+        batches: Iterator[Batch] = iter(self.__fetch(previous.skip_offset - 1))
+        first_batch: Batch = next(batches, [])
+        boundary: Optional[Dict[str, Any]] = first_batch[0] if first_batch else None
+        if (
+            boundary is not None
+            and boundary.get("id") == previous.last_id
+            and self.content_hash(boundary) == previous.content_hash
+        ):
+            logger.info(
+                f"Resuming {self.__resource} after {previous.skip_offset} records"
+            )
+            self.__state = previous.model_copy()
+            self.__is_resumed = True
+            self.__batches = self.__chained(first_batch[1:], batches)
+            return
+
+        logger.warning(
+            f"{self.__resource} changed before offset {previous.skip_offset}, "
+            f"reading it again from the start"
+        )
+        close: Optional[Callable[[], None]] = getattr(batches, "close", None)
+        if close is not None:
+            close()
+        self.__is_rescan = True
+        self.__batches = iter(self.__fetch(0))
+
+    def extract(self) -> Iterator[Batch]:
+        if self.__batches is None:
+            self.open()
+        for batch in self.__batches:
+            if not batch:
+                continue
+            self.__state = EtlStateDto(
+                resource=self.__resource,
+                skip_offset=self.__state.skip_offset + len(batch),
+                last_id=batch[-1].get("id"),
+                content_hash=self.content_hash(batch[-1]),
+            )
+            yield batch
+
+    @staticmethod
+    def content_hash(record: Dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(record, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def __chained(first_batch: Batch, batches: Iterator[Batch]) -> Iterator[Batch]:
+        yield first_batch
+        yield from batches
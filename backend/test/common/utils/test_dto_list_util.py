@@ -0,0 +1,55 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+from backend.common.models.product_dto import ProductDto
+from backend.common.utils.dto_list_util import DtoListUtil
+from backend.database.sqlite_database import Base
+from backend.domain.entities.product import Product
+
+
+@pytest.fixture
+def db_session():
+    """Fixture for an in-memory database with three products, added in reverse"""
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    with session:
+        session.add_all(
+            Product(
+                title=f"Product {product_id}",
+                description="Desc",
+                category=f"Category {product_id % 2}",
+                price=product_id / 3,
+                product_id=product_id,
+            )
+            for product_id in (3, 2, 1)
+        )
+        session.commit()
+    return session
+
+
+class TestDtoListUtil:
+    def test_matches_model_validate_of_orm_instances(self, db_session):
+        # Arrange
+        with db_session:
+            expected = [
+                ProductDto.model_validate(product)
+                for product in db_session.query(Product).all()
+            ]
+
+        # Act
+        result = DtoListUtil.select_all(db_session, Product, ProductDto)
+
+        # Assert
+        assert result == expected
+        assert all(isinstance(product, ProductDto) for product in result)
+
+    def test_orders_by_given_columns(self, db_session):
+        # Act
+        result = DtoListUtil.select_all(
+            db_session, Product, ProductDto, (Product.category, Product.product_id)
+        )
+
+        # Assert
+        assert [product.product_id for product in result] == [2, 1, 3]
@@ -0,0 +1,110 @@
+from unittest.mock import patch
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.common.utils.existing_keys_index import ExistingKeysIndex
+from backend.database.sqlite_database import Base
+from backend.domain.entities.product import Product
+
+
+@pytest.fixture
+def db_session():
+    """Fixture for an in-memory database with three products"""
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    with session:
+        session.add_all(
+            Product(
+                title=f"Product {product_id}",
+                description="Desc",
+                category="Category A",
+                price=1.0,
+                product_id=product_id,
+            )
+            for product_id in (1, 2, 3)
+        )
+        session.commit()
+    return session
+
+
+class TestExistingKeysIndex:
+    def test_preloads_keys_and_filters_known_ones(self, db_session):
+        # Arrange
+        index = ExistingKeysIndex(db_session, Product.product_id)
+
+        # Act
+        index.load()
+        result = index.filter_new([2, 3, 4, 5])
+
+        # Assert
+        assert index.is_preloaded
+        assert result == {4, 5}
+
+    def test_added_keys_are_treated_as_existing(self, db_session):
+        # Arrange
+        index = ExistingKeysIndex(db_session, Product.product_id)
+        index.load()
+
+        # Act
+        index.add({4})
+        result = index.filter_new([4, 5])
+
+        # Assert
+        assert result == {5}
+
+    def test_falls_back_to_chunked_probes_for_big_tables(self, db_session):
+        # Arrange
+        index = ExistingKeysIndex(
+            db_session, Product.product_id, max_preloaded_keys=2, probe_chunk_size=2
+        )
+
+        # Act
+        index.load()
+        result = index.filter_new([1, 3, 4, 5, 6])
+
+        # Assert
+        assert not index.is_preloaded
+        assert result == {4, 5, 6}
+
+    def test_filter_preloaded_keeps_every_key_without_probing(self, db_session):
+        # Arrange
+        index = ExistingKeysIndex(db_session, Product.product_id, max_preloaded_keys=2)
+        index.load()
+
+        # Act
+        with patch.object(db_session, "connection", side_effect=AssertionError):
+            result = index.filter_preloaded([1, 3, 4])
+
+        # Assert
+        assert result == {1, 3, 4}
+
+    def test_probes_see_uncommitted_rows_of_a_connection_bound_session(self):
+        # Arrange
+        engine = sa.create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with engine.connect() as connection, connection.begin():
+            session = Session(bind=connection, join_transaction_mode="create_savepoint")
+            with session:
+                session.add_all(
+                    Product(
+                        title=f"Product {product_id}",
+                        description="Desc",
+                        category="Category A",
+                        price=1.0,
+                        product_id=product_id,
+                    )
+                    for product_id in (1, 2, 3)
+                )
+                session.commit()
+            index = ExistingKeysIndex(session, Product.product_id, max_preloaded_keys=2)
+            index.load()
+
+            # Act
+            result = index.filter_new([1, 3, 4])
+
+        # Assert
+        assert not index.is_preloaded
+        assert result == {4}
@@ -0,0 +1,233 @@
+import gzip
+import json
+import os
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from backend.common.models.cart_dto import CartDto
+from backend.common.models.product_dto import ProductDto
+from backend.common.utils.export_file_sinks import (
+    ArrowFileSink,
+    NdjsonFileSink,
+    ParquetFileSink,
+)
+from backend.common.utils.file_util import FileUtil
+from backend.common.utils.result_sink import ResultSink
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    """Fixture running every test from an empty working directory"""
+    monkeypatch.chdir(tmp_path)
+    yield
+    FileUtil.configure_export_formats(())
+    FileUtil.discard_staged_files()
+
+
+class ReviewDto(BaseModel):
+    product_id: int
+    comment: Optional[str] = None
+
+
+def products(count):
+    return [
+        ProductDto(
+            title=f"Product {product_id}",
+            description="Desc",
+            category="Category A",
+            price=product_id + 0.5,
+            product_id=product_id,
+        )
+        for product_id in range(count)
+    ]
+
+
+class TestParquetFileSink:
+    def test_writes_full_row_groups_and_remainder_on_close(self):
+        # Arrange
+        sink = ParquetFileSink("products.txt", row_group_size=4)
+
+        # Act
+        sink.write_all(products(3))
+        sink.flush()
+        sink.write_all(products(10)[3:])
+        sink.close()
+
+        # Assert
+        parquet_file = pq.ParquetFile("backend/data_export/products.parquet")
+        assert parquet_file.metadata.num_rows == 10
+        assert [
+            parquet_file.metadata.row_group(index).num_rows
+            for index in range(parquet_file.num_row_groups)
+        ] == [4, 4, 2]
+        table = parquet_file.read()
+        assert table.column("product_id").to_pylist() == list(range(10))
+        assert table.schema.field("price").type == pa.float64()
+
+    def test_column_with_only_none_in_first_row_group_keeps_declared_type(self):
+        # Arrange
+        reviews = [ReviewDto(product_id=product_id) for product_id in range(2)] + [
+            ReviewDto(product_id=2, comment="Great")
+        ]
+
+        # Act
+        with ParquetFileSink("reviews.txt", row_group_size=2) as sink:
+            sink.write_all(reviews[:2])
+            sink.write_all(reviews[2:])
+
+        # Assert
+        table = pq.read_table("backend/data_export/reviews.parquet")
+        assert table.schema.field("comment").type == pa.string()
+        assert table.column("comment").to_pylist() == [None, None, "Great"]
+
+    def test_write_error_propagates(self):
+        # Arrange
+        os.makedirs("backend")
+        # A file where the export directory should be
+        open(FileUtil.EXPORT_DIRECTORY, "w").close()
+        sink = ParquetFileSink("products.txt", row_group_size=1)
+
+        # Act / Assert
+        with pytest.raises(OSError):
+            sink.write_all(products(1))
+        sink.close()
+
+    def test_nothing_written_leaves_no_file(self):
+        # Act
+        with ParquetFileSink("products.txt") as sink:
+            sink.write_all([])
+
+        # Assert
+        assert not os.path.exists("backend/data_export/products.parquet")
+
+
+class TestArrowFileSink:
+    def test_file_can_be_memory_mapped(self):
+        # Arrange
+        carts = [CartDto(cart_id=cart_id, user_id=1) for cart_id in range(5)]
+
+        # Act
+        with ArrowFileSink("carts.txt", row_group_size=2) as sink:
+            sink.write_all(carts)
+
+        # Assert
+        with pa.memory_map("backend/data_export/carts.arrow") as source:
+            reader = pa.ipc.open_file(source)
+            table = reader.read_all()
+        assert reader.num_record_batches == 3
+        assert table.to_pylist() == [cart.model_dump() for cart in carts]
+
+
+class TestArrowFileSinkSchema:
+    def test_column_with_only_none_in_first_batch_keeps_declared_type(self):
+        # Arrange
+        reviews = [ReviewDto(product_id=0), ReviewDto(product_id=1, comment="Fine")]
+
+        # Act
+        with ArrowFileSink("reviews.txt", row_group_size=1) as sink:
+            sink.write_all(reviews)
+
+        # Assert
+        with pa.memory_map("backend/data_export/reviews.arrow") as source:
+            table = pa.ipc.open_file(source).read_all()
+        assert table.to_pylist() == [review.model_dump() for review in reviews]
+
+
+class TestNdjsonFileSink:
+    def test_writes_one_json_object_per_line(self):
+        # Arrange
+        carts = [CartDto(cart_id=cart_id, user_id=2) for cart_id in range(3)]
+
+        # Act
+        with NdjsonFileSink("carts.txt") as sink:
+            sink.write_all(carts[:1])
+            sink.write_all(carts[1:])
+
+        # Assert
+        with gzip.open("backend/data_export/carts.ndjson.gz", "rt") as file:
+            assert [json.loads(line) for line in file] == [
+                cart.model_dump() for cart in carts
+            ]
+
+
+class TestResultSink:
+    def test_writes_txt_and_configured_exports(self):
+        # Arrange
+        FileUtil.configure_export_formats(["parquet", " NDJSON ", ""])
+
+        # Act
+        with ResultSink("products.txt") as sink:
+            sink.write_all(iter(products(2)))
+
+        # Assert
+        with open("backend/data_txt/products.txt") as file:
+            assert len(file.readlines()) == 2
+        assert pq.read_table("backend/data_export/products.parquet").num_rows == 2
+        assert os.path.exists("backend/data_export/products.ndjson.gz")
+        assert not os.path.exists("backend/data_export/products.arrow")
+
+    def test_clean_removes_previous_exports(self):
+        # Arrange
+        FileUtil.configure_export_formats(["arrow"])
+        with ResultSink("products.txt") as sink:
+            sink.write_all(products(1))
+
+        # Act
+        FileUtil.clean_txt_file_before_processing("products.txt")
+
+        # Assert
+        assert not os.path.exists("backend/data_export/products.arrow")
+
+    def test_staged_results_replace_published_ones_on_publish(self):
+        # Arrange
+        FileUtil.configure_export_formats(["ndjson"])
+        with ResultSink("products.txt") as sink:
+            sink.write_all(products(1))
+        FileUtil.start_staging()
+        FileUtil.clean_txt_file_before_processing("products.txt")
+        with ResultSink("products.txt") as sink:
+            sink.write_all(products(3))
+
+        # Act
+        with open("backend/data_txt/products.txt") as file:
+            lines_before_publish = len(file.readlines())
+        FileUtil.publish_staged_files()
+
+        # Assert
+        assert lines_before_publish == 1
+        with open("backend/data_txt/products.txt") as file:
+            assert len(file.readlines()) == 3
+        with gzip.open("backend/data_export/products.ndjson.gz", "rt") as file:
+            assert len(file.readlines()) == 3
+        assert not os.path.exists("backend/data_txt/products.txt.partial")
+
+    def test_discarded_results_leave_published_ones_untouched(self):
+        # Arrange
+        FileUtil.configure_export_formats(["ndjson"])
+        with ResultSink("products.txt") as sink:
+            sink.write_all(products(1))
+        FileUtil.start_staging()
+        FileUtil.clean_txt_file_before_processing("products.txt")
+        with ResultSink("products.txt") as sink:
+            sink.write_all(products(3))
+
+        # Act
+        FileUtil.discard_staged_files()
+
+        # Assert
+        with open("backend/data_txt/products.txt") as file:
+            assert len(file.readlines()) == 1
+        with gzip.open("backend/data_export/products.ndjson.gz", "rt") as file:
+            assert len(file.readlines()) == 1
+        assert os.listdir("backend/data_txt") == ["products.txt"]
+        assert os.listdir("backend/data_export") == ["products.ndjson.gz"]
+
+    def test_unknown_format_is_rejected(self):
+        # Act / Assert
+        with pytest.raises(ValueError):
+            FileUtil.configure_export_formats(["csv"])
@@ -0,0 +1,105 @@
+import sqlite3
+
+import numpy as np
+
+from backend.common.utils.geocode_cache import GeocodeCache
+
+
+class TestGeocodeCache:
+    def test_keys_are_rounded_to_precision(self):
+        # Arrange
+        cache = GeocodeCache(precision=1)
+
+        # Act
+        keys = cache.keys(np.array([[40.7128, -74.0061], [52.2297, 21.0122]]))
+
+        # Assert
+        assert keys == [(40.7, -74.0), (52.2, 21.0)]
+
+    def test_counts_hits_and_misses(self):
+        # Arrange
+        cache = GeocodeCache()
+        cache.put_many({(1.0, 2.0): "Poland"})
+
+        # Act
+        result = cache.get_many([(1.0, 2.0), (3.0, 4.0), (1.0, 2.0)])
+
+        # Assert
+        assert result == ["Poland", None, "Poland"]
+        assert cache.hits == 2
+        assert cache.misses == 1
+        assert cache.hit_rate == 2 / 3
+
+    def test_evicts_least_recently_used_entries(self):
+        # Arrange
+        cache = GeocodeCache(max_entries=2)
+        cache.put_many({(1.0, 1.0): "A", (2.0, 2.0): "B"})
+        cache.get_many([(1.0, 1.0)])
+
+        # Act
+        cache.put_many({(3.0, 3.0): "C"})
+
+        # Assert
+        assert cache.size == 2
+        assert cache.get_many([(1.0, 1.0), (2.0, 2.0), (3.0, 3.0)]) == ["A", None, "C"]
+
+    def test_persists_entries_between_instances(self, tmp_path):
+        # Arrange
+        file_path = str(tmp_path / "geocode_cache.db")
+        cache = GeocodeCache(file_path=file_path)
+        cache.put_many({(1.0, 2.0): "Poland"})
+        cache.close()
+
+        # Act
+        reopened_cache = GeocodeCache(file_path=file_path)
+
+        # Assert
+        assert reopened_cache.get_many([(1.0, 2.0)]) == ["Poland"]
+        reopened_cache.close()
+
+    def test_file_evicts_least_recently_used_entries(self, tmp_path):
+        # Arrange
+        file_path = str(tmp_path / "geocode_cache.db")
+        cache = GeocodeCache(file_path=file_path, max_file_entries=2)
+        cache.put_many({(1.0, 1.0): "A", (2.0, 2.0): "B"})
+        cache.get_many([(1.0, 1.0)])
+
+        # Act
+        cache.put_many({(3.0, 3.0): "C"})
+        cache.close()
+
+        # Assert
+        with sqlite3.connect(file_path) as connection:
+            rows = connection.execute("SELECT country FROM geocode_cache").fetchall()
+        assert sorted(country for country, in rows) == ["A", "C"]
+
+    def test_hits_are_written_back_on_close(self, tmp_path):
+        # Arrange
+        file_path = str(tmp_path / "geocode_cache.db")
+        cache = GeocodeCache(file_path=file_path)
+        cache.put_many({(1.0, 1.0): "A"})
+        cache.put_many({(2.0, 2.0): "B"})
+        cache.get_many([(1.0, 1.0)])
+        cache.close()
+
+        # Act
+        reopened_cache = GeocodeCache(file_path=file_path, max_entries=1)
+
+        # Assert
+        assert reopened_cache.get_many([(1.0, 1.0), (2.0, 2.0)]) == ["A", None]
+        reopened_cache.close()
+
+    def test_bounds_number_of_entries_on_disk(self, tmp_path):
+        # Arrange
+        file_path = str(tmp_path / "geocode_cache.db")
+        cache = GeocodeCache(file_path=file_path, max_file_entries=3)
+
+        # Act
+        for value in range(5):
+            cache.put_many({(float(value), 0.0): f"Country {value}"})
+        cache.close()
+
+        # Assert
+        with sqlite3.connect(file_path) as connection:
+            rows = connection.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()
+        assert rows[0] == 3
@@ -0,0 +1,61 @@
+import os
+import sqlite3
+
+from backend.common.utils.http_page_cache import HttpPageCache
+
+
+class TestHttpPageCache:
+    def test_stores_pages_compressed_and_between_instances(self, tmp_path):
+        # Arrange
+        file_path = str(tmp_path / "pages.db")
+        body = b'{"users": [' + b'{"id": 1, "firstName": "Emily"}, ' * 100 + b"]}"
+        cache = HttpPageCache(file_path)
+        cache.put("https://dummyjson.com/users?limit=10&skip=0", body, '"v1"', None, 0.2)
+        cache.close()
+
+        # Act
+        reopened_cache = HttpPageCache(file_path)
+        page = reopened_cache.get("https://dummyjson.com/users?limit=10&skip=0")
+
+        # Assert
+        assert (page.body, page.etag, page.last_modified, page.elapsed) == (
+            body,
+            '"v1"',
+            None,
+            0.2,
+        )
+        assert 0 < reopened_cache.size_bytes < len(body) / 5
+        assert reopened_cache.get("https://dummyjson.com/users?limit=10&skip=10") is None
+        reopened_cache.close()
+
+    def test_evicts_least_recently_used_pages_over_budget(self, tmp_path):
+        # Arrange
+        file_path = str(tmp_path / "pages.db")
+        cache = HttpPageCache(file_path, max_bytes=150)
+        cache.put("a", os.urandom(60), None, None, 0.1)
+        cache.put("b", os.urandom(60), None, None, 0.1)
+        cache.record_hit("a")
+
+        # Act
+        cache.put("c", os.urandom(60), None, None, 0.1)
+
+        # Assert
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        cache.close()
+        with sqlite3.connect(file_path) as connection:
+            stored_size = connection.execute("SELECT SUM(size) FROM http_page_cache").fetchone()
+        assert stored_size[0] <= 150
+
+    def test_counts_hit_rate(self, tmp_path):
+        # Arrange
+        cache = HttpPageCache(str(tmp_path / "pages.db"))
+
+        # Act
+        cache.record_hit("a")
+        cache.record_miss()
+        cache.record_hit("a")
+
+        # Assert
+        assert (cache.hits, cache.misses, cache.hit_rate) == (2, 1, 2 / 3)
+        cache.close()
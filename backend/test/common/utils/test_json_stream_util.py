@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from backend.common.utils.json_stream_util import JsonStreamUtil
+
+PAGE = {
+    "users": [
+        {"id": 1, "firstName": "Zoë", "address": {"coordinates": {"lat": -77.16213}}},
+        {"id": 2, "firstName": "Łukasz", "tags": [], "age": 123456},
+    ],
+    "total": 208,
+    "skip": 0,
+    "limit": 2,
+}
+
+NUMBERS = (
+    b'{"users": [1e-07, -2.5E+3, 0.125, 3e2, [1.5, 2E-1], {"lat": 12.75}, 7],'
+    b' "total": 1.5e1}'
+)
+
+
+def split(body: bytes, size: int):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class TestJsonStreamUtil:
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 1024])
+    def test_load_object_matches_json_loads_at_any_chunk_boundary(self, chunk_size):
+        # Arrange
+        body = json.dumps(PAGE, indent=1, ensure_ascii=False).encode("utf-8")
+
+        # Act
+        page = JsonStreamUtil.load_object(split(body, chunk_size), "users")
+
+        # Assert
+        assert page == json.loads(body)
+
+    @pytest.mark.parametrize("offset", range(1, len(NUMBERS)))
+    def test_floats_and_exponents_split_at_any_offset(self, offset):
+        # Act
+        page = JsonStreamUtil.load_object([NUMBERS[:offset], NUMBERS[offset:]], "users")
+
+        # Assert
+        assert page == json.loads(NUMBERS)
+
+    @pytest.mark.parametrize("offset", range(1, 6))
+    def test_bare_float_item_split_before_its_fraction_or_exponent(self, offset):
+        # Arrange
+        body = b'{"users":[1e-07,2.5]}'
+
+        # Act
+        page = JsonStreamUtil.load_object(split(body, offset), "users")
+
+        # Assert
+        assert page == {"users": [1e-07, 2.5]}
+
+    def test_iter_object_yields_records_before_the_rest_arrives(self):
+        # Arrange
+        chunks = iter([b'{"users": [{"id": 1},', b' {"id": 2}', b'], "total": 2}'])
+
+        # Act
+        members = JsonStreamUtil.iter_object(chunks, "users")
+        first = next(members)
+
+        # Assert
+        assert first == ("users", {"id": 1})
+        assert next(chunks) == b' {"id": 2}'
+
+    def test_empty_array_and_other_keys_first(self):
+        # Act
+        page = JsonStreamUtil.load_object([b'{"total": 0, "carts": []}'], "carts")
+
+        # Assert
+        assert page == {"total": 0, "carts": []}
+
+    @pytest.mark.parametrize(
+        "body", [b'{"users": [{"id": 1}', b'{"users": [{"id": 1}] "total": 1}', b"[]"]
+    )
+    def test_malformed_body_raises_decode_error(self, body):
+        # Act / Assert
+        with pytest.raises(json.JSONDecodeError):
+            JsonStreamUtil.load_object(split(body, 3), "users")
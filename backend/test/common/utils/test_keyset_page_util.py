@@ -0,0 +1,84 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+from backend.common.models.product_dto import ProductDto
+from backend.common.utils.keyset_page_util import KeysetPageUtil
+from backend.database.sqlite_database import Base
+from backend.domain.entities.product import Product
+
+
+@pytest.fixture
+def db_session():
+    """Fixture for an in-memory database with five products in two categories"""
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    with session:
+        session.add_all(
+            Product(
+                title=f"Product {product_id}",
+                description="Desc",
+                category="Category A" if product_id % 2 else "Category B",
+                price=1.0,
+                product_id=product_id,
+            )
+            for product_id in (1, 2, 3, 4, 5)
+        )
+        session.commit()
+    return session
+
+
+class TestKeysetPageUtil:
+    def test_follows_cursor_until_last_page(self, db_session):
+        # Arrange
+        pages = []
+        cursor = None
+
+        # Act
+        while True:
+            page = KeysetPageUtil.get_page(
+                db_session, Product, ProductDto, cursor, limit=2
+            )
+            pages.append([item["product_id"] for item in page.items])
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        # Assert
+        assert pages == [[1, 2], [3, 4], [5]]
+
+    def test_last_full_page_has_no_next_cursor(self, db_session):
+        # Act
+        page = KeysetPageUtil.get_page(db_session, Product, ProductDto, limit=5)
+
+        # Assert
+        assert len(page.items) == 5
+        assert page.next_cursor is None
+
+    def test_projects_only_requested_fields(self, db_session):
+        # Act
+        page = KeysetPageUtil.get_page(
+            db_session, Product, ProductDto, limit=1, fields=["title", "price"]
+        )
+
+        # Assert
+        assert page.items == [{"title": "Product 1", "price": 1.0}]
+
+    def test_filters_ignore_missing_values(self, db_session):
+        # Act
+        page = KeysetPageUtil.get_page(
+            db_session,
+            Product,
+            ProductDto,
+            fields=["product_id"],
+            filters={Product.category: "Category B", Product.product_id: None},
+        )
+
+        # Assert
+        assert page.items == [{"product_id": 2}, {"product_id": 4}]
+
+    def test_unknown_field_is_rejected(self, db_session):
+        # Act / Assert
+        with pytest.raises(ValueError):
+            KeysetPageUtil.get_page(db_session, Product, ProductDto, fields=["id"])
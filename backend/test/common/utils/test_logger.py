@@ -0,0 +1,76 @@
+import json
+import threading
+
+import pytest
+
+from backend.common.utils.logger import (
+    configure_logging,
+    log_fields,
+    logger,
+    stop_logging,
+)
+
+
+class FormattedOn:
+    """Argument that remembers on which threads it was turned into a string"""
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread().name)
+        return "formatted"
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    yield
+    configure_logging()
+
+
+class TestLogger:
+    def test_formats_on_listener_thread_with_fields(self, capsys):
+        # Arrange
+        configure_logging(level="INFO", log_format="text")
+        argument = FormattedOn()
+
+        # Act
+        logger.info("Batch %s", argument, extra=log_fields(records=3, skipped=1))
+        stop_logging()
+
+        # Assert
+        assert capsys.readouterr().err.rstrip().endswith(
+            "INFO - Batch formatted records=3 skipped=1"
+        )
+        # pytest's own log capture formats on the calling thread, the output above
+        # was formatted by the listener
+        assert any(
+            thread != threading.current_thread().name for thread in argument.threads
+        )
+
+    def test_records_below_level_are_never_formatted(self, capsys):
+        # Arrange
+        configure_logging(level="INFO")
+        argument = FormattedOn()
+
+        # Act
+        logger.debug("Record %s", argument)
+        stop_logging()
+
+        # Assert
+        assert argument.threads == []
+        assert capsys.readouterr().err == ""
+
+    def test_json_format_puts_fields_next_to_message(self, capsys):
+        # Arrange
+        configure_logging(log_format="json")
+
+        # Act
+        logger.warning("Users batch transformed", extra=log_fields(errors=2))
+        stop_logging()
+
+        # Assert
+        entry = json.loads(capsys.readouterr().err)
+        assert entry["level"] == "WARNING"
+        assert entry["message"] == "Users batch transformed"
+        assert entry["errors"] == 2
@@ -0,0 +1,53 @@
+from backend.common.utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    def test_render_prometheus_counters_and_summaries(self):
+        # Arrange
+        registry = MetricsRegistry()
+        registry.increment("etl_api_page_bytes_total", 100, resource="users")
+        registry.increment("etl_api_page_bytes_total", 50, resource="users")
+        registry.observe("etl_api_page_seconds", 0.25, resource="users")
+        registry.observe("etl_api_page_seconds", 0.5, resource="users")
+
+        # Act
+        text = registry.render_prometheus()
+
+        # Assert
+        assert text == (
+            "# TYPE etl_api_page_bytes_total counter\n"
+            'etl_api_page_bytes_total{resource="users"} 150\n'
+            "# TYPE etl_api_page_seconds summary\n"
+            'etl_api_page_seconds_count{resource="users"} 2\n'
+            'etl_api_page_seconds_sum{resource="users"} 0.75\n'
+        )
+
+    def test_label_values_are_escaped(self):
+        # Arrange
+        registry = MetricsRegistry()
+
+        # Act
+        registry.increment("etl_sink_records_total", sink='a"b\\c')
+
+        # Assert
+        assert 'sink="a\\"b\\\\c"' in registry.render_prometheus()
+
+    def test_samples_since_returns_only_what_changed(self):
+        # Arrange
+        registry = MetricsRegistry()
+        registry.increment("etl_db_rows_written_total", 10, table="users")
+        registry.increment("etl_db_rows_written_total", 5, table="carts")
+        snapshot = registry.snapshot()
+
+        # Act
+        with registry.timed("etl_db_write_seconds", table="users"):
+            registry.increment("etl_db_rows_written_total", 3, table="users")
+        samples = registry.samples_since(snapshot)
+
+        # Assert
+        assert [(sample.name, sample.labels) for sample in samples] == [
+            ("etl_db_rows_written_total", {"table": "users"}),
+            ("etl_db_write_seconds_count", {"table": "users"}),
+            ("etl_db_write_seconds_sum", {"table": "users"}),
+        ]
+        assert samples[0].value == 3
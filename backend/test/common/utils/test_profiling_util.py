@@ -0,0 +1,70 @@
+import os
+import pstats
+import threading
+import tracemalloc
+
+import pytest
+
+from backend.common.utils.profiling_util import ProfilingUtil
+
+
+def work_in_thread():
+    """Do some work on another thread, like the ETL pipeline stages"""
+
+    def build_rows():
+        return [{"id": index} for index in range(1000)]
+
+    thread = threading.Thread(target=build_rows)
+    thread.start()
+    thread.join()
+    return "done"
+
+
+class TestProfilingUtil:
+    def test_without_mode_only_runs_the_function(self, tmp_path):
+        # Act
+        result, path = ProfilingUtil.run_profiled(work_in_thread, None, "etl", str(tmp_path))
+
+        # Assert
+        assert (result, path) == ("done", None)
+        assert os.listdir(tmp_path) == []
+
+    def test_cprofile_includes_threads_started_by_the_function(self, tmp_path):
+        # Act
+        result, path = ProfilingUtil.run_profiled(
+            work_in_thread, "cProfile", "etl", str(tmp_path)
+        )
+
+        # Assert
+        functions = {function for _, _, function in pstats.Stats(path).stats}
+        assert result == "done"
+        assert "build_rows" in functions
+
+    def test_tracemalloc_writes_snapshot_and_top_allocations(self, tmp_path):
+        # Act
+        _, path = ProfilingUtil.run_profiled(
+            work_in_thread, "tracemalloc", "etl", str(tmp_path)
+        )
+
+        # Assert
+        assert tracemalloc.Snapshot.load(path).traces
+        with open(f"{path}.txt") as file:
+            assert file.readline().startswith("Peak traced memory")
+        assert not tracemalloc.is_tracing()
+
+    def test_profile_is_written_when_the_function_raises(self, tmp_path):
+        # Arrange
+        def fail():
+            raise RuntimeError("API unavailable")
+
+        # Act
+        with pytest.raises(RuntimeError):
+            ProfilingUtil.run_profiled(fail, "cprofile", "etl", str(tmp_path))
+
+        # Assert
+        assert len(os.listdir(tmp_path)) == 1
+
+    def test_unknown_mode_is_rejected(self):
+        # Act / Assert
+        with pytest.raises(ValueError):
+            ProfilingUtil.validate_mode("perf")
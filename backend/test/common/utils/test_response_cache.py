@@ -0,0 +1,61 @@
+from backend.common.utils.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    def test_hit_after_put_in_current_generation(self):
+        # Arrange
+        cache = ResponseCache(max_bytes=100)
+
+        # Act
+        miss = cache.get("/api/users?")
+        stored = cache.put("/api/users?", cache.generation, b"[1]")
+        hit = cache.get("/api/users?")
+
+        # Assert
+        assert miss is None
+        assert hit == stored
+        assert hit.etag == ResponseCache.create_etag(0, b"[1]")
+        assert (cache.hits, cache.misses, cache.hit_rate) == (1, 1, 0.5)
+
+    def test_bump_generation_drops_entries_and_changes_etag(self):
+        # Arrange
+        cache = ResponseCache(max_bytes=100)
+        before = cache.put("/api/users?", cache.generation, b"[1]")
+
+        # Act
+        cache.bump_generation()
+        after = cache.put("/api/users?", cache.generation, b"[1]")
+
+        # Assert
+        assert cache.get_stats().entries == 1
+        assert before.etag != after.etag
+
+    def test_response_read_before_bump_is_not_stored(self):
+        # Arrange
+        cache = ResponseCache(max_bytes=100)
+        generation = cache.generation
+
+        # Act
+        cache.bump_generation()
+        returned = cache.put("/api/users?", generation, b"[1]")
+
+        # Assert
+        assert returned.body == b"[1]"
+        assert cache.get("/api/users?") is None
+
+    def test_least_recently_used_entries_are_evicted_over_budget(self):
+        # Arrange
+        cache = ResponseCache(max_bytes=10)
+        cache.put("a", 0, b"1234")
+        cache.put("b", 0, b"1234")
+        cache.get("a")
+
+        # Act
+        cache.put("c", 0, b"1234")
+        cache.put("too big", 0, b"12345678901")
+
+        # Assert
+        stats = cache.get_stats()
+        assert cache.get("b") is None
+        assert cache.get("too big") is None
+        assert (stats.entries, stats.size_bytes, stats.evictions) == (2, 8, 1)
@@ -0,0 +1,43 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+from backend.common.models.cart_dto import CartDto
+from backend.common.utils.row_stream_util import RowStreamUtil
+from backend.database.sqlite_database import Base
+from backend.domain.entities.cart import Cart
+
+
+@pytest.fixture
+def db_session():
+    """Fixture for an in-memory database with five carts"""
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    with session:
+        session.add_all(Cart(cart_id=cart_id, user_id=1) for cart_id in range(5))
+        session.commit()
+    return session
+
+
+class TestRowStreamUtil:
+    def test_streams_every_row_in_batches(self, db_session):
+        # Act
+        batches = list(RowStreamUtil.stream_rows(db_session, Cart, CartDto, 2))
+
+        # Assert
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert [row for batch in batches for row in batch] == [
+            {"cart_id": cart_id, "user_id": 1} for cart_id in range(5)
+        ]
+
+    def test_nothing_is_queried_until_iterated(self, db_session):
+        # Arrange
+        db_session.close()
+
+        # Act
+        rows = RowStreamUtil.stream_rows(db_session, Cart, CartDto)
+
+        # Assert
+        assert not db_session.in_transaction()
+        assert len(next(rows)) == 5
@@ -0,0 +1,72 @@
+import pytest
+
+from backend.common.models.cart_dto import CartDto
+from backend.common.utils.file_util import FileUtil
+from backend.common.utils.txt_file_sink import TxtFileSink
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    """Fixture running every test from an empty working directory"""
+    monkeypatch.chdir(tmp_path)
+
+
+def read_txt(file_name):
+    with open(f"backend/data_txt/{file_name}") as file:
+        return file.read()
+
+
+class TestTxtFileSink:
+    def test_writes_same_lines_as_file_util(self):
+        # Arrange
+        carts = [CartDto(cart_id=cart_id, user_id=1) for cart_id in range(3)]
+
+        # Act
+        for cart in carts:
+            FileUtil.save_result_to_txt_file("expected.txt", cart)
+        with TxtFileSink("carts.txt") as sink:
+            sink.write(carts[0])
+            sink.write_all(carts[1:])
+
+        # Assert
+        assert read_txt("carts.txt") == read_txt("expected.txt")
+
+    def test_buffers_writes_until_flush(self):
+        # Arrange
+        sink = TxtFileSink("carts.txt")
+
+        # Act
+        sink.write_all([CartDto(cart_id=1, user_id=1)])
+        before_flush = read_txt("carts.txt")
+        sink.flush()
+        after_flush = read_txt("carts.txt")
+        sink.close()
+
+        # Assert
+        assert before_flush == ""
+        assert after_flush == f"{CartDto(cart_id=1, user_id=1)!r}\n"
+
+    def test_appends_after_cleaned_file(self):
+        # Arrange
+        with TxtFileSink("carts.txt") as sink:
+            sink.write(CartDto(cart_id=1, user_id=1))
+
+        # Act
+        FileUtil.clean_txt_file_before_processing("carts.txt")
+        with TxtFileSink("carts.txt") as sink:
+            sink.write(CartDto(cart_id=2, user_id=1))
+
+        # Assert
+        assert read_txt("carts.txt") == f"{CartDto(cart_id=2, user_id=1)!r}\n"
+
+    def test_close_is_idempotent(self):
+        # Arrange
+        sink = TxtFileSink("carts.txt")
+
+        # Act
+        sink.close()
+        sink.close()
+        sink.write(CartDto(cart_id=1, user_id=1))
+
+        # Assert
+        assert read_txt("carts.txt") == ""
@@ -0,0 +1,302 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from unittest.mock import MagicMock
+
+import pytest
+import sqlalchemy as sa
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.common.utils.response_cache import ResponseCache
+from backend.controller.controller import router
+from backend.database.sqlite_database import Base, configure_engine, create_read_engine
+from backend.domain.entities.user import User
+from backend.domain.services.cart_service import CartService
+from backend.domain.services.category_service import CategoryService
+from backend.domain.services.product_from_cart_service import ProductFromCartService
+from backend.domain.services.product_service import ProductService
+from backend.domain.services.user_service import UserService
+
+
+def make_user(user_id):
+    return User(
+        first_name=f"First{user_id}",
+        last_name=f"Last{user_id}",
+        email=f"user{user_id}@example.com",
+        age=20 + user_id,
+        birth_date="1990-01-01",
+        street="Main Street",
+        city="Anytown",
+        country="Poland",
+        user_id=user_id,
+    )
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    """Read executor counting the calls handed to it"""
+
+    def __init__(self):
+        super().__init__(max_workers=2, thread_name_prefix="api-read")
+        self.submitted = 0
+
+    def submit(self, function, /, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(function, *args, **kwargs)
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """Fixture for a file database with five users written through the write engine"""
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine = sa.create_engine(url)
+    configure_engine(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(make_user(user_id) for user_id in range(1, 6))
+        session.commit()
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def read_engine(database_url):
+    engine = create_read_engine(database_url, pool_size=2)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def read_executor():
+    executor = RecordingExecutor()
+    yield executor
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def response_cache():
+    return ResponseCache()
+
+
+@pytest.fixture
+def client(read_engine, read_executor, response_cache):
+    """Fixture for the API wired like main.py, reading through the read pool"""
+    api = MagicMock()
+    app = FastAPI()
+    app.state.read_session = sessionmaker(bind=read_engine)
+    app.state.create_user_service = partial(UserService, api)
+    app.state.create_cart_service = lambda db_session: CartService(
+        api, db_session, ProductFromCartService(db_session)
+    )
+    app.state.create_product_service = partial(ProductService, api)
+    app.state.create_product_from_cart_service = ProductFromCartService
+    app.state.create_category_service = CategoryService
+    app.state.etl_job = MagicMock()
+    app.state.read_executor = read_executor
+    app.state.response_cache = response_cache
+    app.include_router(router=router, prefix="/api")
+    with TestClient(app) as client:
+        yield client
+
+
+class TestReadExecutor:
+    def test_page_queries_run_on_the_read_executor(
+        self, client, read_engine, read_executor
+    ):
+        # Arrange
+        query_threads = []
+        sa.event.listen(
+            read_engine,
+            "before_cursor_execute",
+            lambda *args: query_threads.append(threading.current_thread().name),
+        )
+
+        # Act
+        response = client.get("/api/users", params={"limit": 2})
+
+        # Assert
+        assert response.status_code == 200
+        assert [item["user_id"] for item in response.json()["items"]] == [1, 2]
+        assert read_executor.submitted == 1
+        assert query_threads
+        assert all(name.startswith("api-read") for name in query_threads)
+
+
+class TestPagination:
+    def test_next_cursor_walks_through_every_row_once(self, client):
+        # Arrange
+        params = {"limit": 2}
+        user_ids = []
+        pages = 0
+
+        # Act
+        while True:
+            page = client.get("/api/users", params=params).json()
+            pages += 1
+            user_ids += [item["user_id"] for item in page["items"]]
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+
+        # Assert
+        assert user_ids == [1, 2, 3, 4, 5]
+        assert pages == 3
+
+    def test_last_full_page_has_no_next_cursor(self, client):
+        # Act
+        page = client.get("/api/users", params={"limit": 5}).json()
+
+        # Assert
+        assert len(page["items"]) == 5
+        assert page["next_cursor"] is None
+
+    @pytest.mark.parametrize("cursor", ["-1", "abc"])
+    def test_invalid_cursor_is_rejected(self, client, cursor):
+        # Act
+        response = client.get("/api/users", params={"cursor": cursor})
+
+        # Assert
+        assert response.status_code == 422
+
+    def test_cursor_past_the_end_returns_an_empty_page(self, client):
+        # Act
+        page = client.get("/api/users", params={"cursor": 1000}).json()
+
+        # Assert
+        assert page == {"items": [], "next_cursor": None}
+
+    @pytest.mark.parametrize("limit", [0, 1001])
+    def test_limit_out_of_bounds_is_rejected(self, client, limit):
+        # Act
+        response = client.get("/api/users", params={"limit": limit})
+
+        # Assert
+        assert response.status_code == 422
+
+    @pytest.mark.parametrize("limit", [1, 1000])
+    def test_limit_bounds_are_accepted(self, client, limit):
+        # Act
+        response = client.get("/api/users", params={"limit": limit})
+
+        # Assert
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == min(limit, 5)
+
+
+class TestFieldsProjection:
+    def test_only_requested_fields_are_returned(self, client):
+        # Act
+        response = client.get(
+            "/api/users", params={"fields": "email, user_id", "limit": 2}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {
+            "items": [
+                {"email": "user1@example.com", "user_id": 1},
+                {"email": "user2@example.com", "user_id": 2},
+            ],
+            "next_cursor": 2,
+        }
+
+    def test_unknown_field_is_rejected(self, client):
+        # Act
+        response = client.get("/api/users", params={"fields": "email,password"})
+
+        # Assert
+        assert response.status_code == 400
+        assert "password" in response.json()["detail"]
+
+
+class TestNdjsonExport:
+    def test_every_row_is_one_json_line(self, client):
+        # Act
+        response = client.get("/api/users/export")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["user_id"] for row in rows] == [1, 2, 3, 4, 5]
+        assert rows[0] == {
+            "first_name": "First1",
+            "last_name": "Last1",
+            "email": "user1@example.com",
+            "age": 21,
+            "birth_date": "1990-01-01",
+            "street": "Main Street",
+            "city": "Anytown",
+            "country": "Poland",
+            "user_id": 1,
+        }
+
+    def test_empty_table_exports_an_empty_body(self, client):
+        # Act
+        response = client.get("/api/carts/export")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text == ""
+
+
+def add_user(database_url, user_id):
+    engine = sa.create_engine(database_url)
+    configure_engine(engine)
+    with Session(engine) as session:
+        session.add(make_user(user_id))
+        session.commit()
+    engine.dispose()
+
+
+class TestCachedResponses:
+    def test_response_carries_an_etag(self, client):
+        # Act
+        response = client.get("/api/users")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"0-')
+        assert response.headers["cache-control"] == "no-cache"
+
+    def test_matching_if_none_match_is_answered_with_304(self, client):
+        # Arrange
+        etag = client.get("/api/users").headers["etag"]
+
+        # Act
+        response = client.get("/api/users", headers={"If-None-Match": f"W/{etag}"})
+
+        # Assert
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_stale_if_none_match_gets_the_body(self, client):
+        # Act
+        response = client.get("/api/users", headers={"If-None-Match": '"0-stale"'})
+
+        # Assert
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 5
+
+    def test_body_is_served_from_the_cache_until_the_generation_moves(
+        self, client, database_url, response_cache
+    ):
+        # Arrange
+        first = client.get("/api/users")
+        add_user(database_url, 6)
+
+        # Act
+        cached = client.get("/api/users")
+        response_cache.bump_generation()
+        fresh = client.get("/api/users", headers={"If-None-Match": first.headers["etag"]})
+
+        # Assert
+        assert cached.content == first.content
+        assert cached.headers["etag"] == first.headers["etag"]
+        assert fresh.status_code == 200
+        assert fresh.headers["etag"] != first.headers["etag"]
+        assert [item["user_id"] for item in fresh.json()["items"]] == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.database.sqlite_database import (
+    Base,
+    configure_engine,
+    create_read_engine,
+    create_tables,
+)
+from backend.domain.entities.cart import Cart  # noqa: F401, products_from_carts reference carts
+from backend.domain.entities.product import Product
+from backend.domain.entities.product_from_cart import ProductFromCart
+from backend.domain.entities.user import User  # noqa: F401, carts reference users
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """Fixture for a file database with the schema created through the write engine"""
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine = sa.create_engine(url)
+    configure_engine(engine)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def write_engine(database_url):
+    engine = sa.create_engine(database_url)
+    configure_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def read_engine(database_url):
+    engine = create_read_engine(database_url, pool_size=4)
+    yield engine
+    engine.dispose()
+
+
+def new_product(product_id):
+    return Product(
+        title=f"Product {product_id}",
+        description="Desc",
+        category="Category A",
+        price=1.0,
+        product_id=product_id,
+    )
+
+
+def count_products(read_session):
+    with read_session() as db_session:
+        return db_session.scalar(select(func.count()).select_from(Product))
+
+
+class TestReadEngine:
+    def test_reads_committed_snapshot_while_write_is_in_progress(
+        self, write_engine, read_engine
+    ):
+        # Arrange
+        read_session = sessionmaker(bind=read_engine)
+        with Session(write_engine) as db_session:
+            db_session.add(new_product(1))
+            db_session.commit()
+
+        # Act
+        with write_engine.connect() as connection, connection.begin():
+            etl_session = Session(bind=connection)
+            etl_session.add(new_product(2))
+            etl_session.flush()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                counts_during_write = list(
+                    executor.map(lambda _: count_products(read_session), range(8))
+                )
+
+        # Assert
+        assert counts_during_write == [1] * 8
+
+    def test_rejects_writes(self, read_engine):
+        # Act / Assert
+        with Session(read_engine) as db_session:
+            db_session.add(new_product(1))
+            with pytest.raises(OperationalError):
+                db_session.commit()
+
+
+class TestCreateTables:
+    def test_keeping_tables_swaps_the_retired_cart_id_index(self, write_engine):
+        # Arrange
+        with write_engine.begin() as connection:
+            connection.execute(
+                sa.text(
+                    "DROP INDEX ix_products_from_carts_cart_id_product_id_quantity"
+                )
+            )
+            sa.Index("ix_products_from_carts_cart_id", ProductFromCart.cart_id).create(
+                connection
+            )
+
+        # Act
+        with write_engine.connect() as connection, connection.begin():
+            create_tables(full_refresh=False, bind=connection)
+
+        # Assert
+        indexes = {
+            index["name"]
+            for index in sa.inspect(write_engine).get_indexes("products_from_carts")
+        }
+        assert "ix_products_from_carts_cart_id" not in indexes
+        assert "ix_products_from_carts_cart_id_product_id_quantity" in indexes
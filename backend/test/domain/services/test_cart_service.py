@@ -3,7 +3,7 @@ from unittest.mock import Mock, patch, MagicMock
 
 from backend.domain.services.cart_service import CartService
 from backend.common.models.cart_dto import CartDto
-from backend.domain.entities.cart import Cart
+from backend.common.models.product_from_cart_dto import ProductFromCartDto
 from backend.interfaces.dummy_json_api_interface import DummyJSONApiInterface
 from backend.interfaces.product_from_cart_service_interface import (
     ProductFromCartServiceInterface,
@@ -29,7 +29,16 @@ def mock_dummy_json_api():
 @pytest.fixture
 def mock_product_from_cart_service():
     """Fixture for mocking the product from cart service"""
-    return Mock(spec=ProductFromCartServiceInterface)
+    service = Mock(spec=ProductFromCartServiceInterface)
+    service.transform_products_from_cart.side_effect = lambda cart, cart_dto: [
+        ProductFromCartDto(
+            cart_id=cart_dto.cart_id,
+            product_id=product["id"],
+            quantity=product["quantity"],
+        )
+        for product in cart.get("products", [])
+    ]
+    return service
 
 
 @pytest.fixture
@@ -40,19 +49,32 @@ def cart_service(mock_db_session, mock_dummy_json_api, mock_product_from_cart_se
     )
 
 
+@pytest.fixture(autouse=True)
+def mock_txt_file_sink():
+    """Fixture for mocking the txt and export file sink, so tests never write files"""
+    with patch("backend.domain.services.cart_service.ResultSink") as sink:
+        yield sink.return_value
+
+
+def written_to_txt(mock_txt_file_sink):
+    return [
+        dto
+        for call in mock_txt_file_sink.write_all.call_args_list
+        for dto in call.args[0]
+    ]
+
+
 class TestGetAllCarts:
     def test_get_all_carts_returns_converted_dtos(self, cart_service, mock_db_session):
         # Arrange
-        cart1 = Cart(cart_id=1, user_id=101)
-        cart2 = Cart(cart_id=2, user_id=102)
-
-        mock_db_session.query.return_value.all.return_value = [cart1, cart2]
+        # Rows come back with the CartDto columns in field order
+        mock_db_session.execute.return_value.all.return_value = [(1, 101), (2, 102)]
 
         # Act
         result = cart_service.get_all_carts()
 
         # Assert
-        mock_db_session.query.assert_called_once_with(Cart)
+        mock_db_session.execute.assert_called_once()
         assert len(result) == 2
         assert all(isinstance(cart, CartDto) for cart in result)
         assert result[0].cart_id == 1
@@ -64,13 +86,13 @@ class TestGetAllCarts:
         self, cart_service, mock_db_session
     ):
         # Arrange
-        mock_db_session.query.return_value.all.return_value = []
+        mock_db_session.execute.return_value.all.return_value = []
 
         # Act
         result = cart_service.get_all_carts()
 
         # Assert
-        mock_db_session.query.assert_called_once_with(Cart)
+        mock_db_session.execute.assert_called_once()
         assert len(result) == 0
 
 
@@ -83,27 +105,35 @@ class TestProcessCarts:
         mock_dummy_json_api,
         mock_db_session,
         mock_product_from_cart_service,
+        mock_txt_file_sink,
     ):
         # Arrange
-        cart_json = {"id": 1, "userId": 101}
+        cart_json = {"id": 1, "userId": 101, "products": [{"id": 10, "quantity": 2}]}
         mock_dummy_json_api.get_carts.return_value = [[cart_json]]
 
-        mock_db_session.query.return_value.filter.return_value.count.return_value = 0
+        # Bulk insert reports the cart as newly inserted
+        mock_db_session.scalars.return_value.all.return_value = [1]
 
         # Act
         cart_service.process_carts()
 
         # Assert
-        mock_db_session.query.assert_called_with(Cart)
-        mock_db_session.query.return_value.filter.assert_called_once()
-        mock_db_session.add.assert_called_once()
+        mock_db_session.scalars.assert_called_once()
+        inserted_rows = mock_db_session.scalars.call_args.args[1]
+        assert inserted_rows == [{"cart_id": 1, "user_id": 101}]
+        mock_db_session.query.assert_not_called()
         mock_db_session.commit.assert_called_once()
-        mock_file_util.save_result_to_txt_file.assert_called_once_with(
-            "carts.txt", CartDto(cart_id=1, user_id=101)
-        )
-        mock_product_from_cart_service.process_products_from_carts.assert_called_once_with(
+        assert written_to_txt(mock_txt_file_sink) == [CartDto(cart_id=1, user_id=101)]
+        mock_txt_file_sink.close.assert_called_once()
+        product_from_cart_service = mock_product_from_cart_service
+        product_from_cart_service.finish_products_from_carts_processing.assert_called()
+        mock_product_from_cart_service.transform_products_from_cart.assert_called_once_with(
             cart_json, CartDto(cart_id=1, user_id=101)
         )
+        mock_product_from_cart_service.load_products_from_carts.assert_called_once_with(
+            [ProductFromCartDto(cart_id=1, product_id=10, quantity=2)],
+            replaced_cart_ids=[],
+        )
 
     @patch("backend.domain.services.cart_service.FileUtil")
     def test_process_existing_cart(
@@ -113,24 +143,27 @@ class TestProcessCarts:
         mock_dummy_json_api,
         mock_db_session,
         mock_product_from_cart_service,
+        mock_txt_file_sink,
     ):
         # Arrange
         cart_json = {"id": 1, "userId": 101}
         mock_dummy_json_api.get_carts.return_value = [[cart_json]]
 
-        # Set up session to indicate cart exists
-        mock_db_session.query.return_value.filter.return_value.count.return_value = 1
+        # The existing keys index is preloaded with the cart ID
+        mock_db_session.execute.return_value.scalars.return_value = [1]
 
         # Act
         cart_service.process_carts()
 
         # Assert
-        mock_db_session.query.assert_called_with(Cart)
-        mock_db_session.query.return_value.filter.assert_called_once()
+        # The existing keys index and the dump of existing rows read once each
+        assert mock_db_session.execute.call_count == 2
+        mock_db_session.scalars.assert_not_called()
         mock_db_session.add.assert_not_called()
         mock_db_session.commit.assert_not_called()
-        mock_file_util.save_result_to_txt_file.assert_not_called()
-        mock_product_from_cart_service.process_products_from_carts.assert_not_called()
+        mock_txt_file_sink.write_all.assert_not_called()
+        mock_product_from_cart_service.transform_products_from_cart.assert_not_called()
+        mock_product_from_cart_service.load_products_from_carts.assert_not_called()
 
     @patch("backend.domain.services.cart_service.FileUtil")
     def test_process_multiple_cart_batches(
@@ -140,6 +173,7 @@ class TestProcessCarts:
         mock_dummy_json_api,
         mock_db_session,
         mock_product_from_cart_service,
+        mock_txt_file_sink,
     ):
         # Arrange
         cart1_json = {"id": 1, "userId": 101}
@@ -149,21 +183,53 @@ class TestProcessCarts:
         mock_dummy_json_api.get_carts.return_value = [batch1, batch2]
 
         # First cart doesn't exist, second cart exists
-        mock_db_session.query.return_value.filter.return_value.count.side_effect = [
-            0,
-            1,
-        ]
+        mock_db_session.execute.return_value.scalars.return_value = [2]
+        mock_db_session.scalars.return_value.all.return_value = [1]
 
         # Act
         cart_service.process_carts()
 
         # Assert
-        assert mock_db_session.query.return_value.filter.call_count == 2
-        assert mock_db_session.add.call_count == 1
+        assert mock_db_session.scalars.call_count == 1
         assert mock_db_session.commit.call_count == 1
-        assert mock_file_util.save_result_to_txt_file.call_count == 1
-        assert (
-            mock_product_from_cart_service.process_products_from_carts.call_count == 1
+        assert len(written_to_txt(mock_txt_file_sink)) == 1
+        assert mock_product_from_cart_service.load_products_from_carts.call_count == 1
+
+    @patch("backend.domain.services.cart_service.FileUtil")
+    def test_process_batch_writes_all_carts_in_one_transaction(
+        self,
+        mock_file_util,
+        cart_service,
+        mock_dummy_json_api,
+        mock_db_session,
+        mock_product_from_cart_service,
+        mock_txt_file_sink,
+    ):
+        # Arrange
+        carts_json = [
+            {
+                "id": cart_id,
+                "userId": 100 + cart_id,
+                "products": [{"id": 10 * cart_id, "quantity": 1}],
+            }
+            for cart_id in (1, 2, 3)
+        ]
+        mock_dummy_json_api.get_carts.return_value = [carts_json]
+        mock_db_session.scalars.return_value.all.return_value = [1, 3]
+
+        # Act
+        cart_service.process_carts()
+
+        # Assert
+        mock_db_session.scalars.assert_called_once()
+        mock_db_session.commit.assert_called_once()
+        assert len(written_to_txt(mock_txt_file_sink)) == 2
+        mock_product_from_cart_service.load_products_from_carts.assert_called_once_with(
+            [
+                ProductFromCartDto(cart_id=1, product_id=10, quantity=1),
+                ProductFromCartDto(cart_id=3, product_id=30, quantity=1),
+            ],
+            replaced_cart_ids=[],
         )
 
     @patch("backend.domain.services.cart_service.FileUtil")
@@ -174,6 +240,7 @@ class TestProcessCarts:
         mock_dummy_json_api,
         mock_db_session,
         mock_product_from_cart_service,
+        mock_txt_file_sink,
     ):
         # Arrange
         mock_dummy_json_api.get_carts.return_value = [[]]
@@ -183,13 +250,15 @@ class TestProcessCarts:
 
         # Assert
         mock_file_util.clean_txt_file_before_processing.assert_any_call("carts.txt")
-        mock_file_util.clean_txt_file_before_processing.assert_any_call(
-            "products_from_carts.txt"
+        prepare_products_from_carts = (
+            mock_product_from_cart_service.prepare_products_from_carts_processing
         )
+        prepare_products_from_carts.assert_called_once_with(False)
         mock_dummy_json_api.get_carts.assert_called_once()
         mock_db_session.query.assert_not_called()
-        mock_db_session.query.return_value.filter.assert_not_called()
+        mock_db_session.scalars.assert_not_called()
         mock_db_session.add.assert_not_called()
         mock_db_session.commit.assert_not_called()
-        mock_file_util.save_result_to_txt_file.assert_not_called()
-        mock_product_from_cart_service.process_products_from_carts.assert_not_called()
+        mock_txt_file_sink.write_all.assert_not_called()
+        mock_product_from_cart_service.transform_products_from_cart.assert_not_called()
+        mock_product_from_cart_service.load_products_from_carts.assert_not_called()
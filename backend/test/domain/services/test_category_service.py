@@ -0,0 +1,146 @@
+from unittest.mock import patch
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+from backend.common.models.most_ordered_category_dto import MostOrderedCategoryDto
+from backend.database.sqlite_database import Base
+from backend.domain.entities.cart import Cart
+from backend.domain.entities.product import Product
+from backend.domain.entities.product_from_cart import ProductFromCart
+from backend.domain.entities.user import User  # noqa: F401, carts reference users
+from backend.domain.services.category_service import CategoryService
+
+
+@pytest.fixture
+def db_session():
+    """Fixture for an in-memory database with products in categories A, B and C"""
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    with session:
+        session.add_all(
+            Product(
+                title=f"Product {product_id}",
+                description="Desc",
+                category=category,
+                price=1.0,
+                product_id=product_id,
+            )
+            for product_id, category in ((1, "A"), (2, "B"), (3, "C"))
+        )
+        session.commit()
+    return session
+
+
+@pytest.fixture
+def category_service(db_session):
+    return CategoryService(db_session)
+
+
+@pytest.fixture(autouse=True)
+def mock_result_sink():
+    """Fixture for mocking the txt and export file sink, so tests never write files"""
+    with patch("backend.domain.services.category_service.ResultSink") as sink, patch(
+        "backend.domain.services.category_service.FileUtil"
+    ):
+        yield sink.return_value.__enter__.return_value
+
+
+def add_cart(db_session, cart_id, user_id, quantities):
+    with db_session:
+        db_session.add(Cart(cart_id=cart_id, user_id=user_id))
+        db_session.add_all(
+            ProductFromCart(cart_id=cart_id, product_id=product_id, quantity=quantity)
+            for product_id, quantity in quantities.items()
+        )
+        db_session.commit()
+
+
+class TestMostOrderedCategory:
+    def test_rebuild_keeps_every_tied_category(self, db_session, category_service):
+        # Arrange
+        add_cart(db_session, 1, 10, {1: 2, 2: 5})
+        add_cart(db_session, 2, 10, {1: 3})
+        add_cart(db_session, 3, 20, {3: 1})
+
+        # Act
+        result = category_service.refresh_most_ordered_categories(rebuild_totals=True)
+
+        # Assert
+        assert result == [
+            MostOrderedCategoryDto(user_id=10, category_name="A", total_orders=5),
+            MostOrderedCategoryDto(user_id=10, category_name="B", total_orders=5),
+            MostOrderedCategoryDto(user_id=20, category_name="C", total_orders=1),
+        ]
+
+    def test_rank_keeps_ties_for_first_only(self, db_session, category_service):
+        # Arrange
+        # User 10 ties three ways for first, user 20 ties B and C behind A
+        add_cart(db_session, 1, 10, {1: 5, 2: 5, 3: 5})
+        add_cart(db_session, 2, 20, {1: 4, 2: 2, 3: 2})
+
+        # Act
+        rebuilt = category_service.refresh_most_ordered_categories(rebuild_totals=True)
+        add_cart(db_session, 3, 20, {3: 2})
+        category_service.add_to_category_totals([3])
+        topped_up = category_service.refresh_most_ordered_categories()
+
+        # Assert
+        assert rebuilt == [
+            MostOrderedCategoryDto(user_id=10, category_name="A", total_orders=5),
+            MostOrderedCategoryDto(user_id=10, category_name="B", total_orders=5),
+            MostOrderedCategoryDto(user_id=10, category_name="C", total_orders=5),
+            MostOrderedCategoryDto(user_id=20, category_name="A", total_orders=4),
+        ]
+        # C catches up with A, both now rank first for user 20
+        assert topped_up[3:] == [
+            MostOrderedCategoryDto(user_id=20, category_name="A", total_orders=4),
+            MostOrderedCategoryDto(user_id=20, category_name="C", total_orders=4),
+        ]
+
+    def test_incremental_totals_match_rebuild(self, db_session, category_service):
+        # Arrange
+        add_cart(db_session, 1, 10, {1: 2, 2: 1})
+        category_service.refresh_most_ordered_categories(rebuild_totals=True)
+
+        # Act
+        add_cart(db_session, 2, 10, {2: 4})
+        add_cart(db_session, 3, 20, {3: 1})
+        category_service.add_to_category_totals([2, 3])
+        incremental = category_service.refresh_most_ordered_categories()
+        rebuilt = category_service.refresh_most_ordered_categories(rebuild_totals=True)
+
+        # Assert
+        assert incremental == rebuilt
+        assert incremental[0] == MostOrderedCategoryDto(
+            user_id=10, category_name="B", total_orders=5
+        )
+
+    def test_get_reads_materialized_rows_only(self, db_session, category_service):
+        # Arrange
+        add_cart(db_session, 1, 10, {1: 2})
+        category_service.refresh_most_ordered_categories(rebuild_totals=True)
+        add_cart(db_session, 2, 10, {2: 4})
+
+        # Act
+        result = category_service.get_most_ordered_category()
+
+        # Assert
+        assert result == [
+            MostOrderedCategoryDto(user_id=10, category_name="A", total_orders=2)
+        ]
+
+    def test_refresh_writes_result_file(
+        self, db_session, category_service, mock_result_sink
+    ):
+        # Arrange
+        add_cart(db_session, 1, 10, {1: 2})
+
+        # Act
+        result = category_service.refresh_most_ordered_categories(rebuild_totals=True)
+
+        # Assert
+        mock_result_sink.write_all.assert_called_once_with(result)
+        assert category_service.has_category_totals()
@@ -3,7 +3,6 @@ from unittest.mock import MagicMock, patch
 
 from backend.domain.services.product_from_cart_service import ProductFromCartService
 from backend.common.models.product_from_cart_dto import ProductFromCartDto
-from backend.domain.entities.product_from_cart import ProductFromCart
 from backend.common.models.cart_dto import CartDto
 
 
@@ -20,20 +19,34 @@ def product_from_cart_service(mock_db_session):
     return ProductFromCartService(mock_db_session)
 
 
+@pytest.fixture(autouse=True)
+def mock_txt_file_sink():
+    """Fixture for mocking the txt and export file sink, so tests never write files"""
+    with patch("backend.domain.services.product_from_cart_service.ResultSink") as sink:
+        yield sink.return_value
+
+
+def written_to_txt(mock_txt_file_sink):
+    return [
+        dto
+        for call in mock_txt_file_sink.write_all.call_args_list
+        for dto in call.args[0]
+    ]
+
+
 class TestGetBoughtProductsFromCarts:
     def test_get_bought_products_from_carts_returns_converted_dtos(
         self, product_from_cart_service, mock_db_session
     ):
         # Arrange
-        product1 = ProductFromCart(cart_id=1, product_id=10, quantity=2)
-        product2 = ProductFromCart(cart_id=2, product_id=20, quantity=5)
-        mock_db_session.query.return_value.all.return_value = [product1, product2]
+        # Rows come back with the ProductFromCartDto columns in field order
+        mock_db_session.execute.return_value.all.return_value = [(1, 10, 2), (2, 20, 5)]
 
         # Act
         result = product_from_cart_service.get_bought_products_from_carts()
 
         # Assert
-        mock_db_session.query.assert_called_once_with(ProductFromCart)
+        mock_db_session.execute.assert_called_once()
         assert len(result) == 2
         assert all(isinstance(prod, ProductFromCartDto) for prod in result)
         assert result[0].cart_id == 1
@@ -47,21 +60,18 @@ class TestGetBoughtProductsFromCarts:
         self, product_from_cart_service, mock_db_session
     ):
         # Arrange
-        mock_db_session.query.return_value.all.return_value = []
+        mock_db_session.execute.return_value.all.return_value = []
 
         # Act
         result = product_from_cart_service.get_bought_products_from_carts()
 
         # Assert
-        mock_db_session.query.assert_called_once_with(ProductFromCart)
+        mock_db_session.execute.assert_called_once()
         assert len(result) == 0
 
 
-class TestProcessProductsFromCarts:
-    @patch("backend.domain.services.product_from_cart_service.FileUtil")
-    def test_process_products_from_carts_adds_new_products(
-        self, mock_file_util, product_from_cart_service, mock_db_session
-    ):
+class TestTransformProductsFromCart:
+    def test_transform_products_from_cart_builds_dtos(self, product_from_cart_service):
         # Arrange
         cart = {
             "id": 1,
@@ -73,55 +83,108 @@ class TestProcessProductsFromCarts:
         cart_dto = CartDto(cart_id=1, user_id=123)
 
         # Act
-        product_from_cart_service.process_products_from_carts(cart, cart_dto)
+        result = product_from_cart_service.transform_products_from_cart(cart, cart_dto)
 
         # Assert
-        assert mock_db_session.add.call_count == 2
-        assert mock_db_session.commit.call_count == 2
-        assert mock_file_util.save_result_to_txt_file.call_count == 2
-        calls = [
-            (
-                "products_from_carts.txt",
-                ProductFromCartDto(cart_id=1, product_id=10, quantity=2),
-            ),
-            (
-                "products_from_carts.txt",
-                ProductFromCartDto(cart_id=1, product_id=20, quantity=5),
-            ),
-        ]
-        actual_calls = [
-            call.args for call in mock_file_util.save_result_to_txt_file.call_args_list
+        assert result == [
+            ProductFromCartDto(cart_id=1, product_id=10, quantity=2),
+            ProductFromCartDto(cart_id=1, product_id=20, quantity=5),
         ]
-        assert actual_calls == calls
 
-    @patch("backend.domain.services.product_from_cart_service.FileUtil")
-    def test_process_products_from_carts_with_no_products(
-        self, mock_file_util, product_from_cart_service, mock_db_session
+    def test_transform_products_from_cart_with_no_products(
+        self, product_from_cart_service
     ):
         # Arrange
         cart = {"id": 1, "products": []}
         cart_dto = CartDto(cart_id=1, user_id=123)
 
         # Act
-        product_from_cart_service.process_products_from_carts(cart, cart_dto)
+        result = product_from_cart_service.transform_products_from_cart(cart, cart_dto)
 
         # Assert
-        mock_db_session.add.assert_not_called()
-        mock_db_session.commit.assert_not_called()
-        mock_file_util.save_result_to_txt_file.assert_not_called()
+        assert result == []
 
-    @patch("backend.domain.services.product_from_cart_service.FileUtil")
-    def test_process_products_from_carts_with_missing_products_key(
-        self, mock_file_util, product_from_cart_service, mock_db_session
+    def test_transform_products_from_cart_with_missing_products_key(
+        self, product_from_cart_service
     ):
         # Arrange
         cart = {"id": 1}
         cart_dto = CartDto(cart_id=1, user_id=123)
 
         # Act
-        product_from_cart_service.process_products_from_carts(cart, cart_dto)
+        result = product_from_cart_service.transform_products_from_cart(cart, cart_dto)
+
+        # Assert
+        assert result == []
+
+
+class TestLoadProductsFromCarts:
+    def test_load_products_from_carts_adds_new_products(
+        self, product_from_cart_service, mock_db_session, mock_txt_file_sink
+    ):
+        # Arrange
+        products_dtos = [
+            ProductFromCartDto(cart_id=1, product_id=10, quantity=2),
+            ProductFromCartDto(cart_id=2, product_id=20, quantity=5),
+        ]
+
+        # Act
+        result = product_from_cart_service.load_products_from_carts(products_dtos)
 
         # Assert
+        mock_db_session.execute.assert_called_once()
+        assert mock_db_session.execute.call_args.args[1] == [
+            {"cart_id": 1, "product_id": 10, "quantity": 2},
+            {"cart_id": 2, "product_id": 20, "quantity": 5},
+        ]
         mock_db_session.add.assert_not_called()
+        mock_db_session.commit.assert_called_once()
+        assert result.inserted == 2
+        mock_txt_file_sink.write_all.assert_called_once_with(products_dtos)
+        mock_txt_file_sink.flush.assert_called_once()
+
+    def test_load_products_from_carts_with_no_products(
+        self, product_from_cart_service, mock_db_session, mock_txt_file_sink
+    ):
+        # Act
+        result = product_from_cart_service.load_products_from_carts([])
+
+        # Assert
+        mock_db_session.execute.assert_not_called()
         mock_db_session.commit.assert_not_called()
-        mock_file_util.save_result_to_txt_file.assert_not_called()
+        mock_txt_file_sink.write_all.assert_not_called()
+        assert result.inserted == 0
+
+    def test_load_products_from_carts_adds_to_category_totals(
+        self, mock_db_session, mock_txt_file_sink
+    ):
+        # Arrange
+        category_service = MagicMock()
+        product_from_cart_service = ProductFromCartService(
+            mock_db_session, category_service
+        )
+
+        # Act
+        product_from_cart_service.load_products_from_carts(
+            [
+                ProductFromCartDto(cart_id=1, product_id=10, quantity=2),
+                ProductFromCartDto(cart_id=1, product_id=20, quantity=1),
+            ]
+        )
+
+        # Assert
+        category_service.add_to_category_totals.assert_called_once_with({1})
+
+    def test_finish_closes_txt_file(
+        self, product_from_cart_service, mock_txt_file_sink
+    ):
+        # Arrange
+        product_from_cart_service.load_products_from_carts(
+            [ProductFromCartDto(cart_id=1, product_id=10, quantity=2)]
+        )
+
+        # Act
+        product_from_cart_service.finish_products_from_carts_processing()
+
+        # Assert
+        mock_txt_file_sink.close.assert_called_once()
@@ -4,7 +4,6 @@ import math
 
 from backend.domain.services.product_service import ProductService
 from backend.common.models.product_dto import ProductDto
-from backend.domain.entities.product import Product
 from backend.interfaces.dummy_json_api_interface import DummyJSONApiInterface
 
 
@@ -26,32 +25,37 @@ def product_service(mock_db_session, mock_dummy_json_api):
     return ProductService(mock_dummy_json_api, mock_db_session)
 
 
+@pytest.fixture(autouse=True)
+def mock_txt_file_sink():
+    """Fixture for mocking the txt and export file sink, so tests never write files"""
+    with patch("backend.domain.services.product_service.ResultSink") as sink:
+        yield sink.return_value
+
+
+def written_to_txt(mock_txt_file_sink):
+    return [
+        dto
+        for call in mock_txt_file_sink.write_all.call_args_list
+        for dto in call.args[0]
+    ]
+
+
 class TestGetAllProducts:
     def test_get_all_products_returns_converted_dtos(
         self, product_service, mock_db_session
     ):
         # Arrange
-        product1 = Product(
-            title="Product 1",
-            price=10.5,
-            category="Category A",
-            description="Desc 1",
-            product_id=1,
-        )
-        product2 = Product(
-            title="Product 2",
-            price=20.0,
-            category="Category B",
-            description="Desc 2",
-            product_id=2,
-        )
-        mock_db_session.query.return_value.all.return_value = [product1, product2]
+        # Rows come back with the ProductDto columns in field order
+        mock_db_session.execute.return_value.all.return_value = [
+            ("Product 1", "Desc 1", "Category A", 10.5, 1),
+            ("Product 2", "Desc 2", "Category B", 20.0, 2),
+        ]
 
         # Act
         result = product_service.get_all_products()
 
         # Assert
-        mock_db_session.query.assert_called_once_with(Product)
+        mock_db_session.execute.assert_called_once()
         assert len(result) == 2
         assert all(isinstance(prod, ProductDto) for prod in result)
         assert result[0].title == "Product 1"
@@ -69,20 +73,25 @@ class TestGetAllProducts:
         self, product_service, mock_db_session
     ):
         # Arrange
-        mock_db_session.query.return_value.all.return_value = []
+        mock_db_session.execute.return_value.all.return_value = []
 
         # Act
         result = product_service.get_all_products()
 
         # Assert
-        mock_db_session.query.assert_called_once_with(Product)
+        mock_db_session.execute.assert_called_once()
         assert len(result) == 0
 
 
 class TestProcessProducts:
     @patch("backend.domain.services.product_service.FileUtil")
     def test_process_new_product(
-        self, mock_file_util, product_service, mock_dummy_json_api, mock_db_session
+        self,
+        mock_file_util,
+        product_service,
+        mock_dummy_json_api,
+        mock_db_session,
+        mock_txt_file_sink,
     ):
         # Arrange
         product_json = {
@@ -93,7 +102,7 @@ class TestProcessProducts:
             "description": "Desc 1",
         }
         mock_dummy_json_api.get_products.return_value = [[product_json]]
-        mock_db_session.query.return_value.filter.return_value.count.return_value = 0
+        mock_db_session.scalars.return_value.all.return_value = [1]
 
         # Act
         product_service.process_products()
@@ -106,18 +115,20 @@ class TestProcessProducts:
             description="Desc 1",
             product_id=1,
         )
-        mock_db_session.query.assert_called_with(Product)
-        mock_db_session.query.return_value.filter.assert_called_once()
-        mock_db_session.query.return_value.filter.return_value.count.assert_called_once()
-        mock_db_session.add.assert_called_once()
+        mock_db_session.scalars.assert_called_once()
+        assert mock_db_session.scalars.call_args.args[1] == [product_dto.model_dump()]
+        mock_db_session.query.assert_not_called()
         mock_db_session.commit.assert_called_once()
-        mock_file_util.save_result_to_txt_file.assert_called_once_with(
-            "products.txt", product_dto
-        )
+        assert written_to_txt(mock_txt_file_sink) == [product_dto]
 
     @patch("backend.domain.services.product_service.FileUtil")
     def test_process_existing_product(
-        self, mock_file_util, product_service, mock_dummy_json_api, mock_db_session
+        self,
+        mock_file_util,
+        product_service,
+        mock_dummy_json_api,
+        mock_db_session,
+        mock_txt_file_sink,
     ):
         # Arrange
         product_json = {
@@ -128,22 +139,28 @@ class TestProcessProducts:
             "description": "Desc 1",
         }
         mock_dummy_json_api.get_products.return_value = [[product_json]]
-        mock_db_session.query.return_value.filter.return_value.count.return_value = 1
+        # The existing keys index is preloaded with the product ID
+        mock_db_session.execute.return_value.scalars.return_value = [1]
 
         # Act
         product_service.process_products()
 
         # Assert
-        mock_db_session.query.assert_called_with(Product)
-        mock_db_session.query.return_value.filter.assert_called_once()
-        mock_db_session.query.return_value.filter.return_value.count.assert_called_once()
+        # The existing keys index and the dump of existing rows read once each
+        assert mock_db_session.execute.call_count == 2
+        mock_db_session.scalars.assert_not_called()
         mock_db_session.add.assert_not_called()
         mock_db_session.commit.assert_not_called()
-        mock_file_util.save_result_to_txt_file.assert_not_called()
+        mock_txt_file_sink.write_all.assert_not_called()
 
     @patch("backend.domain.services.product_service.FileUtil")
     def test_process_multiple_product_batches(
-        self, mock_file_util, product_service, mock_dummy_json_api, mock_db_session
+        self,
+        mock_file_util,
+        product_service,
+        mock_dummy_json_api,
+        mock_db_session,
+        mock_txt_file_sink,
     ):
         # Arrange
         product1_json = {
@@ -163,23 +180,24 @@ class TestProcessProducts:
         batch1 = [product1_json]
         batch2 = [product2_json]
         mock_dummy_json_api.get_products.return_value = [batch1, batch2]
-        mock_db_session.query.return_value.filter.return_value.count.side_effect = [
-            0,
-            0,
-        ]
+        mock_db_session.scalars.return_value.all.side_effect = [[1], [2]]
 
         # Act
         product_service.process_products()
 
         # Assert
-        assert mock_db_session.query.return_value.filter.call_count == 2
-        assert mock_db_session.add.call_count == 2
+        assert mock_db_session.scalars.call_count == 2
         assert mock_db_session.commit.call_count == 2
-        assert mock_file_util.save_result_to_txt_file.call_count == 2
+        assert len(written_to_txt(mock_txt_file_sink)) == 2
 
     @patch("backend.domain.services.product_service.FileUtil")
     def test_process_empty_batch(
-        self, mock_file_util, product_service, mock_dummy_json_api, mock_db_session
+        self,
+        mock_file_util,
+        product_service,
+        mock_dummy_json_api,
+        mock_db_session,
+        mock_txt_file_sink,
     ):
         # Arrange
         mock_dummy_json_api.get_products.return_value = [[]]
@@ -191,7 +209,46 @@ class TestProcessProducts:
         mock_file_util.clean_txt_file_before_processing.assert_any_call("products.txt")
         mock_dummy_json_api.get_products.assert_called_once()
         mock_db_session.query.assert_not_called()
-        mock_db_session.query.return_value.filter.assert_not_called()
+        mock_db_session.scalars.assert_not_called()
         mock_db_session.add.assert_not_called()
         mock_db_session.commit.assert_not_called()
-        mock_file_util.save_result_to_txt_file.assert_not_called()
+        mock_txt_file_sink.write_all.assert_not_called()
+
+
+class TestUpdateExistingProducts:
+    @patch("backend.domain.services.product_service.FileUtil")
+    def test_existing_product_is_upserted(
+        self,
+        mock_file_util,
+        product_service,
+        mock_db_session,
+        mock_txt_file_sink,
+    ):
+        # Arrange
+        product_json = {
+            "id": 1,
+            "title": "Product 1 renamed",
+            "price": 12.0,
+            "category": "Category A",
+            "description": "Desc 1",
+        }
+        new_product_json = {**product_json, "id": 2, "title": "Product 2"}
+        mock_db_session.execute.return_value.scalars.return_value = [1]
+        mock_db_session.scalars.return_value.all.return_value = [1, 2]
+
+        # Act
+        product_service.prepare_products_processing(update_existing=True)
+        products_dtos = product_service.transform_products_batch(
+            [product_json, new_product_json]
+        )
+        load_result = product_service.load_products_batch(products_dtos)
+
+        # Assert
+        assert [product_dto.product_id for product_dto in products_dtos] == [1, 2]
+        statement = mock_db_session.scalars.call_args.args[0]
+        assert "ON CONFLICT (product_id) DO UPDATE" in str(statement)
+        assert load_result.inserted == 1
+        assert load_result.updated == 1
+        assert load_result.skipped == 0
+        mock_db_session.commit.assert_called_once()
+        assert len(written_to_txt(mock_txt_file_sink)) == 2
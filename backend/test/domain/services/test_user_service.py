@@ -1,11 +1,19 @@
+from functools import partial
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
+import sqlalchemy as sa
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 
 from backend.common.models.user_dto import UserDto
+from backend.common.utils.existing_keys_index import ExistingKeysIndex
+from backend.database.sqlite_database import Base
 from backend.domain.entities.user import User
+from backend.domain.services import user_service as user_service_module
 from backend.domain.services.user_service import UserService
 from backend.interfaces.dummy_json_api_interface import DummyJSONApiInterface
+from backend.pipeline.etl_pipeline import EtlPipeline
 
 
 @pytest.fixture
@@ -30,40 +38,55 @@ def user_service(mock_db_session, mock_dummy_json_api):
     return UserService(mock_dummy_json_api, mock_db_session)
 
 
+@pytest.fixture(autouse=True)
+def mock_txt_file_sink():
+    """Fixture for mocking the txt and export file sink, so tests never write files"""
+    with patch("backend.domain.services.user_service.ResultSink") as sink:
+        yield sink.return_value
+
+
+def written_to_txt(mock_txt_file_sink):
+    return [
+        dto
+        for call in mock_txt_file_sink.write_all.call_args_list
+        for dto in call.args[0]
+    ]
+
+
 class TestGetAllUsers:
     def test_get_all_users_returns_converted_dtos(self, user_service, mock_db_session):
         # Arrange
-        user1 = User(
-            first_name="John",
-            last_name="Doe",
-            email="example@email.com",
-            age=30,
-            birth_date="1995-01-01",
-            street="123 Main St",
-            city="Anytown",
-            country="USA",
-            user_id=234,
-        )
-
-        user2 = User(
-            first_name="Amy",
-            last_name="Black",
-            email="myexample@email.com",
-            age=25,
-            birth_date="2000-07-17",
-            street="My Normal St",
-            city="Big City",
-            country="Hungary",
-            user_id=12,
-        )
-
-        mock_db_session.query.return_value.all.return_value = [user1, user2]
+        # Rows come back with the UserDto columns in field order
+        mock_db_session.execute.return_value.all.return_value = [
+            (
+                "John",
+                "Doe",
+                "example@email.com",
+                30,
+                "1995-01-01",
+                "123 Main St",
+                "Anytown",
+                "USA",
+                234,
+            ),
+            (
+                "Amy",
+                "Black",
+                "myexample@email.com",
+                25,
+                "2000-07-17",
+                "My Normal St",
+                "Big City",
+                "Hungary",
+                12,
+            ),
+        ]
 
         # Act
         result = user_service.get_all_users()
 
         # Assert
-        mock_db_session.query.assert_called_once_with(User)
+        mock_db_session.execute.assert_called_once()
         assert len(result) == 2
         assert all(isinstance(user, UserDto) for user in result)
         assert result[0].first_name == "John"
@@ -89,13 +112,13 @@ class TestGetAllUsers:
         self, user_service, mock_db_session
     ):
         # Arrange
-        mock_db_session.query.return_value.all.return_value = []
+        mock_db_session.execute.return_value.all.return_value = []
 
         # Act
         result = user_service.get_all_users()
 
         # Assert
-        mock_db_session.query.assert_called_once_with(User)
+        mock_db_session.execute.assert_called_once()
         assert len(result) == 0
 
 
@@ -109,6 +132,7 @@ class TestProcessUsers:
         user_service,
         mock_dummy_json_api,
         mock_db_session,
+        mock_txt_file_sink,
     ):
         # Arrange
         user_json = {
@@ -125,9 +149,9 @@ class TestProcessUsers:
             },
         }
         mock_dummy_json_api.get_users.return_value = [[user_json]]
-        mock_coordinates_util.get_country_by_coordinates.return_value = "USA"
+        mock_coordinates_util.get_countries_by_coordinates.return_value = ["USA"]
 
-        mock_db_session.query.return_value.filter.return_value.count.return_value = 0
+        mock_db_session.scalars.return_value.all.return_value = ["example@email.com"]
 
         # Act
         user_service.process_users()
@@ -145,16 +169,13 @@ class TestProcessUsers:
             user_id=1,
         )
 
-        mock_db_session.query.assert_called_with(User)
-        mock_db_session.query.return_value.filter.assert_called_once()
-        mock_db_session.query.return_value.filter.return_value.count.assert_called_once()
-        mock_db_session.add.assert_called_once()
+        mock_db_session.scalars.assert_called_once()
+        assert mock_db_session.scalars.call_args.args[1] == [user_dto.model_dump()]
+        mock_db_session.query.assert_not_called()
         mock_db_session.commit.assert_called_once()
-        mock_file_util.save_result_to_txt_file.assert_called_once_with(
-            "users.txt", user_dto
-        )
-        mock_coordinates_util.get_country_by_coordinates.assert_called_once_with(
-            "40.7128", "-74.0060"
+        assert written_to_txt(mock_txt_file_sink) == [user_dto]
+        mock_coordinates_util.get_countries_by_coordinates.assert_called_once_with(
+            [("40.7128", "-74.0060")]
         )
 
     @patch("backend.domain.services.user_service.FileUtil")
@@ -166,6 +187,7 @@ class TestProcessUsers:
         user_service,
         mock_dummy_json_api,
         mock_db_session,
+        mock_txt_file_sink,
     ):
         # Arrange
         user_json = {
@@ -182,21 +204,24 @@ class TestProcessUsers:
             },
         }
         mock_dummy_json_api.get_users.return_value = [[user_json]]
-        mock_coordinates_util.get_country_by_coordinates.return_value = "USA"
+        mock_coordinates_util.get_countries_by_coordinates.return_value = ["USA"]
 
-        mock_db_session.query.return_value.filter.return_value.count.return_value = 1
+        # The existing keys index is preloaded with the user's email
+        mock_db_session.execute.return_value.scalars.return_value = [
+            "example@email.com"
+        ]
 
         # Act
         user_service.process_users()
 
         # Assert
-        mock_db_session.query.assert_called_with(User)
-        mock_db_session.query.return_value.filter.assert_called_once()
-        mock_db_session.query.return_value.filter.return_value.count.assert_called_once()
+        # The existing keys index and the dump of existing rows read once each
+        assert mock_db_session.execute.call_count == 2
+        mock_db_session.scalars.assert_not_called()
         mock_db_session.add.assert_not_called()
         mock_db_session.commit.assert_not_called()
-        mock_file_util.save_result_to_txt_file.assert_not_called()
-        mock_coordinates_util.get_country_by_coordinates.assert_not_called()
+        mock_txt_file_sink.write_all.assert_not_called()
+        mock_coordinates_util.get_countries_by_coordinates.assert_not_called()
 
     @patch("backend.domain.services.user_service.FileUtil")
     @patch("backend.domain.services.user_service.CoordinatesUtil")
@@ -207,6 +232,7 @@ class TestProcessUsers:
         user_service,
         mock_dummy_json_api,
         mock_db_session,
+        mock_txt_file_sink,
     ):
         # Arrange
         user1_json = {
@@ -239,25 +265,24 @@ class TestProcessUsers:
         batch2 = [user2_json]
 
         mock_dummy_json_api.get_users.return_value = [batch1, batch2]
-        mock_coordinates_util.get_country_by_coordinates.side_effect = [
-            "USA",
-            "Hungary",
+        mock_coordinates_util.get_countries_by_coordinates.side_effect = [
+            ["USA"],
+            ["Hungary"],
         ]
 
-        mock_db_session.query.return_value.filter.return_value.count.side_effect = [
-            0,
-            0,
+        mock_db_session.scalars.return_value.all.side_effect = [
+            ["example@email.com"],
+            ["myexample@email.com"],
         ]
 
         # Act
         user_service.process_users()
 
         # Assert
-        assert mock_db_session.query.return_value.filter.call_count == 2
-        assert mock_db_session.add.call_count == 2
+        assert mock_db_session.scalars.call_count == 2
         assert mock_db_session.commit.call_count == 2
-        assert mock_file_util.save_result_to_txt_file.call_count == 2
-        assert mock_coordinates_util.get_country_by_coordinates.call_count == 2
+        assert len(written_to_txt(mock_txt_file_sink)) == 2
+        assert mock_coordinates_util.get_countries_by_coordinates.call_count == 2
 
     @patch("backend.domain.services.user_service.FileUtil")
     @patch("backend.domain.services.user_service.CoordinatesUtil")
@@ -268,6 +293,7 @@ class TestProcessUsers:
         user_service,
         mock_dummy_json_api,
         mock_db_session,
+        mock_txt_file_sink,
     ):
         # Arrange
         mock_dummy_json_api.get_users.return_value = [[]]
@@ -279,8 +305,134 @@ class TestProcessUsers:
         mock_file_util.clean_txt_file_before_processing.assert_any_call("users.txt")
         mock_dummy_json_api.get_users.assert_called_once()
         mock_db_session.query.assert_not_called()
-        mock_db_session.query.return_value.filter.assert_not_called()
+        mock_db_session.scalars.assert_not_called()
         mock_db_session.add.assert_not_called()
         mock_db_session.commit.assert_not_called()
-        mock_file_util.save_result_to_txt_file.assert_not_called()
-        mock_coordinates_util.get_country_by_coordinates.assert_not_called()
+        mock_txt_file_sink.write_all.assert_not_called()
+        mock_coordinates_util.get_countries_by_coordinates.assert_not_called()
+
+    @patch("backend.domain.services.user_service.FileUtil")
+    @patch("backend.domain.services.user_service.CoordinatesUtil")
+    def test_process_batch_geocodes_new_users_in_one_call(
+        self,
+        mock_coordinates_util,
+        mock_file_util,
+        user_service,
+        mock_dummy_json_api,
+        mock_db_session,
+        mock_txt_file_sink,
+    ):
+        # Arrange
+        users_json = [
+            {
+                "id": user_id,
+                "firstName": "John",
+                "lastName": "Doe",
+                "email": f"user{user_id}@email.com",
+                "age": 30,
+                "birthDate": "1995-01-01",
+                "address": {
+                    "address": "123 Main St",
+                    "city": "Anytown",
+                    "coordinates": {"lat": str(user_id), "lng": str(-user_id)},
+                },
+            }
+            for user_id in (1, 2, 3)
+        ]
+        mock_dummy_json_api.get_users.return_value = [users_json]
+        # User 2 is already in DB
+        mock_db_session.execute.return_value.scalars.return_value = ["user2@email.com"]
+        mock_coordinates_util.get_countries_by_coordinates.return_value = [
+            "USA",
+            "Hungary",
+        ]
+        mock_db_session.scalars.return_value.all.return_value = [
+            "user1@email.com",
+            "user3@email.com",
+        ]
+
+        # Act
+        user_service.process_users()
+
+        # Assert
+        mock_coordinates_util.get_countries_by_coordinates.assert_called_once_with(
+            [("1", "-1"), ("3", "-3")]
+        )
+        inserted_rows = mock_db_session.scalars.call_args.args[1]
+        assert [(row["user_id"], row["country"]) for row in inserted_rows] == [
+            (1, "USA"),
+            (3, "Hungary"),
+        ]
+        assert len(written_to_txt(mock_txt_file_sink)) == 2
+
+
+class TestConcurrentStages:
+    @patch("backend.domain.services.user_service.FileUtil")
+    @patch("backend.domain.services.user_service.CoordinatesUtil")
+    def test_transform_without_preloaded_keys_runs_beside_loads(
+        self, mock_coordinates_util, mock_file_util, mock_dummy_json_api, monkeypatch, tmp_path
+    ):
+        # Arrange
+        monkeypatch.setattr(
+            user_service_module,
+            "ExistingKeysIndex",
+            partial(ExistingKeysIndex, max_preloaded_keys=0),
+        )
+        mock_coordinates_util.get_countries_by_coordinates.side_effect = (
+            lambda coordinates: ["USA"] * len(coordinates)
+        )
+        users_json = [
+            {
+                "id": user_id,
+                "firstName": "John",
+                "lastName": "Doe",
+                "email": f"user{user_id}@email.com",
+                "age": 30,
+                "birthDate": "1995-01-01",
+                "address": {"address": "123 Main St", "city": "Anytown"},
+            }
+            for user_id in range(1, 201)
+        ]
+        # The second pass only brings users the first one already loaded
+        batches = [users_json[start:start + 5] for start in range(0, 200, 5)] * 2
+        engine = sa.create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+        Base.metadata.create_all(engine)
+
+        with engine.connect() as connection, connection.begin():
+            # Bound to one connection for the whole run, like the ETL job's session
+            session = Session(bind=connection, join_transaction_mode="create_savepoint")
+            with session:
+                # One user already in DB is more than the index may preload
+                session.add(
+                    User(
+                        first_name="John",
+                        last_name="Doe",
+                        email="user1@email.com",
+                        age=30,
+                        birth_date="1995-01-01",
+                        street="123 Main St",
+                        city="Anytown",
+                        country="USA",
+                        user_id=1,
+                    )
+                )
+                session.commit()
+            service = UserService(mock_dummy_json_api, session)
+            service.prepare_users_processing()
+            pipeline = EtlPipeline(
+                "users",
+                lambda: batches,
+                service.transform_users_batch,
+                service.load_users_batch,
+            )
+
+            # Act
+            metrics = pipeline.run()
+            users = connection.scalar(select(func.count()).select_from(User))
+
+        # Assert
+        assert users == 200
+        # Without preloaded keys every user reaches the load stage, whose insert skips
+        # the ones already in DB
+        assert [stage.records for stage in metrics] == [400, 400, 400]
+        engine.dispose()
@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+import pytest
+import requests
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+from backend.common.utils.http_page_cache import HttpPageCache
+from backend.dummy_json_api.caching_http_adapter import CachingHTTPAdapter
+
+URL = "https://dummyjson.com/users?limit=10&skip=0"
+
+
+def make_response(status_code, body=b"", headers=None):
+    response = Response()
+    response.status_code = status_code
+    response._content = body
+    response._content_consumed = True
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.fixture
+def page_cache(tmp_path):
+    """Fixture for an empty page cache file"""
+    page_cache = HttpPageCache(str(tmp_path / "pages.db"))
+    yield page_cache
+    page_cache.close()
+
+
+def create_session(page_cache, **kwargs):
+    session = requests.Session()
+    session.mount("https://", CachingHTTPAdapter(page_cache, **kwargs))
+    return session
+
+
+class TestCachingHTTPAdapter:
+    def test_stores_page_and_revalidates_it_with_etag(self, page_cache):
+        # Arrange
+        session = create_session(page_cache)
+        responses = [
+            make_response(200, b'{"users": [1]}', {"ETag": '"v1"'}),
+            make_response(304),
+        ]
+
+        # Act
+        with patch.object(HTTPAdapter, "send", side_effect=responses) as send:
+            first = session.get(URL)
+            second = session.get(URL)
+
+        # Assert
+        revalidation = send.call_args_list[1].args[0]
+        assert revalidation.headers["If-None-Match"] == '"v1"'
+        assert second.status_code == 200
+        assert second.json() == first.json() == {"users": [1]}
+        assert second.headers[CachingHTTPAdapter.CACHE_HEADER] == "revalidated"
+        assert (page_cache.hits, page_cache.misses) == (1, 1)
+
+    def test_changed_page_replaces_cached_one(self, page_cache):
+        # Arrange
+        session = create_session(page_cache)
+        responses = [
+            make_response(200, b'{"users": [1]}', {"Last-Modified": "Mon, 01 Jan 2024"}),
+            make_response(200, b'{"users": [2]}'),
+        ]
+
+        # Act
+        with patch.object(HTTPAdapter, "send", side_effect=responses) as send:
+            session.get(URL)
+            second = session.get(URL)
+
+        # Assert
+        revalidation = send.call_args_list[1].args[0]
+        assert revalidation.headers["If-Modified-Since"] == "Mon, 01 Jan 2024"
+        assert second.json() == {"users": [2]}
+        assert page_cache.get(URL).body == b'{"users": [2]}'
+
+    def test_fresh_page_is_served_without_request(self, page_cache):
+        # Arrange
+        page_cache.put(URL, b'{"users": [1]}', None, None, 0.3)
+        session = create_session(page_cache, max_age=60)
+
+        # Act
+        with patch.object(HTTPAdapter, "send") as send:
+            response = session.get(URL)
+
+        # Assert
+        send.assert_not_called()
+        assert response.json() == {"users": [1]}
+        assert response.headers[CachingHTTPAdapter.ELAPSED_HEADER] == "0.3"
+
+    def test_offline_serves_cached_pages_and_fails_on_others(self, page_cache):
+        # Arrange
+        page_cache.put(URL, b'{"users": [1]}', '"v1"', None, 0.3)
+        session = create_session(page_cache, offline=True)
+
+        # Act
+        with patch.object(HTTPAdapter, "send") as send:
+            response = session.get(URL)
+            with pytest.raises(requests.ConnectionError):
+                session.get("https://dummyjson.com/users?limit=10&skip=10")
+
+        # Assert
+        send.assert_not_called()
+        assert response.json() == {"users": [1]}
+        assert page_cache.hit_rate == 0.5
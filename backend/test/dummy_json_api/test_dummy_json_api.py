@@ -0,0 +1,240 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.dummy_json_api.dummy_json_api import DummyJSONApi
+
+
+def make_users(total: int):
+    return [{"id": user_id} for user_id in range(1, total + 1)]
+
+
+def fake_get_for(records, latency_by_skip=None, max_limit=0, with_total=True):
+    """Build a Session.get replacement serving DummyJSON-like pages"""
+
+    def fake_get(url, params=None):
+        limit, skip = params["limit"], params["skip"]
+        if max_limit:
+            limit = min(limit, max_limit)
+        if latency_by_skip:
+            time.sleep(latency_by_skip.get(skip, 0))
+        response = MagicMock()
+        page = {"users": records[skip:skip + limit], "skip": skip, "limit": limit}
+        if with_total:
+            page["total"] = len(records)
+        response.json.return_value = page
+        return response
+
+    return fake_get
+
+
+@pytest.fixture
+def mock_http_session():
+    """Fixture replacing the pooled requests session used by DummyJSONApi"""
+    with patch("backend.dummy_json_api.dummy_json_api.requests.Session") as session:
+        yield session.return_value
+
+
+def requested_params(mock_http_session):
+    return [call.kwargs["params"] for call in mock_http_session.get.call_args_list]
+
+
+class TestFetchSequentially:
+    def test_yields_pages_until_empty_page_without_total(self, mock_http_session):
+        # Arrange
+        records = make_users(25)
+        mock_http_session.get.side_effect = fake_get_for(records, with_total=False)
+        api = DummyJSONApi(max_page_size=10)
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        assert [user for batch in batches for user in batch] == records
+        assert mock_http_session.get.call_count == 4
+
+    def test_stops_at_total_without_requesting_empty_page(self, mock_http_session):
+        # Arrange
+        records = make_users(30)
+        mock_http_session.get.side_effect = fake_get_for(records)
+        api = DummyJSONApi(max_page_size=10)
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert len(batches) == 3
+        assert mock_http_session.get.call_count == 3
+
+    def test_page_size_grows_while_latency_is_under_target(self, mock_http_session):
+        # Arrange
+        records = make_users(250)
+        mock_http_session.get.side_effect = fake_get_for(records)
+        api = DummyJSONApi(page_size=10, max_page_size=100, target_latency=1.0)
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert [params["limit"] for params in requested_params(mock_http_session)] == [
+            10,
+            20,
+            40,
+            80,
+            100,
+        ]
+        assert [user for batch in batches for user in batch] == records
+
+    def test_page_size_does_not_grow_when_latency_is_over_target(
+        self, mock_http_session
+    ):
+        # Arrange
+        records = make_users(30)
+        mock_http_session.get.side_effect = fake_get_for(
+            records, latency_by_skip={0: 0.02, 10: 0.02}
+        )
+        api = DummyJSONApi(page_size=10, target_latency=0.01)
+
+        # Act
+        list(api.get_users())
+
+        # Assert
+        assert [params["limit"] for params in requested_params(mock_http_session)] == [
+            10,
+            10,
+            10,
+        ]
+
+    def test_page_size_is_capped_by_server_limit(self, mock_http_session):
+        # Arrange
+        records = make_users(100)
+        mock_http_session.get.side_effect = fake_get_for(records, max_limit=30)
+        api = DummyJSONApi(page_size=20, max_page_size=0, target_latency=1.0)
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert [len(batch) for batch in batches] == [20, 30, 30, 20]
+        assert [user for batch in batches for user in batch] == records
+
+
+class TestFetchConcurrently:
+    def test_yields_pages_in_order_when_responses_arrive_out_of_order(
+        self, mock_http_session
+    ):
+        # Arrange
+        records = make_users(55)
+        # Earlier pages answer slower than later ones
+        latency_by_skip = {10: 0.05, 20: 0.03, 30: 0.01}
+        mock_http_session.get.side_effect = fake_get_for(records, latency_by_skip)
+        api = DummyJSONApi(max_workers=4, max_page_size=10)
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert [user for batch in batches for user in batch] == records
+        assert [len(batch) for batch in batches] == [10, 10, 10, 10, 10, 5]
+
+    def test_uses_total_to_avoid_requesting_past_the_end(self, mock_http_session):
+        # Arrange
+        records = make_users(30)
+        mock_http_session.get.side_effect = fake_get_for(records)
+        api = DummyJSONApi(max_workers=4, max_page_size=10)
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert len(batches) == 3
+        requested_skips = sorted(
+            params["skip"] for params in requested_params(mock_http_session)
+        )
+        assert requested_skips == [0, 10, 20]
+
+    def test_fans_out_once_page_size_settles(self, mock_http_session):
+        # Arrange
+        records = make_users(400)
+        mock_http_session.get.side_effect = fake_get_for(records)
+        api = DummyJSONApi(
+            max_workers=4, page_size=25, max_page_size=50, target_latency=1.0
+        )
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert [user for batch in batches for user in batch] == records
+        assert [len(batch) for batch in batches] == [25, 50] + [50] * 6 + [25]
+
+    def test_fans_out_with_page_size_capped_by_server_limit(self, mock_http_session):
+        # Arrange
+        records = make_users(200)
+        mock_http_session.get.side_effect = fake_get_for(records, max_limit=15)
+        api = DummyJSONApi(max_workers=4, target_latency=1.0)
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert [user["id"] for batch in batches for user in batch] == list(range(1, 201))
+        fanned_out = requested_params(mock_http_session)[2:]
+        assert {params["limit"] for params in fanned_out} == {15}
+        assert sorted(params["skip"] for params in fanned_out) == list(range(25, 200, 15))
+
+    def test_empty_resource_yields_nothing(self, mock_http_session):
+        # Arrange
+        mock_http_session.get.side_effect = fake_get_for([])
+        api = DummyJSONApi(max_workers=4)
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert batches == []
+        mock_http_session.get.assert_called_once()
+
+    def test_http_error_is_raised_to_consumer(self, mock_http_session):
+        # Arrange
+        records = make_users(30)
+        fake_get = fake_get_for(records)
+
+        def failing_get(url, params=None):
+            response = fake_get(url, params=params)
+            if params["skip"] == 20:
+                response.raise_for_status.side_effect = RuntimeError("HTTP 500")
+            return response
+
+        mock_http_session.get.side_effect = failing_get
+        api = DummyJSONApi(max_workers=4, max_page_size=10)
+
+        # Act & Assert
+        with pytest.raises(RuntimeError):
+            list(api.get_users())
+
+
+class TestFetchStreamed:
+    def test_streamed_pages_match_parsed_pages(self, mock_http_session):
+        # Arrange
+        records = make_users(25)
+        fake_get = fake_get_for(records)
+
+        def fake_streamed_get(url, params=None, stream=False):
+            body = json.dumps(fake_get(url, params).json.return_value).encode()
+            response = MagicMock()
+            response.iter_content.return_value = [body[:7], body[7:40], body[40:]]
+            return response
+
+        mock_http_session.get.side_effect = fake_streamed_get
+        api = DummyJSONApi(max_page_size=10, stream_pages=True)
+
+        # Act
+        batches = list(api.get_users())
+
+        # Assert
+        assert [user for batch in batches for user in batch] == records
+        assert all(call.kwargs["stream"] for call in mock_http_session.get.call_args_list)
@@ -0,0 +1,399 @@
+import glob
+import gzip
+import os
+import threading
+from functools import partial
+from unittest.mock import MagicMock
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from backend.common.utils.existing_keys_index import ExistingKeysIndex
+from backend.common.utils.file_util import FileUtil
+from backend.common.utils.metrics import metrics
+from backend.common.utils.response_cache import ResponseCache
+from backend.database.sqlite_database import Base, configure_engine
+from backend.domain.entities.product import Product
+from backend.domain.entities.user import User
+from backend.domain.services import cart_service, product_service, user_service
+from backend.domain.services.cart_service import CartService
+from backend.domain.services.etl_state_service import EtlStateService
+from backend.domain.services.product_from_cart_service import ProductFromCartService
+from backend.domain.services.product_service import ProductService
+from backend.domain.services.user_service import UserService
+from backend.pipeline.etl_job import EtlJob
+from backend.pipeline.etl_orchestrator import EtlOrchestrator
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Fixture for a file database configured like the application one"""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'etl.db'}")
+    configure_engine(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def probed_indexes(monkeypatch):
+    """Fixture making every existing keys index probe the DB instead of preloading"""
+    for module in (user_service, cart_service, product_service):
+        monkeypatch.setattr(
+            module, "ExistingKeysIndex", partial(ExistingKeysIndex, max_preloaded_keys=0)
+        )
+
+
+@pytest.fixture
+def ndjson_exports():
+    """Fixture exporting the results as ndjson next to the txt dumps"""
+    FileUtil.configure_export_formats(["ndjson"])
+    yield
+    FileUtil.configure_export_formats(())
+
+
+def count_rows(engine, entity):
+    with engine.connect() as connection:
+        return connection.scalar(select(func.count()).select_from(entity))
+
+
+def count_products(engine):
+    return count_rows(engine, Product)
+
+
+def add_product(session, product_id):
+    with session:
+        session.add(
+            Product(
+                title=f"Product {product_id}",
+                description="Desc",
+                category="Category A",
+                price=1.0,
+                product_id=product_id,
+            )
+        )
+        session.commit()
+
+
+def orchestrator_factory(run):
+    """Build a factory whose orchestrator runs the given function on the ETL session"""
+
+    def create_orchestrator(etl_session, full_refresh):
+        orchestrator = MagicMock()
+        orchestrator.run.side_effect = lambda: run(etl_session)
+        orchestrator.get_progress.return_value = []
+        return orchestrator
+
+    return create_orchestrator
+
+
+def dummy_json_api(users, products, carts):
+    """Build an API mock serving every resource in pages of two from the given skip"""
+
+    def pages_of(records):
+        def fetch(skip=0):
+            for start in range(skip, len(records), 2):
+                yield records[start:start + 2]
+
+        return fetch
+
+    api = MagicMock()
+    api.get_users.side_effect = pages_of(
+        [
+            {
+                "id": user_id,
+                "firstName": "First",
+                "lastName": "Last",
+                "email": f"user{user_id}@example.com",
+                "age": 30,
+                "birthDate": "1990-01-01",
+                "address": {
+                    "address": "Main Street",
+                    "city": "Anytown",
+                    "coordinates": {"lat": 52.23, "lng": 21.01},
+                },
+            }
+            for user_id in range(1, users + 1)
+        ]
+    )
+    api.get_products.side_effect = pages_of(
+        [
+            {
+                "id": product_id,
+                "title": f"Product {product_id}",
+                "description": "Desc",
+                "category": "Category A",
+                "price": 1.0,
+            }
+            for product_id in range(1, products + 1)
+        ]
+    )
+    api.get_carts.side_effect = pages_of(
+        [
+            {"id": cart_id, "userId": 1, "products": [{"id": 1, "quantity": 2}]}
+            for cart_id in range(1, carts + 1)
+        ]
+    )
+    return api
+
+
+def services_factory(api):
+    """Build a factory for an orchestrator running the production services"""
+
+    def create_orchestrator(etl_session, full_refresh):
+        return EtlOrchestrator(
+            api,
+            UserService(api, etl_session),
+            CartService(api, etl_session, ProductFromCartService(etl_session)),
+            ProductService(api, etl_session),
+            EtlStateService(etl_session),
+            full_refresh,
+        )
+
+    return create_orchestrator
+
+
+def count_txt_lines(file_name):
+    with open(f"backend/data_txt/{file_name}") as file:
+        return sum(1 for _ in file)
+
+
+class TestEtlJob:
+    def test_successful_run_is_committed(self, engine):
+        # Arrange
+        job = EtlJob(
+            engine, orchestrator_factory(lambda session: add_product(session, 1))
+        )
+
+        # Act
+        started = job.start()
+        status = job.wait(timeout=5)
+
+        # Assert
+        assert started
+        assert status.status == "succeeded"
+        assert status.started_at is not None
+        assert status.finished_at is not None
+        assert count_products(engine) == 1
+        job.shutdown()
+
+    def test_readers_see_previous_snapshot_until_run_finishes(self, engine):
+        # Arrange
+        add_product(Session(engine), 1)
+        loaded = threading.Event()
+        release = threading.Event()
+
+        def run(session):
+            add_product(session, 2)
+            add_product(session, 3)
+            loaded.set()
+            release.wait(timeout=5)
+
+        job = EtlJob(engine, orchestrator_factory(run))
+
+        # Act
+        job.start(full_refresh=True)
+        loaded.wait(timeout=5)
+        count_during_run = count_products(engine)
+        status_during_run = job.get_status()
+        release.set()
+        job.wait(timeout=5)
+
+        # Assert
+        assert count_during_run == 1
+        assert status_during_run.status == "running"
+        assert status_during_run.full_refresh
+        # The full refresh dropped product 1 only once the run committed
+        assert count_products(engine) == 2
+        job.shutdown()
+
+    def test_failed_run_keeps_previous_data(self, engine):
+        # Arrange
+        add_product(Session(engine), 1)
+
+        def run(session):
+            add_product(session, 2)
+            raise RuntimeError("API unavailable")
+
+        job = EtlJob(engine, orchestrator_factory(run))
+
+        # Act
+        job.start(full_refresh=True)
+        status = job.wait(timeout=5)
+
+        # Assert
+        assert status.status == "failed"
+        assert status.error == "API unavailable"
+        assert count_products(engine) == 1
+        job.shutdown()
+
+    def test_does_not_start_second_run_while_running(self, engine):
+        # Arrange
+        release = threading.Event()
+        job = EtlJob(engine, orchestrator_factory(lambda session: release.wait(5)))
+
+        # Act
+        first = job.start()
+        second = job.start()
+        release.set()
+        job.wait(timeout=5)
+        third = job.start()
+        job.wait(timeout=5)
+
+        # Assert
+        assert (first, second, third) == (True, False, True)
+        job.shutdown()
+
+    def test_only_successful_run_bumps_response_cache_generation(self, engine):
+        # Arrange
+        response_cache = ResponseCache()
+        outcomes = iter([None, RuntimeError("API unavailable")])
+
+        def run(session):
+            outcome = next(outcomes)
+            if outcome:
+                raise outcome
+
+        job = EtlJob(engine, orchestrator_factory(run), response_cache)
+
+        # Act
+        job.start()
+        job.wait(timeout=5)
+        generation_after_success = response_cache.generation
+        job.start()
+        job.wait(timeout=5)
+
+        # Assert
+        assert generation_after_success == 1
+        assert response_cache.generation == 1
+        job.shutdown()
+
+    def test_profiled_run_reports_profile_and_run_metrics(self, engine, monkeypatch, tmp_path):
+        # Arrange
+        monkeypatch.chdir(tmp_path)
+
+        def run(session):
+            metrics.increment("etl_test_rows_total", 3)
+
+        metrics.increment("etl_test_rows_total", 5)
+        job = EtlJob(engine, orchestrator_factory(run))
+
+        # Act
+        job.start(profile="cprofile")
+        status = job.wait(timeout=5)
+
+        # Assert
+        assert os.path.isfile(status.profile_path)
+        assert [(sample.name, sample.value) for sample in status.metrics] == [
+            ("etl_test_rows_total", 3)
+        ]
+        job.shutdown()
+
+    def test_unknown_profile_mode_does_not_start(self, engine):
+        # Arrange
+        job = EtlJob(engine, orchestrator_factory(lambda session: None))
+
+        # Act / Assert
+        with pytest.raises(ValueError):
+            job.start(profile="perf")
+        assert job.get_status().status == "idle"
+        job.shutdown()
+
+    def test_incremental_restart_keeps_the_txt_dumps(self, engine, monkeypatch, tmp_path):
+        # Arrange
+        monkeypatch.chdir(tmp_path)
+        job = EtlJob(engine, services_factory(dummy_json_api(5, 3, 4)))
+        job.start(full_refresh=True)
+        assert job.wait(timeout=10).status == "succeeded"
+
+        # Act
+        job.start()
+        status = job.wait(timeout=10)
+
+        # Assert
+        assert status.status == "succeeded"
+        assert count_txt_lines("users.txt") == 5
+        assert count_txt_lines("products.txt") == 3
+        assert count_txt_lines("carts.txt") == 4
+        assert count_txt_lines("products_from_carts.txt") == 4
+        job.shutdown()
+
+    def test_incremental_run_appends_new_records_to_the_txt_dumps(
+        self, engine, monkeypatch, tmp_path
+    ):
+        # Arrange
+        monkeypatch.chdir(tmp_path)
+        job = EtlJob(engine, services_factory(dummy_json_api(5, 3, 4)))
+        job.start(full_refresh=True)
+        assert job.wait(timeout=10).status == "succeeded"
+        job.shutdown()
+
+        # Act
+        job = EtlJob(engine, services_factory(dummy_json_api(7, 3, 4)))
+        job.start()
+        status = job.wait(timeout=10)
+
+        # Assert
+        assert status.status == "succeeded"
+        with open("backend/data_txt/users.txt") as file:
+            emails = [line.split("email='")[1].split("'")[0] for line in file]
+        assert emails == [f"user{user_id}@example.com" for user_id in range(1, 8)]
+        job.shutdown()
+
+    def test_incremental_run_probing_existing_keys_loads_new_records(
+        self, engine, monkeypatch, tmp_path, probed_indexes
+    ):
+        # Arrange
+        monkeypatch.chdir(tmp_path)
+        job = EtlJob(engine, services_factory(dummy_json_api(4, 3, 4)))
+        job.start(full_refresh=True)
+        assert job.wait(timeout=10).status == "succeeded"
+        job.shutdown()
+
+        # Act
+        # Every resource brings new records while the others transform and load
+        job = EtlJob(engine, services_factory(dummy_json_api(20, 20, 20)))
+        job.start()
+        status = job.wait(timeout=10)
+
+        # Assert
+        assert status.status == "succeeded", status.error
+        assert count_products(engine) == 20
+        assert count_txt_lines("users.txt") == 20
+        assert count_txt_lines("carts.txt") == 20
+        job.shutdown()
+
+    def test_failed_run_keeps_the_dumps_of_the_committed_data(
+        self, engine, monkeypatch, tmp_path, ndjson_exports
+    ):
+        # Arrange
+        monkeypatch.chdir(tmp_path)
+        job = EtlJob(engine, services_factory(dummy_json_api(5, 3, 4)))
+        job.start(full_refresh=True)
+        assert job.wait(timeout=10).status == "succeeded"
+        job.shutdown()
+        api = dummy_json_api(7, 3, 6)
+        fetch_carts = api.get_carts.side_effect
+
+        def fail_after_first_page(skip=0):
+            yield next(fetch_carts(skip))
+            raise RuntimeError("API unavailable")
+
+        api.get_carts.side_effect = fail_after_first_page
+
+        # Act
+        # Users 6 and 7 are loaded and dumped before the carts fail
+        job = EtlJob(engine, services_factory(api))
+        job.start()
+        status = job.wait(timeout=10)
+
+        # Assert
+        assert status.status == "failed"
+        assert count_rows(engine, User) == 5
+        assert count_txt_lines("users.txt") == 5
+        with gzip.open("backend/data_export/users.ndjson.gz", "rt") as file:
+            assert sum(1 for _ in file) == 5
+        assert not glob.glob("backend/data_*/*.partial")
+        job.shutdown()
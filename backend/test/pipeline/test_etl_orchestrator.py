@@ -0,0 +1,238 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.common.models.etl_state_dto import EtlStateDto
+from backend.pipeline.etl_orchestrator import EtlOrchestrator
+from backend.pipeline.incremental_source import IncrementalSource
+
+
+def pages(*ids):
+    return [[{"id": record_id}] for record_id in ids]
+
+
+def slow_pages(seconds, batches):
+    def extract(skip=0):
+        for page in batches:
+            time.sleep(seconds)
+            yield page
+
+    return extract
+
+
+@pytest.fixture
+def events():
+    return []
+
+
+@pytest.fixture
+def services(events):
+    lock = threading.Lock()
+
+    def recorder(name):
+        def load(batch):
+            with lock:
+                events.append(name)
+
+        return load
+
+    user_service = MagicMock()
+    user_service.transform_users_batch.side_effect = lambda batch: batch
+    user_service.load_users_batch.side_effect = recorder("users")
+    product_service = MagicMock()
+    product_service.transform_products_batch.side_effect = lambda batch: batch
+    product_service.load_products_batch.side_effect = recorder("products")
+    cart_service = MagicMock()
+    cart_service.transform_carts_batch.side_effect = lambda batch: batch
+    cart_service.load_carts_batch.side_effect = recorder("carts")
+    return user_service, cart_service, product_service
+
+
+class TestEtlOrchestrator:
+    def test_loads_follow_dependency_order_when_users_are_slowest(
+        self, services, events
+    ):
+        # Arrange
+        api = MagicMock()
+        api.get_users.side_effect = slow_pages(0.05, pages(1, 2, 3))
+        api.get_products.side_effect = slow_pages(0, pages(1, 2))
+        api.get_carts.side_effect = slow_pages(0, pages(1, 2))
+        orchestrator = EtlOrchestrator(api, *services, MagicMock())
+
+        # Act
+        metrics = orchestrator.run()
+
+        # Assert
+        assert events == ["users"] * 3 + ["products"] * 2 + ["carts"] * 2
+        assert [stage.pipeline for stage in metrics[::3]] == [
+            "users",
+            "products",
+            "carts",
+        ]
+
+    def test_prepares_every_resource_before_extracting(self, services):
+        # Arrange
+        user_service, cart_service, product_service = services
+        api = MagicMock()
+        api.get_users.side_effect = slow_pages(0, [])
+        api.get_products.side_effect = slow_pages(0, [])
+        api.get_carts.side_effect = slow_pages(0, [])
+
+        # Act
+        EtlOrchestrator(api, *services, MagicMock()).run()
+
+        # Assert
+        user_service.prepare_users_processing.assert_called_once()
+        product_service.prepare_products_processing.assert_called_once()
+        cart_service.prepare_carts_processing.assert_called_once()
+
+    def test_wall_time_is_bounded_by_slowest_source(self, services):
+        # Arrange
+        five_pages = pages(*range(5))
+        api = MagicMock()
+        api.get_users.side_effect = slow_pages(0.05, five_pages)
+        api.get_products.side_effect = slow_pages(0.05, five_pages)
+        api.get_carts.side_effect = slow_pages(0.05, five_pages)
+        orchestrator = EtlOrchestrator(api, *services, MagicMock())
+
+        # Act
+        started = time.perf_counter()
+        orchestrator.run()
+        elapsed = time.perf_counter() - started
+
+        # Assert
+        # Run one after another the three sources would need 0.75s
+        assert elapsed < 0.5
+
+    def test_failing_load_stops_dependent_loads(self, services, events):
+        # Arrange
+        user_service, cart_service, product_service = services
+        user_service.load_users_batch.side_effect = RuntimeError("FK violation")
+        api = MagicMock()
+        api.get_users.side_effect = slow_pages(0, pages(1))
+        api.get_products.side_effect = slow_pages(0, pages(1))
+        api.get_carts.side_effect = slow_pages(0, pages(1))
+        orchestrator = EtlOrchestrator(api, *services, MagicMock())
+
+        # Act & Assert
+        with pytest.raises(RuntimeError):
+            orchestrator.run()
+        assert events == []
+
+    def test_pipeline_errors_while_stopping_are_logged(self, services, caplog):
+        # Arrange
+        user_service, cart_service, product_service = services
+        product_service.transform_products_batch.side_effect = ValueError("bad price")
+        user_service.load_users_batch.side_effect = RuntimeError("FK violation")
+        api = MagicMock()
+        api.get_users.side_effect = slow_pages(0, pages(1))
+        api.get_products.side_effect = slow_pages(0, pages(1))
+        api.get_carts.side_effect = slow_pages(0, pages(1))
+        orchestrator = EtlOrchestrator(api, *services, MagicMock())
+
+        # Act
+        with pytest.raises(RuntimeError):
+            orchestrator.run()
+
+        # Assert
+        assert "products pipeline failed while stopping: bad price" in caplog.text
+
+    def test_incremental_run_resumes_and_saves_state_per_resource(self, services):
+        # Arrange
+        user_service, cart_service, product_service = services
+        records = [{"id": record_id} for record_id in range(1, 5)]
+
+        def fetch(skip=0):
+            yield records[skip:]
+
+        api = MagicMock()
+        api.get_users.side_effect = fetch
+        api.get_products.side_effect = fetch
+        api.get_carts.side_effect = fetch
+        etl_state_service = MagicMock()
+        etl_state_service.get_state.side_effect = lambda resource: EtlStateDto(
+            resource=resource,
+            skip_offset=2,
+            last_id=2,
+            content_hash=IncrementalSource.content_hash(records[1]),
+        )
+        orchestrator = EtlOrchestrator(
+            api, *services, etl_state_service, full_refresh=False
+        )
+
+        # Act
+        orchestrator.run()
+
+        # Assert
+        api.get_users.assert_called_once_with(1)
+        user_service.transform_users_batch.assert_called_once_with(records[2:])
+        user_service.prepare_users_processing.assert_called_once_with(
+            update_existing=False
+        )
+        saved_states = [
+            call.args[0] for call in etl_state_service.save_state.call_args_list
+        ]
+        assert [state.resource for state in saved_states] == [
+            "users",
+            "products",
+            "carts",
+        ]
+        assert all(state.skip_offset == 4 for state in saved_states)
+        assert all(state.last_id == 4 for state in saved_states)
+
+    def test_full_refresh_ignores_stored_state(self, services):
+        # Arrange
+        api = MagicMock()
+        api.get_users.side_effect = slow_pages(0, pages(1))
+        api.get_products.side_effect = slow_pages(0, pages(1))
+        api.get_carts.side_effect = slow_pages(0, pages(1))
+        etl_state_service = MagicMock()
+
+        # Act
+        EtlOrchestrator(api, *services, etl_state_service, full_refresh=True).run()
+
+        # Assert
+        etl_state_service.get_state.assert_not_called()
+        api.get_users.assert_called_once_with(0)
+        assert etl_state_service.save_state.call_count == 3
+
+    def test_category_totals_rebuilt_unless_carts_resume(self, services):
+        # Arrange
+        records = [{"id": record_id} for record_id in range(1, 5)]
+
+        def fetch(skip=0):
+            yield records[skip:]
+
+        api = MagicMock()
+        api.get_users.side_effect = fetch
+        api.get_products.side_effect = fetch
+        api.get_carts.side_effect = fetch
+        etl_state_service = MagicMock()
+        etl_state_service.get_state.side_effect = lambda resource: EtlStateDto(
+            resource=resource,
+            skip_offset=2,
+            last_id=2,
+            content_hash=IncrementalSource.content_hash(records[1]),
+        )
+        category_service = MagicMock()
+        category_service.has_category_totals.return_value = True
+
+        # Act
+        EtlOrchestrator(
+            api, *services, etl_state_service, category_service=category_service
+        ).run()
+        EtlOrchestrator(
+            api,
+            *services,
+            etl_state_service,
+            full_refresh=False,
+            category_service=category_service,
+        ).run()
+
+        # Assert
+        assert [
+            call.kwargs["rebuild_totals"]
+            for call in category_service.refresh_most_ordered_categories.call_args_list
+        ] == [True, False]
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+from backend.pipeline.etl_pipeline import EtlPipeline
+
+
+def slow(seconds, work=lambda batch: batch):
+    def stage(batch):
+        time.sleep(seconds)
+        return work(batch)
+
+    return stage
+
+
+class TestEtlPipeline:
+    def test_loads_transformed_batches_in_order(self):
+        # Arrange
+        loaded = []
+        pipeline = EtlPipeline(
+            "numbers",
+            lambda: iter([[1, 2], [3], [4, 5, 6]]),
+            lambda batch: [number * 10 for number in batch],
+            loaded.append,
+            queue_size=1,
+        )
+
+        # Act
+        pipeline.run()
+
+        # Assert
+        assert loaded == [[10, 20], [30], [40, 50, 60]]
+
+    def test_reports_metrics_per_stage(self):
+        # Arrange
+        pipeline = EtlPipeline(
+            "numbers",
+            lambda: iter([[1, 2], [3], [4, 5, 6]]),
+            lambda batch: batch,
+            lambda batch: None,
+        )
+
+        # Act
+        metrics = pipeline.run()
+
+        # Assert
+        assert [stage.stage for stage in metrics] == ["extract", "transform", "load"]
+        assert all(stage.pipeline == "numbers" for stage in metrics)
+        assert all(stage.batches == 3 for stage in metrics)
+        assert all(stage.records == 6 for stage in metrics)
+        assert metrics[0].max_queue_depth >= 1
+
+    def test_stages_overlap(self):
+        # Arrange
+        batches = [[number] for number in range(6)]
+        pipeline = EtlPipeline(
+            "slow",
+            lambda: (slow(0.05)(batch) for batch in batches),
+            slow(0.05),
+            slow(0.05),
+        )
+
+        # Act
+        started = time.perf_counter()
+        pipeline.run()
+        elapsed = time.perf_counter() - started
+
+        # Assert
+        # Strictly serial stages would need 6 batches * 3 stages * 0.05s = 0.9s
+        assert elapsed < 0.7
+
+    def test_error_in_a_stage_stops_the_pipeline_and_is_raised(self):
+        # Arrange
+        extracted = threading.Event()
+
+        def extract():
+            for number in range(1000):
+                extracted.set()
+                yield [number]
+
+        def load(batch):
+            if batch == [3]:
+                raise ValueError("load failed")
+
+        pipeline = EtlPipeline("failing", extract, lambda batch: batch, load)
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="load failed"):
+            pipeline.run()
+        assert extracted.is_set()
+
+    def test_spills_batches_while_load_gate_is_closed(self):
+        # Arrange
+        gate = threading.Event()
+        extracted = []
+        loaded = []
+
+        def extract():
+            for number in range(10):
+                extracted.append(number)
+                yield [number]
+
+        pipeline = EtlPipeline(
+            "gated",
+            extract,
+            lambda batch: batch,
+            loaded.append,
+            queue_size=1,
+            load_gate=gate,
+        )
+
+        # Act
+        pipeline.start()
+        deadline = time.monotonic() + 5
+        while len(extracted) < 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        extracted_before_gate = len(extracted)
+        loaded_before_gate = len(loaded)
+        gate.set()
+        pipeline.join()
+
+        # Assert
+        # Bounded queues of one batch would stall extract after a few batches
+        assert extracted_before_gate == 10
+        assert loaded_before_gate == 0
+        assert loaded == [[number] for number in range(10)]
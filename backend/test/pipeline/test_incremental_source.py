@@ -0,0 +1,112 @@
+from backend.common.models.etl_state_dto import EtlStateDto
+from backend.pipeline.incremental_source import IncrementalSource
+
+
+def make_records(total):
+    return [
+        {"id": record_id, "name": f"record {record_id}"}
+        for record_id in range(1, total + 1)
+    ]
+
+
+def fetch_from(records, page_size=3):
+    requested_skips = []
+
+    def fetch(skip=0):
+        requested_skips.append(skip)
+        for start in range(skip, len(records), page_size):
+            yield records[start:start + page_size]
+
+    return fetch, requested_skips
+
+
+def state_after(records, count):
+    return EtlStateDto(
+        resource="users",
+        skip_offset=count,
+        last_id=records[count - 1]["id"],
+        content_hash=IncrementalSource.content_hash(records[count - 1]),
+    )
+
+
+class TestIncrementalSource:
+    def test_reads_everything_without_state(self):
+        # Arrange
+        records = make_records(7)
+        fetch, requested_skips = fetch_from(records)
+        source = IncrementalSource("users", fetch)
+
+        # Act
+        source.open()
+        extracted = [record for batch in source.extract() for record in batch]
+
+        # Assert
+        assert extracted == records
+        assert requested_skips == [0]
+        assert not source.is_rescan
+        assert source.state == state_after(records, 7)
+
+    def test_resumes_after_high_water_mark(self):
+        # Arrange
+        records = make_records(10)
+        fetch, requested_skips = fetch_from(records)
+        source = IncrementalSource("users", fetch, state_after(records, 6))
+
+        # Act
+        source.open()
+        extracted = [record for batch in source.extract() for record in batch]
+
+        # Assert
+        assert extracted == records[6:]
+        assert requested_skips == [5]
+        assert not source.is_rescan
+        assert source.state == state_after(records, 10)
+
+    def test_keeps_state_when_nothing_new(self):
+        # Arrange
+        records = make_records(6)
+        fetch, _ = fetch_from(records)
+        state = state_after(records, 6)
+        source = IncrementalSource("users", fetch, state)
+
+        # Act
+        source.open()
+        extracted = [record for batch in source.extract() for record in batch]
+
+        # Assert
+        assert extracted == []
+        assert source.state == state
+
+    def test_reads_again_from_start_when_loaded_record_changed(self):
+        # Arrange
+        records = make_records(8)
+        state = state_after(records, 6)
+        records[5] = {**records[5], "name": "renamed"}
+        fetch, requested_skips = fetch_from(records)
+        source = IncrementalSource("users", fetch, state)
+
+        # Act
+        source.open()
+        extracted = [record for batch in source.extract() for record in batch]
+
+        # Assert
+        assert extracted == records
+        assert requested_skips == [5, 0]
+        assert source.is_rescan
+        assert source.state == state_after(records, 8)
+
+    def test_reads_again_from_start_when_source_shrank(self):
+        # Arrange
+        records = make_records(8)
+        state = state_after(records, 8)
+        fetch, requested_skips = fetch_from(records[:4])
+        source = IncrementalSource("users", fetch, state)
+
+        # Act
+        source.open()
+        extracted = [record for batch in source.extract() for record in batch]
+
+        # Assert
+        assert extracted == records[:4]
+        assert requested_skips == [7, 0]
+        assert source.is_rescan
@@ -0,0 +1,178 @@
+"""Read endpoint latency with queries on the event loop vs. on the read executor.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_api_latency --products 2000 --clients 1 16 128
+
+The API is served by uvicorn from a temporary SQLite database seeded with synthetic
+products. Every client sends --requests-per-client GET /api/products?limit= requests back
+to back; p50/p99 are taken over all requests of one concurrency level. Meanwhile a
+probe keeps calling a trivial endpoint, which shows how long the event loop is blocked.
+"""
+
+import argparse
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List
+
+import numpy as np
+import requests
+import sqlalchemy as sa
+import uvicorn
+from fastapi import FastAPI
+from sqlalchemy.orm import sessionmaker
+
+from backend.common.utils.response_cache import ResponseCache
+from backend.controller.controller import router
+from backend.database.sqlite_database import (
+    READ_POOL_SIZE,
+    Base,
+    configure_engine,
+    create_read_engine,
+)
+from backend.domain.entities.product import Product
+from backend.domain.services.product_service import ProductService
+
+
+class InlineExecutor(Executor):
+    """Runs the query right away on the calling thread, i.e. on the event loop"""
+
+    def submit(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(function(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def create_database(directory: str, products: int) -> sa.Engine:
+    engine = sa.create_engine(f"sqlite:///{directory}/bench.db")
+    configure_engine(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            sa.insert(Product),
+            [
+                {
+                    "title": f"Product {product_id}",
+                    "description": f"Description of product {product_id}",
+                    "category": f"category-{product_id % 20}",
+                    "price": 1.5,
+                    "product_id": product_id,
+                }
+                for product_id in range(products)
+            ],
+        )
+    engine.dispose()
+    return create_read_engine(f"sqlite:///{directory}/bench.db")
+
+
+def create_app(read_engine: sa.Engine, read_executor: Executor) -> FastAPI:
+    app = FastAPI()
+    app.state = type("State", (), {})()
+    app.state.read_session = sessionmaker(bind=read_engine)
+    app.state.create_product_service = partial(ProductService, None)
+    app.state.read_executor = read_executor
+    # No budget, every request queries; this measures the executor, not the cache
+    app.state.response_cache = ResponseCache(max_bytes=0)
+    app.include_router(router=router, prefix="/api")
+
+    @app.get("/ping")
+    async def ping():
+        return "pong"
+
+    return app
+
+
+def serve(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def probe(url: str, done: threading.Event) -> List[float]:
+    latencies: List[float] = []
+    with requests.Session() as session:
+        while not done.is_set():
+            started = time.perf_counter()
+            session.get(url).raise_for_status()
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+    return latencies
+
+
+def measure(url: str, clients: int, requests_per_client: int) -> List[float]:
+    def client() -> List[float]:
+        latencies: List[float] = []
+        with requests.Session() as session:
+            for _ in range(requests_per_client):
+                started = time.perf_counter()
+                session.get(url).raise_for_status()
+                latencies.append(time.perf_counter() - started)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        futures = [executor.submit(client) for _ in range(clients)]
+        return [latency for future in futures for latency in future.result()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 128])
+    parser.add_argument("--requests-per-client", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--read-workers", type=int, default=READ_POOL_SIZE)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        read_engine = create_database(directory, args.products)
+        print(f"{args.products} products, {args.requests_per_client} requests per client")
+        modes = (
+            ("event loop", InlineExecutor),
+            (
+                f"executor({args.read_workers})",
+                lambda: ThreadPoolExecutor(max_workers=args.read_workers),
+            ),
+        )
+        for offset, (label, create_executor) in enumerate(modes):
+            read_executor: Executor = create_executor()
+            server = serve(create_app(read_engine, read_executor), args.port + offset)
+            base_url = f"http://127.0.0.1:{args.port + offset}"
+            for clients in args.clients:
+                done = threading.Event()
+                with ThreadPoolExecutor(max_workers=1) as prober:
+                    probe_future = prober.submit(probe, f"{base_url}/ping", done)
+                    started = time.perf_counter()
+                    latencies = measure(
+                        f"{base_url}/api/products?limit={args.limit}",
+                        clients,
+                        args.requests_per_client,
+                    )
+                    elapsed = time.perf_counter() - started
+                    done.set()
+                p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+                ping_p50, ping_p99 = np.percentile(probe_future.result(), [50, 99]) * 1000
+                print(
+                    f"mode={label:<12} clients={clients:<4} p50={p50:8.1f}ms "
+                    f"p99={p99:8.1f}ms throughput={len(latencies) / elapsed:6.1f} req/s "
+                    f"ping p50={ping_p50:7.1f}ms p99={ping_p99:7.1f}ms"
+                )
+            server.should_exit = True
+            read_executor.shutdown(wait=True)
+        read_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
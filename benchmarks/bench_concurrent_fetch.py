@@ -0,0 +1,51 @@
+"""Sequential vs. concurrent page fetching in DummyJSONApi, with fixed and adaptive pages.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_concurrent_fetch --records 500 --latency 0.05
+"""
+
+import argparse
+import logging
+import time
+
+from backend.dummy_json_api.dummy_json_api import DummyJSONApi
+from benchmarks.stub_dummy_json_server import StubDummyJSONServer, generate_users
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--max-page-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with StubDummyJSONServer(
+        {"users": generate_users(args.records)}, latency=args.latency
+    ) as server:
+        print(
+            f"{args.records} users, {args.latency * 1000:.0f} ms simulated latency per request"
+        )
+        for max_page_size, label in ((10, "fixed"), (args.max_page_size, "adaptive")):
+            for workers in args.workers:
+                api = DummyJSONApi(
+                    base_url=server.base_url,
+                    max_workers=workers,
+                    max_page_size=max_page_size,
+                )
+                requests_before = server.requests_served
+                started = time.perf_counter()
+                fetched = sum(len(batch) for batch in api.get_users())
+                elapsed = time.perf_counter() - started
+                api.close()
+                print(
+                    f"pages={label:<9} workers={workers:<3} records={fetched:<7} "
+                    f"requests={server.requests_served - requests_before:<5} "
+                    f"elapsed={elapsed:.3f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
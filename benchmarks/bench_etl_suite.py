@@ -0,0 +1,327 @@
+"""Offline end-to-end suite: the whole ETL against a scaled-up DummyJSON fixture.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_etl_suite --records 10000 1000000 10000000
+    python -m benchmarks.bench_etl_suite --compare BASELINE.json CANDIDATE.json
+
+For every --records count the stub server replays that many users, carts and
+products, built from the recorded fixture (see benchmarks.dummy_json_fixture), and
+each scale runs in a fresh process against a temporary SQLite database:
+
+- etl: a full refresh through EtlJob with the production services and DummyJSONApi
+  over HTTP, as records/sec over all three resources, plus the ETL metrics of the run.
+- peak_rss_mib: the peak resident set of that process once the ETL is done.
+- read_latency_ms: p50/p99 of --requests GET requests per read endpoint, served by
+  uvicorn without the response cache.
+- most_ordered_category: the refresh with the totals rebuilt from all carts and the
+  endpoint query on the refreshed table, best of --repeat.
+
+The results are written as JSON, tagged with the commit, to --output-directory.
+--compare prints every number of two result files side by side.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import requests
+import sqlalchemy as sa
+from fastapi import FastAPI
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.common.utils.coordinates_util import CoordinatesUtil
+from backend.common.utils.geocode_cache import GeocodeCache
+from backend.common.utils.response_cache import ResponseCache
+from backend.controller.controller import router
+from backend.database.sqlite_database import configure_engine, create_read_engine
+from backend.domain.services.cart_service import CartService
+from backend.domain.services.category_service import CategoryService
+from backend.domain.services.etl_state_service import EtlStateService
+from backend.domain.services.product_from_cart_service import ProductFromCartService
+from backend.domain.services.product_service import ProductService
+from backend.domain.services.user_service import UserService
+from backend.dummy_json_api.dummy_json_api import DummyJSONApi
+from backend.pipeline.etl_job import EtlJob
+from backend.pipeline.etl_orchestrator import EtlOrchestrator
+from benchmarks.bench_api_latency import serve
+from benchmarks.dummy_json_fixture import FIXTURE_PATH, load_seed, scale_resources
+from benchmarks.stub_dummy_json_server import StubDummyJSONServer
+
+READ_ENDPOINTS: Tuple[str, ...] = (
+    "/api/users?limit=100",
+    "/api/carts?limit=100",
+    "/api/products?limit=100",
+    "/api/products-bought-from-carts?limit=100",
+    "/api/most-ordered-category",
+)
+
+
+def run_etl(
+    engine: sa.Engine, api: DummyJSONApi
+) -> Tuple[float, List[Dict[str, Any]]]:
+    def create_etl_orchestrator(
+        etl_session: Session, full_refresh: bool
+    ) -> EtlOrchestrator:
+        category_service = CategoryService(etl_session)
+        return EtlOrchestrator(
+            api,
+            UserService(api, etl_session),
+            CartService(
+                api, etl_session, ProductFromCartService(etl_session, category_service)
+            ),
+            ProductService(api, etl_session),
+            EtlStateService(etl_session),
+            full_refresh,
+            category_service=category_service,
+        )
+
+    job = EtlJob(engine, create_etl_orchestrator)
+    started = time.perf_counter()
+    job.start(full_refresh=True)
+    status = job.wait()
+    elapsed = time.perf_counter() - started
+    job.shutdown()
+    if status.error:
+        raise RuntimeError(f"ETL run failed: {status.error}")
+    return elapsed, [sample.model_dump() for sample in status.metrics]
+
+
+def create_app(read_engine: sa.Engine, read_executor: ThreadPoolExecutor) -> FastAPI:
+    app = FastAPI()
+    app.state = type("State", (), {})()
+    app.state.read_session = sessionmaker(bind=read_engine)
+    app.state.create_user_service = partial(UserService, None)
+    app.state.create_cart_service = lambda db_session: CartService(
+        None, db_session, ProductFromCartService(db_session)
+    )
+    app.state.create_product_service = partial(ProductService, None)
+    app.state.create_product_from_cart_service = ProductFromCartService
+    app.state.create_category_service = CategoryService
+    app.state.read_executor = read_executor
+    # No budget, every request queries the database
+    app.state.response_cache = ResponseCache(max_bytes=0)
+    app.include_router(router=router, prefix="/api")
+    return app
+
+
+def measure_reads(
+    database_url: str, port: int, requests_per_endpoint: int
+) -> Dict[str, Dict[str, float]]:
+    read_engine = create_read_engine(database_url)
+    read_executor = ThreadPoolExecutor(max_workers=4)
+    server = serve(create_app(read_engine, read_executor), port)
+    latencies: Dict[str, Dict[str, float]] = {}
+    with requests.Session() as session:
+        for endpoint in READ_ENDPOINTS:
+            url = f"http://127.0.0.1:{port}{endpoint}"
+            session.get(url).raise_for_status()
+            timings: List[float] = []
+            for _ in range(requests_per_endpoint):
+                started = time.perf_counter()
+                session.get(url).raise_for_status()
+                timings.append(time.perf_counter() - started)
+            latencies[endpoint] = {
+                "p50": round(float(np.percentile(timings, 50)) * 1000, 3),
+                "p99": round(float(np.percentile(timings, 99)) * 1000, 3),
+            }
+    server.should_exit = True
+    read_executor.shutdown()
+    read_engine.dispose()
+    return latencies
+
+
+def best_of(function: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    best: float = float("inf")
+    result: Any = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run_scale(records: int, args: argparse.Namespace) -> Dict[str, Any]:
+    # Runs in its own process, so the peak RSS belongs to this scale only
+    logging.disable(logging.INFO)
+    seed, _ = load_seed(args.fixture)
+    resources = scale_resources(seed, users=records, carts=records, products=records)
+    with tempfile.TemporaryDirectory() as directory:
+        # The services write their txt files relative to the working directory
+        os.chdir(directory)
+        os.makedirs("backend/data_txt")
+        database_url = f"sqlite:///{directory}/bench.db"
+        engine = sa.create_engine(database_url, connect_args={"check_same_thread": False})
+        configure_engine(engine)
+        CoordinatesUtil.configure_cache(
+            GeocodeCache(file_path=f"{directory}/geocode_cache.db")
+        )
+
+        with StubDummyJSONServer(resources, latency=0) as server:
+            api = DummyJSONApi(
+                base_url=server.base_url,
+                max_workers=args.workers,
+                max_page_size=args.max_page_size,
+            )
+            etl_seconds, etl_metrics = run_etl(engine, api)
+            api.close()
+        peak_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        read_latency_ms = measure_reads(database_url, args.port, args.requests)
+
+        session_factory = sessionmaker(bind=engine)
+        refresh_seconds, winners = best_of(
+            lambda: CategoryService(session_factory()).refresh_most_ordered_categories(
+                rebuild_totals=True
+            ),
+            args.repeat,
+        )
+        query_seconds, _ = best_of(
+            lambda: CategoryService(session_factory()).get_most_ordered_category(),
+            args.repeat,
+        )
+        engine.dispose()
+        CoordinatesUtil.get_cache().close()
+
+    total_records = sum(len(records) for records in resources.values())
+    return {
+        "records": records,
+        "etl": {
+            "seconds": round(etl_seconds, 3),
+            "records_per_second": round(total_records / etl_seconds, 1),
+            "metrics": etl_metrics,
+        },
+        "peak_rss_mib": round(peak_rss_mib, 1),
+        "read_latency_ms": read_latency_ms,
+        "most_ordered_category": {
+            "refresh_ms": round(refresh_seconds * 1000, 3),
+            "query_ms": round(query_seconds * 1000, 3),
+            "winners": len(winners),
+        },
+    }
+
+
+def git_commit() -> Dict[str, Any]:
+    def git(*arguments: str) -> str:
+        return subprocess.run(
+            ["git", *arguments], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    # Every number of a scale by its path, the per-run ETL metrics left out
+    if isinstance(value, dict):
+        return {
+            path: number
+            for key, child in value.items()
+            if key != "metrics"
+            for path, number in flatten(child, f"{prefix}.{key}" if prefix else key).items()
+        }
+    return {prefix: value} if isinstance(value, (int, float)) else {}
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    with open(candidate_path) as file:
+        candidate = json.load(file)
+    print(f"baseline  {baseline['commit']}\ncandidate {candidate['commit']}")
+    candidate_scales = {scale["records"]: scale for scale in candidate["scales"]}
+    for baseline_scale in baseline["scales"]:
+        records = baseline_scale["records"]
+        if records not in candidate_scales:
+            continue
+        before = flatten(baseline_scale)
+        after = flatten(candidate_scales[records])
+        paths = sorted(before.keys() & after.keys())
+        width = max(len(path) for path in paths)
+        for path in paths:
+            change = (after[path] - before[path]) / before[path] * 100 if before[path] else 0
+            print(
+                f"records={records:<9} {path:<{width}} {before[path]:>12g} "
+                f"{after[path]:>12g} {change:+7.1f}%"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--records", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--fixture", default=FIXTURE_PATH)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-page-size", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output-directory", default="benchmarks/results")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # The scales run in other working directories
+    args.fixture = os.path.abspath(args.fixture)
+    _, fixture_source = load_seed(args.fixture)
+    results: Dict[str, Any] = {
+        **git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fixture": "recorded" if fixture_source == args.fixture else fixture_source,
+        "arguments": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("compare", "output_directory", "fixture")
+        },
+        "scales": [],
+    }
+    for records in args.records:
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            scale: Dict[str, Any] = executor.submit(run_scale, records, args).result()
+        results["scales"].append(scale)
+        reads = " ".join(
+            f"{endpoint.split('?')[0].removeprefix('/api/')}={latency['p50']:.1f}ms"
+            for endpoint, latency in scale["read_latency_ms"].items()
+        )
+        print(
+            f"records={records:<9} etl={scale['etl']['seconds']:8.1f}s "
+            f"{scale['etl']['records_per_second']:10,.0f} records/s "
+            f"peak_rss={scale['peak_rss_mib']:7.0f}MiB "
+            f"most_ordered_refresh={scale['most_ordered_category']['refresh_ms']:8.1f}ms "
+            f"query={scale['most_ordered_category']['query_ms']:8.1f}ms\n"
+            f"    p50 {reads}"
+        )
+
+    os.makedirs(args.output_directory, exist_ok=True)
+    commit: str = (results["commit"] or "unknown")[:12]
+    timestamp: str = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(args.output_directory, f"etl-suite-{commit}-{timestamp}.json")
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Per-coordinate vs. batch reverse geocoding in CoordinatesUtil, cold and warm cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_geocoding --sizes 1000 100000 1000000
+
+The per-coordinate path is only timed up to --max-single coordinates and is
+extrapolated beyond that, since it needs one KD-tree query per call.
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from backend.common.utils.coordinates_util import CoordinatesUtil
+from backend.common.utils.geocode_cache import GeocodeCache
+
+
+def random_coordinates(size: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    latitudes = rng.uniform(-60, 70, size)
+    longitudes = rng.uniform(-180, 180, size)
+    return [(str(lat), str(lng)) for lat, lng in zip(latitudes, longitudes)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--max-single", type=int, default=10_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    # Warm up: the first lookup loads the geonames KD-tree
+    CoordinatesUtil.get_countries_by_coordinates([("0", "0")])
+
+    for size in args.sizes:
+        coordinates = random_coordinates(size)
+
+        sampled = coordinates[: min(size, args.max_single)]
+        started = time.perf_counter()
+        for latitude, longitude in sampled:
+            CoordinatesUtil.get_country_by_coordinates(latitude, longitude)
+        single_elapsed = (time.perf_counter() - started) * size / len(sampled)
+
+        CoordinatesUtil.configure_cache(GeocodeCache(max_entries=size))
+        started = time.perf_counter()
+        CoordinatesUtil.get_countries_by_coordinates(coordinates)
+        batch_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        CoordinatesUtil.get_countries_by_coordinates(coordinates)
+        warm_elapsed = time.perf_counter() - started
+
+        estimated = "" if len(sampled) == size else " (extrapolated)"
+        print(
+            f"size={size:<9} single={single_elapsed:9.3f}s{estimated:<15} "
+            f"batch={batch_elapsed:8.3f}s  speedup={single_elapsed / batch_elapsed:6.1f}x  "
+            f"warm-cache={warm_elapsed:8.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
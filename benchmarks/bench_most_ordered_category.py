@@ -0,0 +1,271 @@
+"""Most ordered category per user: Python argmax vs. RANK() in SQLite.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_most_ordered_category --line-items 1000000
+
+A temporary SQLite database is seeded with synthetic users, carts, products and
+--line-items rows in products_from_carts. Every mode is timed with and without the
+covering index on products_from_carts(cart_id, product_id, quantity):
+
+- "python argmax" is the implementation before the window function: the grouped
+  (user_id, category, total) rows all come back and the tie-aware max runs in Python.
+- "rank on join" is RANK() OVER (PARTITION BY user_id ORDER BY SUM(quantity) DESC)
+  straight on the join, so only the winning rows leave SQLite.
+- "etl refresh" is CategoryService.refresh_most_ordered_categories(rebuild_totals=True),
+  i.e. the totals rebuilt from the join and RANK() over the totals table.
+- "endpoint read" is CategoryService.get_most_ordered_category on the refreshed table.
+
+All modes must return the same rows; the script checks that before printing.
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.database.sqlite_database import Base, configure_engine
+from backend.domain.entities.cart import Cart
+from backend.domain.entities.product import Product
+from backend.domain.entities.product_from_cart import ProductFromCart
+from backend.domain.entities.user import User
+from backend.domain.services.category_service import CategoryService
+
+COVERING_INDEX: str = "ix_products_from_carts_cart_id_product_id_quantity"
+INSERT_BATCH_SIZE: int = 100_000
+
+Winner = Tuple[int, str, int]
+
+
+def seed(
+    engine: sa.Engine,
+    users: int,
+    products: int,
+    categories: int,
+    line_items: int,
+    items_per_cart: int,
+) -> None:
+    generator = random.Random(42)
+    carts = line_items // items_per_cart
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            sa.insert(User),
+            [
+                {
+                    "first_name": f"First {user_id}",
+                    "last_name": f"Last {user_id}",
+                    "email": f"user{user_id}@example.com",
+                    "age": 30,
+                    "birth_date": "1990-01-01",
+                    "street": "Main Street",
+                    "city": "Springfield",
+                    "country": "United States",
+                    "user_id": user_id,
+                }
+                for user_id in range(users)
+            ],
+        )
+        connection.execute(
+            sa.insert(Product),
+            [
+                {
+                    "title": f"Product {product_id}",
+                    "description": f"Description of product {product_id}",
+                    "category": f"category-{product_id % categories}",
+                    "price": 1.5,
+                    "product_id": product_id,
+                }
+                for product_id in range(products)
+            ],
+        )
+        connection.execute(
+            sa.insert(Cart),
+            [
+                {"cart_id": cart_id, "user_id": generator.randrange(users)}
+                for cart_id in range(carts)
+            ],
+        )
+        rows: List[Dict[str, int]] = []
+        for line_item in range(line_items):
+            rows.append(
+                {
+                    "cart_id": line_item // items_per_cart % carts,
+                    "product_id": generator.randrange(products),
+                    "quantity": generator.randint(1, 5),
+                }
+            )
+            if len(rows) == INSERT_BATCH_SIZE:
+                connection.execute(sa.insert(ProductFromCart), rows)
+                rows = []
+        if rows:
+            connection.execute(sa.insert(ProductFromCart), rows)
+        connection.execute(sa.text("ANALYZE"))
+
+
+def python_argmax(db_session: Session) -> List[Winner]:
+    results = (
+        db_session.query(
+            Cart.user_id,
+            Product.category,
+            func.sum(ProductFromCart.quantity).label("total_orders"),
+        )
+        .join(ProductFromCart, Cart.cart_id == ProductFromCart.cart_id)
+        .join(Product, ProductFromCart.product_id == Product.product_id)
+        .group_by(Cart.user_id, Product.category)
+        .all()
+    )
+    user_categories: Dict[int, List[Tuple[str, int]]] = defaultdict(list)
+    for user_id, category, total_orders in results:
+        user_categories[user_id].append((category, total_orders))
+    winners: List[Winner] = []
+    for user_id, categories in user_categories.items():
+        max_orders = max(total for _, total in categories)
+        winners.extend(
+            (user_id, category, total)
+            for category, total in categories
+            if total == max_orders
+        )
+    return winners
+
+
+def rank_on_join(db_session: Session) -> List[Winner]:
+    total_orders = func.sum(ProductFromCart.quantity)
+    ranked = (
+        select(
+            Cart.user_id,
+            Product.category,
+            total_orders.label("total_orders"),
+            func.rank()
+            .over(partition_by=Cart.user_id, order_by=total_orders.desc())
+            .label("category_rank"),
+        )
+        .join(ProductFromCart, Cart.cart_id == ProductFromCart.cart_id)
+        .join(Product, ProductFromCart.product_id == Product.product_id)
+        .group_by(Cart.user_id, Product.category)
+        .subquery()
+    )
+    return [
+        tuple(row)
+        for row in db_session.execute(
+            select(ranked.c.user_id, ranked.c.category, ranked.c.total_orders).where(
+                ranked.c.category_rank == 1
+            )
+        )
+    ]
+
+
+def etl_refresh(db_session: Session) -> List[Winner]:
+    return [
+        (row.user_id, row.category_name, row.total_orders)
+        for row in CategoryService(db_session).refresh_most_ordered_categories(
+            rebuild_totals=True
+        )
+    ]
+
+
+def endpoint_read(db_session: Session) -> List[Winner]:
+    return [
+        (row.user_id, row.category_name, row.total_orders)
+        for row in CategoryService(db_session).get_most_ordered_category()
+    ]
+
+
+def measure(
+    function: Callable[[Session], List[Winner]], session_factory: sessionmaker
+) -> Tuple[float, List[Winner]]:
+    with session_factory() as db_session:
+        started = time.perf_counter()
+        winners = function(db_session)
+        return time.perf_counter() - started, sorted(winners)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--line-items", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--categories", type=int, default=24)
+    parser.add_argument("--items-per-cart", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # The refresh writes its txt file relative to the working directory
+        os.chdir(directory)
+        os.makedirs("backend/data_txt")
+        engine = sa.create_engine(f"sqlite:///{directory}/bench.db")
+        configure_engine(engine)
+        started = time.perf_counter()
+        seed(
+            engine,
+            args.users,
+            args.products,
+            args.categories,
+            args.line_items,
+            args.items_per_cart,
+        )
+        print(
+            f"{args.line_items} line items, {args.users} users, "
+            f"{args.categories} categories, seeded in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+        session_factory = sessionmaker(bind=engine)
+        modes = (
+            ("python argmax", python_argmax),
+            ("rank on join", rank_on_join),
+            ("etl refresh", etl_refresh),
+            ("endpoint read", endpoint_read),
+        )
+        expected: List[Winner] = []
+        for covering_index in (False, True):
+            with engine.begin() as connection:
+                if covering_index:
+                    connection.execute(
+                        sa.text(
+                            f"CREATE INDEX IF NOT EXISTS {COVERING_INDEX} ON "
+                            f"products_from_carts (cart_id, product_id, quantity)"
+                        )
+                    )
+                    # The covering index replaces the single column one
+                    connection.execute(
+                        sa.text("DROP INDEX IF EXISTS ix_products_from_carts_cart_id")
+                    )
+                else:
+                    connection.execute(sa.text(f"DROP INDEX IF EXISTS {COVERING_INDEX}"))
+                    connection.execute(
+                        sa.text(
+                            "CREATE INDEX IF NOT EXISTS ix_products_from_carts_cart_id "
+                            "ON products_from_carts (cart_id)"
+                        )
+                    )
+                connection.execute(sa.text("ANALYZE"))
+            for label, function in modes:
+                timings: List[float] = []
+                for _ in range(args.repeat):
+                    elapsed, winners = measure(function, session_factory)
+                    timings.append(elapsed)
+                    if not expected:
+                        expected = winners
+                    assert winners == expected, f"{label} returned different rows"
+                print(
+                    f"covering index={str(covering_index):<5} mode={label:<13} "
+                    f"best={min(timings) * 1000:9.1f}ms "
+                    f"winners={len(expected)}"
+                )
+        engine.dispose()
+        os.chdir(working_directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Whole-table export: materialized JSON body vs. the streamed NDJSON export.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ndjson_export --products 10000 100000 300000
+
+Both modes run in-process against a temporary SQLite database. "materialized" is what
+a full-table endpoint did before: every ORM object, every DTO and the whole JSON body
+exist before the first byte. "streamed" is the body generator of the /export routes.
+Peak memory is measured with tracemalloc, so it covers Python allocations only.
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from typing import Callable, Iterator, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+from backend.controller.controller import ndjson_chunks
+from backend.database.sqlite_database import Base, configure_engine
+from backend.domain.entities.product import Product
+from backend.domain.services.product_service import ProductService
+
+
+def seed(engine: sa.Engine, products: int) -> None:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            sa.insert(Product),
+            [
+                {
+                    "title": f"Product {product_id}",
+                    "description": f"Description of product {product_id}",
+                    "category": f"category-{product_id % 20}",
+                    "price": 1.5,
+                    "product_id": product_id,
+                }
+                for product_id in range(products)
+            ],
+        )
+
+
+def materialized(product_service: ProductService) -> Iterator[str]:
+    products = product_service.get_all_products()
+    yield json.dumps([product.model_dump() for product in products])
+
+
+def streamed(product_service: ProductService) -> Iterator[str]:
+    return ndjson_chunks(product_service.stream_products())
+
+
+def measure(body: Callable[[], Iterator[str]]) -> Tuple[float, float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_byte = 0.0
+    size = 0
+    for chunk in body():
+        if not first_byte:
+            first_byte = time.perf_counter() - started
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_byte, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = sa.create_engine(f"sqlite:///{directory}/bench.db")
+        configure_engine(engine)
+        product_service = ProductService(None, sessionmaker(bind=engine)())
+        for products in args.products:
+            seed(engine, products)
+            for label, body in (("materialized", materialized), ("streamed", streamed)):
+                first_byte, elapsed, peak = measure(partial(body, product_service))
+                print(
+                    f"products={products:<8} mode={label:<13} "
+                    f"first byte={first_byte * 1000:8.1f}ms total={elapsed:6.2f}s "
+                    f"peak memory={peak / 2**20:8.1f} MiB"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
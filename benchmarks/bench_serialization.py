@@ -0,0 +1,150 @@
+"""List serialization: ORM instances + per-row model_validate vs. the column fast path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialization --rows 10000 100000
+
+Every mode builds the JSON body of a whole table in-process against a temporary
+SQLite database; rows/sec covers the query, the DTOs and the serialization.
+
+- all_before is get_all_* as it was: every ORM instance goes through
+  model_validate(from_attributes), then the response_model validation FastAPI ran
+  on the list, then the JSON dump.
+- all_after is get_all_* now: the DTO columns selected as plain rows and the
+  whole list validated by one TypeAdapter call, then the same JSON dump.
+- page_before / page_after is a list endpoint body with a validated PageDto
+  vs. the one KeysetPageUtil builds now without validation.
+
+The before and after bodies are compared byte for byte before anything is printed.
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from typing import Any, Callable, List, Tuple
+
+import sqlalchemy as sa
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.common.models.page_dto import PageDto
+from backend.common.models.product_dto import ProductDto
+from backend.common.models.user_dto import UserDto
+from backend.common.utils.dto_list_util import DtoListUtil
+from backend.common.utils.keyset_page_util import KeysetPageUtil
+from backend.controller.controller import PAGE_ADAPTER
+from backend.database.sqlite_database import Base, configure_engine
+from backend.domain.entities.product import Product
+from backend.domain.entities.user import User
+
+
+def seed(engine: sa.Engine, rows: int) -> None:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            sa.insert(Product),
+            [
+                {
+                    "title": f"Product {index}",
+                    "description": f"Description of product {index}",
+                    "category": f"category-{index % 20}",
+                    "price": index / 7,
+                    "product_id": index,
+                }
+                for index in range(rows)
+            ],
+        )
+        connection.execute(
+            sa.insert(User),
+            [
+                {
+                    "first_name": f"First {index}",
+                    "last_name": f"Last {index}",
+                    "email": f"user{index}@example.com",
+                    "age": 20 + index % 50,
+                    "birth_date": "1990-01-01",
+                    "street": f"{index} Main Street",
+                    "city": "Springfield",
+                    "country": "United States",
+                    "user_id": index,
+                }
+                for index in range(rows)
+            ],
+        )
+
+
+def all_before(
+    db_session: Session, entity: Any, dto_class: type[BaseModel]
+) -> bytes:
+    with db_session:
+        entities = db_session.query(entity).all()
+        dtos = [dto_class.model_validate(row) for row in entities]
+    adapter: TypeAdapter = TypeAdapter(List[dto_class])
+    return adapter.dump_json(adapter.validate_python(dtos))
+
+
+def all_after(db_session: Session, entity: Any, dto_class: type[BaseModel]) -> bytes:
+    adapter: TypeAdapter = TypeAdapter(List[dto_class])
+    return adapter.dump_json(DtoListUtil.select_all(db_session, entity, dto_class))
+
+
+def page_before(db_session: Session, entity: Any, dto_class: type[BaseModel]) -> bytes:
+    page = KeysetPageUtil.get_page(db_session, entity, dto_class, limit=10**9)
+    return PAGE_ADAPTER.dump_json(PageDto.model_validate(page.model_dump()))
+
+
+def page_after(db_session: Session, entity: Any, dto_class: type[BaseModel]) -> bytes:
+    page = KeysetPageUtil.get_page(db_session, entity, dto_class, limit=10**9)
+    return PAGE_ADAPTER.dump_json(page)
+
+
+def measure(body: Callable[[], bytes], repeat: int) -> Tuple[float, bytes]:
+    best: float = float("inf")
+    content: bytes = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        content = body()
+        best = min(best, time.perf_counter() - started)
+    return best, content
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = sa.create_engine(f"sqlite:///{directory}/bench.db")
+        configure_engine(engine)
+        session_factory = sessionmaker(bind=engine)
+        for rows in args.rows:
+            seed(engine, rows)
+            for entity, dto_class in ((Product, ProductDto), (User, UserDto)):
+                for before, after in ((all_before, all_after), (page_before, page_after)):
+                    results = [
+                        measure(
+                            # Bound now, every repetition gets a fresh session
+                            lambda function=function, entity=entity, dto_class=dto_class: (
+                                function(session_factory(), entity, dto_class)
+                            ),
+                            args.repeat,
+                        )
+                        for function in (before, after)
+                    ]
+                    assert results[0][1] == results[1][1], f"{after.__name__} differs"
+                    for function, (elapsed, content) in zip((before, after), results):
+                        print(
+                            f"rows={rows:<7} table={entity.__tablename__:<9} "
+                            f"mode={function.__name__:<12} "
+                            f"{rows / elapsed:10,.0f} rows/s "
+                            f"body={len(content) / 2**20:6.1f} MiB"
+                        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
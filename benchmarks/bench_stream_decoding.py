@@ -0,0 +1,70 @@
+"""Page decoding: response.json() on the whole body vs. decoding while streaming.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_stream_decoding --page-sizes 1000 10000 100000
+
+DummyJSONApi fetches --pages pages of users from the local stub server with
+stream_pages off and on. Throughput comes from an untraced fetch, then the same
+fetch runs under tracemalloc: "peak" is the highest traced memory during the fetch
+and "overhead" is that peak minus what is still held afterwards, i.e. the decoded
+records the pages were turned into. The overhead is what decoding costs on top of
+the records themselves.
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from backend.dummy_json_api.dummy_json_api import DummyJSONApi
+from benchmarks.stub_dummy_json_server import StubDummyJSONServer, generate_users
+
+
+def fetch(base_url: str, page_size: int, stream_pages: bool) -> List[Dict[str, Any]]:
+    api = DummyJSONApi(
+        base_url=base_url,
+        page_size=page_size,
+        max_page_size=page_size,
+        stream_pages=stream_pages,
+    )
+    try:
+        return [user for batch in api.get_users() for user in batch]
+    finally:
+        api.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--pages", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    for page_size in args.page_sizes:
+        with StubDummyJSONServer(
+            {"users": generate_users(page_size * args.pages)}, latency=0
+        ) as server:
+            expected: List[Dict[str, Any]] = []
+            for stream_pages in (False, True):
+                started = time.perf_counter()
+                fetch(server.base_url, page_size, stream_pages)
+                elapsed = time.perf_counter() - started
+                tracemalloc.start()
+                users = fetch(server.base_url, page_size, stream_pages)
+                held, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                if not expected:
+                    expected = users
+                assert users == expected, "streamed pages differ"
+                print(
+                    f"page_size={page_size:<7} mode={'stream' if stream_pages else 'json':<6} "
+                    f"{len(users) / elapsed:10,.0f} records/s "
+                    f"peak={peak / 2**20:7.1f} MiB overhead={(peak - held) / 2**20:7.1f} MiB"
+                )
+                del users
+
+
+if __name__ == "__main__":
+    main()
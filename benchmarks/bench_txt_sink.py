@@ -0,0 +1,120 @@
+"""Per-record FileUtil appends vs. the buffered TxtFileSink, with syscall counts.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_txt_sink --records 100000 --batch-size 100
+
+Files are written into a temporary directory. open() and mkdir() calls are counted
+with an audit hook, write() syscalls come from /proc/self/io (Linux only). Every
+open() also implies a close() and a few fstat/lseek calls that are not counted here.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Callable, Dict, List
+
+from backend.common.models.user_dto import UserDto
+from backend.common.utils.file_util import FileUtil
+from backend.common.utils.txt_file_sink import TxtFileSink
+
+audit_events: Counter = Counter()
+
+
+def count_audit_events(event: str, args) -> None:
+    if event in ("open", "os.mkdir"):
+        audit_events[event] += 1
+
+
+def write_syscalls() -> int:
+    try:
+        with open("/proc/self/io") as io:
+            for line in io:
+                if line.startswith("syscw:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return -1
+
+
+def generate_users(count: int) -> List[UserDto]:
+    return [
+        UserDto(
+            first_name=f"First{user_id}",
+            last_name=f"Last{user_id}",
+            email=f"user{user_id}@example.com",
+            age=30,
+            birth_date="1990-01-01",
+            street=f"{user_id} Main Street",
+            city="Springfield",
+            country="United States",
+            user_id=user_id,
+        )
+        for user_id in range(count)
+    ]
+
+
+def per_record(users: List[UserDto], batch_size: int) -> None:
+    FileUtil.clean_txt_file_before_processing("users.txt")
+    for user in users:
+        FileUtil.save_result_to_txt_file("users.txt", user)
+
+
+def sink_flushed_per_batch(users: List[UserDto], batch_size: int) -> None:
+    FileUtil.clean_txt_file_before_processing("users.txt")
+    with TxtFileSink("users.txt") as sink:
+        for start in range(0, len(users), batch_size):
+            sink.write_all(users[start:start + batch_size])
+            sink.flush()
+
+
+def sink_flushed_on_close(users: List[UserDto], batch_size: int) -> None:
+    FileUtil.clean_txt_file_before_processing("users.txt")
+    with TxtFileSink("users.txt") as sink:
+        for start in range(0, len(users), batch_size):
+            sink.write_all(users[start:start + batch_size])
+
+
+def measure(
+    write: Callable[[List[UserDto], int], None], users: List[UserDto], batch_size: int
+) -> Dict[str, float]:
+    writes_before = write_syscalls()
+    audit_events.clear()
+    started = time.perf_counter()
+    write(users, batch_size)
+    elapsed = time.perf_counter() - started
+    opens, mkdirs = audit_events["open"], audit_events["os.mkdir"]
+    writes = write_syscalls() - writes_before if writes_before >= 0 else -1
+    return {"elapsed": elapsed, "open": opens, "mkdir": mkdirs, "write": writes}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    users = generate_users(args.records)
+    sys.addaudithook(count_audit_events)
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.makedirs("backend/data_txt")
+        print(f"{args.records} users, pages of {args.batch_size}")
+        for label, write in (
+            ("FileUtil per record", per_record),
+            ("TxtFileSink, flush per page", sink_flushed_per_batch),
+            ("TxtFileSink, flush on close", sink_flushed_on_close),
+        ):
+            result = measure(write, users, args.batch_size)
+            print(
+                f"{label:<28} elapsed={result['elapsed']:.3f}s "
+                f"open={result['open']:<7} mkdir={result['mkdir']:<7} "
+                f"write={result['write']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
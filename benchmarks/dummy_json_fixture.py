@@ -0,0 +1,132 @@
+"""Recorded DummyJSON payloads and their synthetic scale-up for the offline benchmarks.
+
+Record the fixture once, with network access, from the repository root:
+
+    python -m benchmarks.dummy_json_fixture --output benchmarks/fixtures/dummyjson.json.gz
+
+The fixture keeps every /users, /carts and /products record exactly as DummyJSON
+returned it. Without a recorded fixture the benchmarks fall back to the records the
+stub server generates, which have the same fields the ETL reads.
+
+scale_resources repeats the seed records up to any count without materializing them:
+record i is a copy of seed record i % len(seed) with id i + 1, and the fields that
+must stay unique or must point at existing rows (emails, cart users and cart products)
+are rewritten to match. The stub server slices the resources page by page, so even
+10M records only ever exist one page at a time.
+"""
+
+import argparse
+import gzip
+import json
+import os
+from typing import Any, Callable, Dict, List, Sequence, Tuple, overload
+
+import requests
+
+from benchmarks.stub_dummy_json_server import (
+    generate_carts,
+    generate_products,
+    generate_users,
+)
+
+FIXTURE_PATH: str = "benchmarks/fixtures/dummyjson.json.gz"
+RESOURCES: Tuple[str, ...] = ("users", "carts", "products")
+
+Record = Dict[str, Any]
+Seed = Dict[str, List[Record]]
+
+
+class ScaledResource(Sequence[Record]):
+    """A read-only sequence of count records built on demand from the seed records"""
+
+    def __init__(
+        self, seed: List[Record], count: int, rewrite: Callable[[Record, int], Record]
+    ):
+        self.__seed: List[Record] = seed
+        self.__count: int = count
+        self.__rewrite: Callable[[Record, int], Record] = rewrite
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @overload
+    def __getitem__(self, index: int) -> Record: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Record]: ...
+
+    def __getitem__(self, index: int | slice) -> Record | List[Record]:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self.__count))]
+        if not 0 <= index < self.__count:
+            raise IndexError(index)
+        record: Record = dict(self.__seed[index % len(self.__seed)])
+        record["id"] = index + 1
+        return self.__rewrite(record, index)
+
+
+def record_fixture(base_url: str, path: str) -> Dict[str, int]:
+    # limit=0 makes DummyJSON return every record of a resource in one page
+    seed: Seed = {}
+    with requests.Session() as session:
+        for name in RESOURCES:
+            response = session.get(f"{base_url}/{name}", params={"limit": 0})
+            response.raise_for_status()
+            seed[name] = response.json()[name]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump(seed, file)
+    return {name: len(records) for name, records in seed.items()}
+
+
+def load_seed(path: str = FIXTURE_PATH) -> Tuple[Seed, str]:
+    # Returns the seed records and where they came from
+    if os.path.isfile(path):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            return json.load(file), path
+    return {
+        "users": generate_users(200),
+        "carts": generate_carts(50, users=200, products=200),
+        "products": generate_products(200),
+    }, "generated"
+
+
+def scale_resources(
+    seed: Seed, users: int, carts: int, products: int
+) -> Dict[str, ScaledResource]:
+    def rewrite_user(user: Record, index: int) -> Record:
+        local_part, _, domain = str(user.get("email") or "user@example.com").partition("@")
+        user["email"] = f"{local_part}+{index}@{domain}"
+        return user
+
+    def rewrite_cart(cart: Record, index: int) -> Record:
+        cart["userId"] = 1 + index % users
+        # Shifting every line by the same offset keeps the ids of one cart distinct
+        cart["products"] = [
+            {**line, "id": 1 + (line["id"] - 1 + index) % products}
+            for line in cart.get("products") or []
+        ]
+        return cart
+
+    return {
+        "users": ScaledResource(seed["users"], users, rewrite_user),
+        "carts": ScaledResource(seed["carts"], carts, rewrite_cart),
+        "products": ScaledResource(seed["products"], products, lambda product, _: product),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="https://dummyjson.com")
+    parser.add_argument("--output", default=FIXTURE_PATH)
+    args = parser.parse_args()
+
+    counts: Dict[str, int] = record_fixture(args.base_url, args.output)
+    print(
+        f"Recorded {', '.join(f'{count} {name}' for name, count in counts.items())} "
+        f"into {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
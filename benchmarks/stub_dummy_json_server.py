@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+
+def generate_users(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": user_id,
+            "firstName": f"First{user_id}",
+            "lastName": f"Last{user_id}",
+            "email": f"user{user_id}@example.com",
+            "age": 20 + user_id % 50,
+            "birthDate": f"19{50 + user_id % 50}-01-01",
+            "address": {
+                "address": f"{user_id} Main Street",
+                "city": "Anytown",
+                "coordinates": {
+                    "lat": -60 + (user_id * 7) % 130,
+                    "lng": -180 + (user_id * 13) % 360,
+                },
+            },
+        }
+        for user_id in range(1, count + 1)
+    ]
+
+
+def generate_products(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": product_id,
+            "title": f"Product {product_id}",
+            "description": f"Description of product {product_id}",
+            "category": f"category-{product_id % 20}",
+            "price": round(1 + (product_id * 3.7) % 500, 2),
+        }
+        for product_id in range(1, count + 1)
+    ]
+
+
+def generate_carts(count: int, users: int, products: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": cart_id,
+            "userId": 1 + cart_id % users,
+            "products": [
+                {"id": 1 + (cart_id * 5 + line) % products, "quantity": 1 + line}
+                for line in range(1 + cart_id % 5)
+            ],
+        }
+        for cart_id in range(1, count + 1)
+    ]
+
+
+class StubDummyJSONServer:
+    """Local HTTP server answering ``/users``, ``/carts`` and ``/products`` like DummyJSON.
+
+    Every request sleeps for ``latency`` seconds before answering, to simulate
+    the round trip to the real API.
+    """
+
+    def __init__(
+        self,
+        resources: Dict[str, List[Dict[str, Any]]],
+        latency: float = 0.05,
+        max_limit: int = 0,
+    ):
+        self.resources: Dict[str, List[Dict[str, Any]]] = resources
+        self.latency: float = latency
+        self.max_limit: int = max_limit
+        self.requests_served: int = 0
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer(("127.0.0.1", 0), self.__make_handler())
+        self.__server.daemon_threads = True
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubDummyJSONServer":
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def record_request(self) -> None:
+        with self.__lock:
+            self.requests_served += 1
+
+    def page(self, name: str, limit: int, skip: int) -> Dict[str, Any]:
+        records = self.resources.get(name, [])
+        if limit == 0 or limit > len(records):
+            limit = len(records)
+        if self.max_limit:
+            limit = min(limit, self.max_limit)
+        return {
+            name: records[skip:skip + limit],
+            "total": len(records),
+            "skip": skip,
+            "limit": limit,
+        }
+
+    def __make_handler(self) -> Callable[..., BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                name = url.path.strip("/")
+                query = parse_qs(url.query)
+                limit = int(query.get("limit", ["30"])[0])
+                skip = int(query.get("skip", ["0"])[0])
+
+                time.sleep(stub.latency)
+                stub.record_request()
+
+                if name not in stub.resources:
+                    self.send_error(404)
+                    return
+                body = json.dumps(stub.page(name, limit, skip)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -1,50 +1,145 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Optional
+
 import uvicorn
 from fastapi import FastAPI
+from sqlalchemy.orm import Session as DbSession
 from starlette.responses import RedirectResponse
 
-from backend.controller.controller import router
-from backend.database.sqlite_database import Session, create_tables
+from backend.common.utils.coordinates_util import CoordinatesUtil
+from backend.common.utils.file_util import FileUtil
+from backend.common.utils.geocode_cache import GeocodeCache
+from backend.common.utils.http_page_cache import HttpPageCache
+from backend.common.utils.profiling_util import ProfilingUtil
+from backend.common.utils.response_cache import ResponseCache
+from backend.controller.controller import metrics_router, router
+from backend.database.sqlite_database import (
+    READ_POOL_SIZE,
+    Engine,
+    ReadEngine,
+    ReadSession,
+    create_tables,
+)
 from backend.domain.services.cart_service import CartService
 from backend.domain.services.category_service import CategoryService
+from backend.domain.services.etl_state_service import EtlStateService
 from backend.domain.services.product_service import ProductService
 from backend.domain.services.product_from_cart_service import (
     ProductFromCartService,
 )
 from backend.domain.services.user_service import UserService
 from backend.dummy_json_api.dummy_json_api import DummyJSONApi
+from backend.pipeline.etl_job import EtlJob
+from backend.pipeline.etl_orchestrator import EtlOrchestrator
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    # Raw DummyJSON pages are kept in backend/database/dummy_json_cache.db and
+    # revalidated with ETag/Last-Modified on the next run. DUMMYJSON_CACHE_MAX_MB
+    # bounds the file (0 turns the cache off), pages younger than
+    # DUMMYJSON_CACHE_MAX_AGE seconds are not revalidated, and DUMMYJSON_OFFLINE=1
+    # serves only from the cache without touching the network. DUMMYJSON_STREAM_PAGES=1
+    # decodes the pages record by record as they are read.
+    cache_max_bytes: int = int(os.getenv("DUMMYJSON_CACHE_MAX_MB", "256")) * 1024 * 1024
+    page_cache: Optional[HttpPageCache] = (
+        HttpPageCache("backend/database/dummy_json_cache.db", max_bytes=cache_max_bytes)
+        if cache_max_bytes
+        else None
+    )
+    api: DummyJSONApi = DummyJSONApi(
+        max_workers=8,
+        page_cache=page_cache,
+        offline=os.getenv("DUMMYJSON_OFFLINE", "0").lower() in ("1", "true"),
+        cache_max_age=float(os.getenv("DUMMYJSON_CACHE_MAX_AGE", "0")),
+        stream_pages=os.getenv("DUMMYJSON_STREAM_PAGES", "0").lower() in ("1", "true"),
+    )
 
-    # Initialize the app state
-    app.state = type("State", (), {})()
+    CoordinatesUtil.configure_cache(
+        GeocodeCache(file_path="backend/database/geocode_cache.db")
+    )
 
-    api: DummyJSONApi = DummyJSONApi()
+    # ETL_EXPORT_FORMATS=parquet,arrow,ndjson also writes the results into
+    # backend/data_export next to the txt dumps
+    FileUtil.configure_export_formats(os.getenv("ETL_EXPORT_FORMATS", "").split(","))
+
+    # ETL_FULL_REFRESH=1 drops everything and reloads it, by default only new
+    # records are fetched on top of the existing database
+    full_refresh: bool = os.getenv("ETL_FULL_REFRESH", "0").lower() in ("1", "true")
+
+    # ETL_PROFILE=cprofile or tracemalloc profiles the startup run and writes the
+    # profile into backend/data_profile
+    profile: Optional[str] = ProfilingUtil.validate_mode(os.getenv("ETL_PROFILE"))
+
+    # Only make sure the schema exists here, a full refresh happens inside the ETL
+    # transaction so the endpoints keep serving the previous data meanwhile
+    create_tables(full_refresh=False)
+
+    def create_etl_orchestrator(
+        etl_session: DbSession, etl_full_refresh: bool
+    ) -> EtlOrchestrator:
+        category_service: CategoryService = CategoryService(etl_session)
+        product_from_cart_service: ProductFromCartService = ProductFromCartService(
+            etl_session, category_service
+        )
+        return EtlOrchestrator(
+            api,
+            UserService(api, etl_session),
+            CartService(api, etl_session, product_from_cart_service),
+            ProductService(api, etl_session),
+            EtlStateService(etl_session),
+            etl_full_refresh,
+            category_service=category_service,
+        )
+
+    # Serialized GET responses are kept until the next ETL run commits,
+    # RESPONSE_CACHE_MAX_MB bounds the memory they take
+    response_cache: ResponseCache = ResponseCache(
+        max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024
+    )
+    etl_job: EtlJob = EtlJob(Engine, create_etl_orchestrator, response_cache)
+    # Read endpoints run their queries here instead of on the event loop, one thread
+    # per connection of the read pool
+    read_executor: ThreadPoolExecutor = ThreadPoolExecutor(
+        max_workers=READ_POOL_SIZE, thread_name_prefix="api-read"
+    )
 
-    db_session = Session()
+    def create_cart_service(db_session: DbSession) -> CartService:
+        return CartService(api, db_session, ProductFromCartService(db_session))
 
-    create_tables()
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        etl_job.start(full_refresh, profile)
+        yield
+        etl_job.shutdown()
+        read_executor.shutdown(wait=True)
+        ReadEngine.dispose()
+        response_cache.close()
+        api.close()
+        if page_cache is not None:
+            page_cache.close()
+        CoordinatesUtil.get_cache().close()
 
-    user_service: UserService = UserService(api, db_session)
-    product_from_cart_service: ProductFromCartService = ProductFromCartService(
-        db_session
-    )
-    cart_service: CartService = CartService(api, db_session, product_from_cart_service)
-    product_service: ProductService = ProductService(api, db_session)
-    category_service: CategoryService = CategoryService(db_session)
+    app = FastAPI(lifespan=lifespan)
 
-    app.state.user_service = user_service
-    app.state.cart_service = cart_service
-    app.state.product_service = product_service
-    app.state.product_from_cart_service = product_from_cart_service
-    app.state.category_service = category_service
+    # Initialize the app state
+    app.state = type("State", (), {})()
 
-    user_service.process_users()
-    cart_service.process_carts()
-    product_service.process_products()
+    # Services are built per request around that request's own session
+    app.state.read_session = ReadSession
+    app.state.create_user_service = partial(UserService, api)
+    app.state.create_cart_service = create_cart_service
+    app.state.create_product_service = partial(ProductService, api)
+    app.state.create_product_from_cart_service = ProductFromCartService
+    app.state.create_category_service = CategoryService
+    app.state.etl_job = etl_job
+    app.state.read_executor = read_executor
+    app.state.response_cache = response_cache
 
     app.include_router(router=router, prefix="/api")
+    app.include_router(router=metrics_router)
 
     # add root redirect to /docs
     @app.get("/", include_in_schema=False)